@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Fleet-wide version of the exercise8/9/10 crypto map audits - takes directories and/or globs of
+saved Cisco IOS configs, spreads the parsing and queries across a pool of worker processes (one
+per core by default) and merges the per-device findings into one report
+'''
+
+# Imports
+import argparse
+from collections import OrderedDict
+import glob
+import multiprocessing
+import os
+import sys
+
+# Local Imports
+from cfg_index import index_parent, new_index, TRANSFORM_SET
+from cfg_query import QuerySet, FIND, W_CHILD, WO_CHILD
+from cfg_stream import iter_blocks
+import exercise8
+import exercise9
+import exercise10
+
+# Globals
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+CHUNK_SIZE = 16  # Configs handed to a worker at a time
+# Audit name:  description
+AUDITS = OrderedDict([('crypto-maps', 'Crypto maps'),
+                      ('pfs-group2', 'Crypto maps using PFS group 2'),
+                      ('no-aes', "Crypto maps which don't use AES (transform set)")])
+# Compiled once per worker process at import, all evaluated in one pass per config
+AUDIT_QUERIES = QuerySet([
+    ('crypto-maps', r'^' + exercise8.PARSE_STRING, None, FIND),
+    ('pfs-group2', r'^' + exercise9.P_PARSE_STRING, exercise9.C_PARSE_STRING, W_CHILD),
+    ('no-aes', r'^' + exercise10.P_PARSE_STRING, exercise10.C_PARSE_STRING, WO_CHILD)])
+
+__version__ = '0.0.2'
+
+
+def find_configs(paths):
+    '''Expand the passed directories/globs/file names into a sorted list of config files.'''
+    configs = set()
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, '*')
+        configs.update(file1 for file1 in glob.glob(path) if os.path.isfile(file1))
+    return sorted(configs)
+
+def audit_file(file1):
+    '''Run every audit against one config file in a single streaming pass.  Returns
+    (file1, device name, {audit:  [finding, ...]}, error) - all plain strings so the result is
+    cheap to send back from a worker process.'''
+    device = os.path.basename(file1)
+    findings = dict((audit, []) for audit in AUDITS)
+    conf_index = new_index()
+    pending = []
+    try:
+        for p_elmt in iter_blocks(file1):
+            if p_elmt.text.startswith('hostname '):
+                device = p_elmt.text.split()[1]
+            elif index_parent(conf_index, p_elmt, (TRANSFORM_SET,)):
+                continue
+            for audit in AUDIT_QUERIES.match(p_elmt):
+                if audit == 'no-aes':
+                    pending.append((p_elmt.text.strip(), exercise10.target_ts_line(p_elmt)))
+                else:
+                    findings[audit].append(p_elmt.text.strip())
+    except (IOError, OSError) as err:
+        return file1, device, findings, str(err)
+
+    # Transform sets may follow the crypto maps, so resolve them after the whole file is read
+    for map_name, ts_line in pending:
+        ts_parent = exercise10.parse_conf_file_ts(conf_index, ts_line) if ts_line else None
+        findings['no-aes'].append('{} -> {}'.format(map_name,
+                ts_parent.text.strip() if ts_parent else 'no transform set found'))
+
+    return file1, device, findings, None
+
+def audit_fleet(configs, processes=None, verbose=False):
+    '''Audit configs in parallel, return the merged report -
+    {audit:  [(device, file, finding), ...]}
+    and the list of (file, error) for configs which couldn't be read.'''
+    report = OrderedDict((audit, []) for audit in AUDITS)
+    errors = []
+    pool = multiprocessing.Pool(processes)
+    try:
+        for file1, device, findings, error in pool.imap_unordered(audit_file, configs,
+                                                                  CHUNK_SIZE):
+            if error:
+                errors.append((file1, error))
+                continue
+            if verbose:
+                print 'Audited {} ({})'.format(device, file1)
+            for audit in AUDITS:
+                report[audit].extend((device, file1, finding) for finding in findings[audit])
+    finally:
+        pool.close()
+        pool.join()
+
+    # Completion order is arbitrary - report in device order
+    for audit in report:
+        report[audit].sort()
+    return report, errors
+
+def output_report(report, errors):
+    for audit, description in AUDITS.items():
+        print '{} ({}):'.format(description, len(report[audit]))
+        for device, file1, finding in report[audit]:
+            print '  {} [{}]:  {}'.format(device, file1, finding)
+        print ''
+    if errors:
+        print 'Unreadable configs ({}):'.format(len(errors))
+        for file1, error in errors:
+            print '  {}:  {}'.format(file1, error)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Audit the crypto maps in a directory or glob '
+            'of Cisco IOS config files in parallel')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('paths', nargs='*', default=[CISCO_IOS_FILE],
+            help='config files, directories or globs to audit')
+    parser.add_argument('-p', '--processes', type=int,
+            help='number of worker processes (default is one per core)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='display verbose output')
+    args = parser.parse_args()
+
+    myconfigs = find_configs(args.paths)
+    if not myconfigs:
+        sys.exit('Error:  No config files found in {}'.format(' '.join(args.paths)))
+    if args.verbose:
+        print 'Auditing {} config files...'.format(len(myconfigs))
+    myreport, myerrors = audit_fleet(myconfigs, args.processes, args.verbose)
+    output_report(myreport, myerrors)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Synthetic config generator and benchmark for the class1 config audits
+
+Generates configs shaped like cisco_ipsec.txt with N crypto maps, M transform sets and K
+interfaces, then times each audit (exercise8 parse_conf_file, exercise9 parse_conf_file,
+exercise10 parse_conf_file_cm and parse_conf_file_ts) with each parser backend.  Every run
+happens in its own process so parse time, query time and peak memory aren't skewed by earlier
+runs.
+'''
+
+# Imports
+import argparse
+from ciscoconfparse import CiscoConfParse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+# Local Imports
+from cfg_cache import load_conf, CACHE_DIR
+from cfg_compact import load_compact
+from cfg_index import build_index, index_conf, iter_objects, CRYPTO_MAP, TRANSFORM_SET
+from cfg_stream import iter_blocks
+import exercise8
+import exercise9
+import exercise10
+
+# Globals
+BACKENDS = ('ciscoconfparse', 'stream', 'cache', 'compact')
+AUDITS = ('exercise8', 'exercise9', 'exercise10', 'exercise10-ts')
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+# Crypto maps, transform sets, interfaces
+DEFAULT_SIZES = ['100,10,100', '1000,100,1000', '10000,1000,10000']
+TS_TYPES = [('AES-SHA', 'esp-aes esp-sha-hmac'), ('AES192-SHA', 'esp-aes 192 esp-sha-hmac'),
+            ('3DES-SHA', 'esp-3des esp-sha-hmac')]
+
+__version__ = '0.0.5'
+
+
+def generate_config(template, outfile, maps, transform_sets, interfaces):
+    '''Write a config to outfile using template's boilerplate, replacing its transform sets,
+    crypto maps and interfaces with the requested number of generated ones.'''
+    generated = set()
+    with open(outfile, 'w') as fh1:
+        for p_elmt in iter_blocks(template):
+            if p_elmt.text.startswith('crypto ipsec transform-set '):
+                section = TRANSFORM_SET
+            elif p_elmt.text.startswith('crypto map '):
+                section = CRYPTO_MAP
+            elif p_elmt.text.startswith('interface '):
+                section = 'interface'
+            else:
+                fh1.write(p_elmt.text + '\n')
+                for c_elmt in p_elmt.all_children:
+                    fh1.write(c_elmt.text + '\n')
+                continue
+            # Generated sections replace the template's at its first occurrence
+            if section in generated:
+                continue
+            generated.add(section)
+            if section == TRANSFORM_SET:
+                for num in xrange(transform_sets):
+                    name, transforms = TS_TYPES[num % len(TS_TYPES)]
+                    fh1.write('crypto ipsec transform-set {}-{} {} \n mode tunnel\n'.format(
+                        name, num, transforms))
+            elif section == CRYPTO_MAP:
+                for num in xrange(maps):
+                    ts_num = num % transform_sets
+                    fh1.write('crypto map CRYPTO {} ipsec-isakmp \n'.format((num + 1) * 10))
+                    fh1.write(' set peer 10.{}.{}.1\n'.format(num / 256 % 256, num % 256))
+                    fh1.write(' set transform-set {}-{} \n'.format(
+                        TS_TYPES[ts_num % len(TS_TYPES)][0], ts_num))
+                    fh1.write(' set pfs group{}\n'.format(2 if num % 2 else 5))
+                    fh1.write(' match address VPN-TEST{}\n'.format(num + 1))
+            else:
+                for num in xrange(interfaces):
+                    fh1.write('interface GigabitEthernet0/{}\n'.format(num))
+                    fh1.write(' description *** generated interface {} ***\n'.format(num))
+                    fh1.write(' ip address 10.{}.{}.1 255.255.255.0\n'.format(
+                        num / 256 % 256, num % 256))
+                    fh1.write(' crypto map CRYPTO\n')
+                    fh1.write('!\n')
+
+def parse_backend(backend, file1, cache_dir=CACHE_DIR):
+    '''Parse file1 with backend and return its crypto object index.'''
+    if backend == 'ciscoconfparse':
+        return index_conf(CiscoConfParse(file1))
+    elif backend == 'stream':
+        return build_index(iter_blocks(file1))
+    elif backend == 'cache':
+        return build_index(load_conf(file1, cache_dir))
+    elif backend == 'compact':
+        return build_index(load_compact(file1).iter_parents())
+    else:
+        raise ValueError('Unsupported backend {}'.format(backend))
+
+def lookup_ts(conf_index):
+    '''exercise10's transform set lookup for every crypto map.'''
+    for p_elmt in iter_objects(conf_index, CRYPTO_MAP):
+        ts_line = exercise10.target_ts_line(p_elmt)
+        if ts_line:
+            exercise10.parse_conf_file_ts(conf_index, ts_line)
+
+def run_audit(backend, audit, file1, cache_dir, outq):
+    '''Time one parse and audit, runs in its own process.  Puts (parse seconds, query seconds,
+    peak memory growth in KB) in outq.'''
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    conf_index = parse_backend(backend, file1, cache_dir)
+    parsed = time.time()
+    if audit == 'exercise10-ts':
+        lookup_ts(conf_index)
+    else:
+        for _ in sys.modules[audit].audit_index(conf_index):
+            pass
+    queried = time.time()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    outq.put((parsed - start, queried - parsed, peak_rss - start_rss))
+
+def bench(file1, backends, audits, cache_dir=CACHE_DIR):
+    '''Run each backend/audit combination against file1, return list of
+    (backend, audit, parse seconds, query seconds, peak KB).  The cache backend keeps its parsed
+    config cache in cache_dir.'''
+    if 'cache' in backends:
+        # Benchmark cache hits, not the first parse
+        load_conf(file1, cache_dir)
+    results = []
+    outq = multiprocessing.Queue()
+    for backend in backends:
+        for audit in audits:
+            process = multiprocessing.Process(target=run_audit,
+                                              args=(backend, audit, file1, cache_dir, outq))
+            process.start()
+            process.join()
+            if process.exitcode:
+                results.append((backend, audit, None, None, None))
+            else:
+                results.append((backend, audit) + outq.get())
+    return results
+
+def output_results(size, file1, results):
+    maps, transform_sets, interfaces = size
+    print '{} crypto maps, {} transform sets, {} interfaces ({} lines, {} KB):'.format(
+        maps, transform_sets, interfaces, sum(1 for _ in open(file1)),
+        os.path.getsize(file1) / 1024)
+    print '  {:<16}{:<16}{:>12}{:>12}{:>12}'.format('Backend', 'Audit', 'Parse (s)', 'Query (s)',
+                                                   'Peak KB')
+    for backend, audit, parse_time, query_time, peak_kb in results:
+        if parse_time is None:
+            print '  {:<16}{:<16}{:>12}'.format(backend, audit, 'failed')
+        else:
+            print '  {:<16}{:<16}{:>12.4f}{:>12.4f}{:>12}'.format(backend, audit, parse_time,
+                                                                query_time, peak_kb)
+    print ''
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the class1 config audits against '
+            'generated configs')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-t', '--template', help='specify config file to base generated configs '
+            'on', default=CISCO_IOS_FILE)
+    parser.add_argument('-s', '--size', action='append', help='config size as '
+            '<crypto maps>,<transform sets>,<interfaces> - may be repeated (default {})'.format(
+            ' '.join(DEFAULT_SIZES)))
+    parser.add_argument('-b', '--backend', action='append', choices=BACKENDS,
+            help='parser backend to benchmark - may be repeated (default all)')
+    parser.add_argument('-a', '--audit', action='append', choices=AUDITS,
+            help='audit to benchmark - may be repeated (default all)')
+    parser.add_argument('-k', '--keep', help='keep generated configs in this directory')
+    args = parser.parse_args()
+
+    try:
+        mysizes = [tuple(int(num) for num in size.split(','))
+                   for size in args.size or DEFAULT_SIZES]
+    except ValueError:
+        sys.exit('Error:  Invalid size - use <crypto maps>,<transform sets>,<interfaces>')
+    if any(len(size) != 3 or size[1] < 1 for size in mysizes):
+        sys.exit('Error:  Invalid size - use <crypto maps>,<transform sets>,<interfaces> with at '
+                 'least one transform set')
+    if args.keep and not os.path.isdir(args.keep):
+        os.makedirs(args.keep)
+    workdir = args.keep or tempfile.mkdtemp()
+    # Caches of the generated configs are never kept
+    mycache_dir = tempfile.mkdtemp()
+    try:
+        for mysize in mysizes:
+            myfile = os.path.join(workdir, 'bench-{}-{}-{}.txt'.format(*mysize))
+            generate_config(args.template, myfile, *mysize)
+            myresults = bench(myfile, args.backend or BACKENDS, args.audit or AUDITS, mycache_dir)
+            output_results(mysize, myfile, myresults)
+    finally:
+        shutil.rmtree(mycache_dir)
+        if not args.keep:
+            shutil.rmtree(workdir)
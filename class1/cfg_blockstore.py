@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Content-addressed store for Cisco IOS config blocks - each top level block (parent line plus every
+line up to the next top level line) is stored once under the SHA-1 hash of its raw text and a
+device's config is stored as the list of its block hashes, so the stored config is byte for byte
+the original file (blank lines, comments and line endings included)
+
+Configs generated from the same template (e.g. class5/access_switch3.j2) share most of their
+blocks, so a fleet archive shrinks to the unique blocks plus one short manifest per device, and
+comparing two blocks (or two whole configs) is a hash comparison.
+
+Store layout:
+ * <store>/blocks/<first 2 hex digits>/<hash> - block text
+ * <store>/devices/<device> - manifest, one block hash per line in config order
+
+Devices are named by their config file's path relative to a root directory (default the current
+directory), so a device keeps the same name however its configs are added and configs with the same
+file name in different directories don't overwrite each other.  A device already in the store is
+only overwritten when replace is requested.
+'''
+
+# Imports
+import argparse
+from collections import OrderedDict
+import hashlib
+import os
+import sys
+import tempfile
+
+# Local Imports
+from cfg_audit import find_configs
+
+# Globals
+STORE_DIR = 'cfg_blockstore'
+
+__version__ = '0.0.3'
+
+
+def iter_raw_blocks(file1):
+    '''Generator yielding the raw text of each top level block of file1 (a file name or an open
+    file/iterable of lines) - a line starting with a non-blank character and every following line
+    (children, blank lines) up to the next one.  Joined back together the blocks are exactly the
+    original file.'''
+    if isinstance(file1, basestring):
+        with open(file1, 'rb') as fh1:
+            for block in iter_raw_blocks(fh1):
+                yield block
+        return
+
+    block = []
+    for line in file1:
+        if block and not line[:1].isspace():
+            yield ''.join(block)
+            block = []
+        block.append(line)
+    if block:
+        yield ''.join(block)
+
+def _write_file(path, data):
+    # Write to a temporary file and rename so a partial file is never left in the store
+    dir1 = os.path.dirname(path)
+    if not os.path.isdir(dir1):
+        os.makedirs(dir1)
+    fd, tmp_path = tempfile.mkstemp(dir=dir1)
+    with os.fdopen(fd, 'wb') as fh1:
+        fh1.write(data)
+    os.rename(tmp_path, path)
+
+def device_names(configs, root=os.curdir):
+    '''Return [(device, file), ...] for configs - each device named by its file's path relative to
+    root (/ separated).  Raises ValueError for a config outside root.'''
+    root = os.path.abspath(root)
+    names = []
+    for file1 in configs:
+        device = os.path.relpath(os.path.abspath(file1), root)
+        if device == os.pardir or device.startswith(os.pardir + os.sep):
+            raise ValueError('{} is not under {}'.format(file1, root))
+        names.append((device.replace(os.sep, '/'), file1))
+    return names
+
+class BlockStore(object):
+    '''Deduplicating store of config blocks'''
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        # hash:  block text - blocks read or added this session
+        self.blocks = {}
+        # device:  [hash, ...]
+        self.devices = OrderedDict()
+        # Blocks added this session which aren't on disk yet
+        self.new_blocks = set()
+        # Devices added this session - a second config under the same name is an error
+        self.added = {}
+        devices_dir = os.path.join(self.path, 'devices')
+        manifests = []
+        for dir1, _, files in os.walk(devices_dir):
+            manifests.extend(os.path.join(dir1, file1) for file1 in files)
+        for manifest in sorted(manifests):
+            device = os.path.relpath(manifest, devices_dir).replace(os.sep, '/')
+            with open(manifest) as fh1:
+                self.devices[device] = fh1.read().split()
+
+    def block_path(self, digest):
+        return os.path.join(self.path, 'blocks', digest[:2], digest)
+
+    def put_block(self, text):
+        '''Add a block's text if it isn't already stored, return its hash.'''
+        digest = hashlib.sha1(text).hexdigest()
+        if digest not in self.blocks and not os.path.isfile(self.block_path(digest)):
+            self.blocks[digest] = text
+            self.new_blocks.add(digest)
+        return digest
+
+    def get_block(self, digest):
+        if digest not in self.blocks:
+            with open(self.block_path(digest), 'rb') as fh1:
+                self.blocks[digest] = fh1.read()
+        return self.blocks[digest]
+
+    def add_config(self, device, file1, replace=False):
+        '''Store file1 as device - blocks already in the store are only referenced.  Raises
+        ValueError if another file was already added as device this session, or if device is
+        already in the store and replace isn't set.'''
+        if device in self.added:
+            if self.added[device] != file1:
+                raise ValueError('Device {} from {} is already stored from {}'.format(
+                    device, file1, self.added[device]))
+        elif device in self.devices and not replace:
+            raise ValueError('Device {} from {} is already in {} - use replace to overwrite '
+                             'it'.format(device, file1, self.path))
+        self.added[device] = file1
+        self.devices[device] = [self.put_block(text) for text in iter_raw_blocks(file1)]
+        return self.devices[device]
+
+    def get_config(self, device):
+        '''Rebuild a device's config text from its blocks.'''
+        return ''.join(self.get_block(digest) for digest in self.devices[device])
+
+    def same_config(self, device1, device2):
+        return self.devices[device1] == self.devices[device2]
+
+    def save(self):
+        '''Write new blocks and all manifests to disk.'''
+        for digest in self.new_blocks:
+            _write_file(self.block_path(digest), self.blocks[digest])
+        self.new_blocks = set()
+        for device, digests in self.devices.items():
+            _write_file(os.path.join(self.path, 'devices', *device.split('/')),
+                        '\n'.join(digests) + '\n')
+
+    def stats(self):
+        '''Return (block references, unique blocks).'''
+        refs = sum(len(digests) for digests in self.devices.values())
+        unique = len(set(digest for digests in self.devices.values() for digest in digests))
+        return refs, unique
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Store Cisco IOS config files in a '
+            'deduplicating block store')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('paths', nargs='*', help='config files, directories or globs to add')
+    parser.add_argument('-d', '--store', help='specify store directory (default {})'.format(
+            STORE_DIR), default=STORE_DIR)
+    parser.add_argument('-g', '--get', help='output the stored config of this device')
+    parser.add_argument('-r', '--root', help='directory device names are relative to (default '
+            'current directory)', default=os.curdir)
+    parser.add_argument('--replace', action='store_true',
+            help='overwrite devices already in the store')
+    args = parser.parse_args()
+
+    mystore = BlockStore(args.store)
+    if args.paths:
+        myconfigs = find_configs(args.paths)
+        if not myconfigs:
+            sys.exit('Error:  No config files found in {}'.format(' '.join(args.paths)))
+        try:
+            for mydevice, myfile in device_names(myconfigs, args.root):
+                mystore.add_config(mydevice, myfile, args.replace)
+        except ValueError as err:
+            sys.exit('Error:  {}'.format(err))
+        mystore.save()
+    if args.get:
+        if args.get not in mystore.devices:
+            sys.exit('Error:  No device {} in {}'.format(args.get, args.store))
+        sys.stdout.write(mystore.get_config(args.get))
+    else:
+        myrefs, myunique = mystore.stats()
+        print '{} devices, {} block references, {} unique blocks'.format(len(mystore.devices),
+                                                                         myrefs, myunique)
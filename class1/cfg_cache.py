@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+On-disk cache of parsed Cisco IOS configs keyed by a SHA-1 hash of the file contents - unchanged
+configs are loaded straight from the cache instead of being parsed again
+
+Cache file layout (little-endian, all offsets in bytes):
+ * header - magic, format version, number of lines
+ * int32 array - index of each line's parent (-1 for top level lines)
+ * int32 array - line number in the original config
+ * uint32 array - end offset of each line's text in the text blob
+ * int32 array - index just past each line's last descendant
+ * text blob - all line texts concatenated
+
+Lines are stored in config order, so parents always come before their children and a line's
+descendants are the contiguous range after it.  The file is memory mapped and the arrays are
+loaded with array.fromstring.  Nothing is built per line on a cache hit - the arrays are wrapped
+in a CachedConf and lines are cfg_compact.CompactLine views created only when accessed, with their
+text sliced out of the blob on demand.  A file whose size doesn't match its header is a miss.
+'''
+
+# Imports
+import argparse
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+# Local Imports
+from cfg_compact import CompactConf
+from cfg_stream import iter_blocks
+
+# Globals
+CACHE_DIR = '.cfgcache'
+CACHE_EXT = '.cfgc'
+CACHE_MAGIC = 'CFGC'
+CACHE_VERSION = 2
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+HASH_BLOCK = 1024 * 1024
+HEADER = struct.Struct('<4sII')
+
+__version__ = '0.0.2'
+
+
+def file_hash(file1):
+    '''Return the SHA-1 hex digest of file1's contents.'''
+    digest = hashlib.sha1()
+    with open(file1, 'rb') as fh1:
+        for chunk in iter(lambda: fh1.read(HASH_BLOCK), ''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_path(file1, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, file_hash(file1) + CACHE_EXT)
+
+def _check_byteorder(arr):
+    # Arrays are stored little-endian
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr
+
+class BlobTexts(object):
+    '''Sequence of line texts sliced out of the text blob on access'''
+    __slots__ = ('blob', 'text_ends')
+
+    def __init__(self, blob, text_ends):
+        self.blob = blob
+        self.text_ends = text_ends
+
+    def __len__(self):
+        return len(self.text_ends)
+
+    def __getitem__(self, idx):
+        return self.blob[self.text_ends[idx - 1] if idx else 0:self.text_ends[idx]]
+
+class CachedConf(CompactConf):
+    '''A cached config - the cache file's arrays viewed through the CompactConf interface'''
+    __slots__ = ()
+
+    def __init__(self, texts, parent_idx, linenums, ends):
+        self.texts = texts
+        self.parent_idx = parent_idx
+        self.linenums = linenums
+        self.ends = ends
+
+def write_cache(parents, path):
+    '''Serialize a list of top level config objects (with children) to path.  Written to a
+    temporary file and renamed into place so readers never see a partial cache file.'''
+    parent_idx = array('i')
+    linenums = array('i')
+    text_ends = array('I')
+    ends = array('i')
+    texts = []
+    offset = 0
+    positions = {}
+    for p_elmt in parents:
+        for elmt in [p_elmt] + p_elmt.all_children:
+            positions[id(elmt)] = len(linenums)
+            parent_idx.append(positions[id(elmt.parent)] if elmt.is_child else -1)
+            linenums.append(elmt.linenum)
+            offset += len(elmt.text)
+            text_ends.append(offset)
+            texts.append(elmt.text)
+            ends.append(0)
+        # Each line's range ends where the next line at its depth or shallower starts
+        open_ids = []
+        for idx in xrange(positions[id(p_elmt)], len(linenums)):
+            while open_ids and open_ids[-1] != parent_idx[idx]:
+                ends[open_ids.pop()] = idx
+            open_ids.append(idx)
+        for idx in open_ids:
+            ends[idx] = len(linenums)
+
+    cache_dir = os.path.dirname(path) or '.'
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, 'wb') as fh1:
+        fh1.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(linenums)))
+        for arr in (parent_idx, linenums, text_ends, ends):
+            _check_byteorder(arr).tofile(fh1)
+        fh1.write(''.join(texts))
+    os.rename(tmp_path, path)
+
+def read_cache(path):
+    '''Load a cache file, return a CachedConf or None if the file isn't a valid cache file.'''
+    with open(path, 'rb') as fh1:
+        size = os.fstat(fh1.fileno()).st_size
+        if size < HEADER.size:
+            return None
+        cache_map = mmap.mmap(fh1.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, nlines = HEADER.unpack_from(cache_map)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return None
+        pos = HEADER.size
+        arrays = []
+        for typecode in ('i', 'i', 'I', 'i'):
+            arr = array(typecode)
+            if pos + nlines * arr.itemsize > size:
+                return None
+            arr.fromstring(cache_map[pos:pos + nlines * arr.itemsize])
+            arrays.append(_check_byteorder(arr))
+            pos += nlines * arr.itemsize
+        parent_idx, linenums, text_ends, ends = arrays
+        # Truncated or padded files are a miss, not a config with missing text
+        if size != pos + (text_ends[-1] if nlines else 0):
+            return None
+        text_blob = cache_map[pos:]
+    finally:
+        cache_map.close()
+
+    return CachedConf(BlobTexts(text_blob, text_ends), parent_idx, linenums, ends)
+
+def load_conf(file1, cache_dir=CACHE_DIR, verbose=False):
+    '''Return the list of top level config objects for file1 - CompactLine views of the cache if
+    the file's contents are unchanged, otherwise ConfLine objects from parsing it (and the result
+    is saved to the cache).'''
+    path = cache_path(file1, cache_dir)
+    if os.path.isfile(path):
+        conf = read_cache(path)
+        if conf is not None:
+            if verbose:
+                print 'Loaded {} from cache {}'.format(file1, path)
+            return list(conf.iter_parents())
+    parents = list(iter_blocks(file1))
+    write_cache(parents, path)
+    if verbose:
+        print 'Parsed {} and saved to cache {}'.format(file1, path)
+    return parents
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parse Cisco IOS config files into the parsed '
+            'config cache')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('files', nargs='*', default=[CISCO_IOS_FILE],
+            help='config files to cache')
+    parser.add_argument('-d', '--cachedir', help='specify cache directory (default {})'.format(
+            CACHE_DIR), default=CACHE_DIR)
+    args = parser.parse_args()
+
+    for myfile in args.files:
+        load_conf(myfile, args.cachedir, verbose=True)
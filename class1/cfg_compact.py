@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Compact in-memory model for parsed Cisco IOS configs - meant for holding many configs at once
+
+A CompactConf stores every line of a config in flat arrays instead of one object per line:
+ * texts - the line texts, interned so identical lines (e.g. " set pfs group2") are stored once
+   across all loaded configs
+ * parent_idx - int array, offset of each line's parent (-1 for top level lines)
+ * linenums - int array, line number in the original config
+ * ends - int array, offset just past each line's last descendant (lines are kept in config
+   order, so a line's descendants are the contiguous range after it)
+
+CompactLine objects are small __slots__ views (config + offset) created on access.  They provide
+text, children, all_children, parent and linenum like CiscoConfParse objects so the
+exercise8/9/10 queries run on them unchanged.
+'''
+
+# Imports
+import argparse
+from array import array
+import glob
+
+# Local Imports
+from cfg_stream import iter_blocks
+
+# Globals
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+
+__version__ = '0.0.1'
+
+
+class CompactLine(object):
+    '''View of one line of a CompactConf'''
+    __slots__ = ('conf', 'idx')
+
+    def __init__(self, conf, idx):
+        self.conf = conf
+        self.idx = idx
+
+    @property
+    def text(self):
+        return self.conf.texts[self.idx]
+
+    @property
+    def linenum(self):
+        return self.conf.linenums[self.idx]
+
+    @property
+    def indent(self):
+        text = self.conf.texts[self.idx]
+        return len(text) - len(text.lstrip())
+
+    @property
+    def is_child(self):
+        return self.conf.parent_idx[self.idx] >= 0
+
+    @property
+    def parent(self):
+        # Same convention as CiscoConfParse - a top level line is its own parent
+        parent = self.conf.parent_idx[self.idx]
+        return CompactLine(self.conf, parent) if parent >= 0 else self
+
+    @property
+    def children(self):
+        return [CompactLine(self.conf, idx) for idx in self.conf.child_ids(self.idx)]
+
+    @property
+    def all_children(self):
+        return [CompactLine(self.conf, idx) for idx in xrange(self.idx + 1,
+                                                              self.conf.ends[self.idx])]
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactLine) and self.conf is other.conf and
+                self.idx == other.idx)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.conf), self.idx))
+
+    def __repr__(self):
+        return '<CompactLine # {} {!r}>'.format(self.linenum, self.text)
+
+class CompactConf(object):
+    '''A parsed config stored as flat arrays'''
+    __slots__ = ('texts', 'parent_idx', 'linenums', 'ends')
+
+    def __init__(self):
+        self.texts = []
+        self.parent_idx = array('i')
+        self.linenums = array('i')
+        self.ends = array('i')
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add_block(self, elmt, parent=-1):
+        '''Append a parsed block (e.g. from cfg_stream.iter_blocks) and all of its children.'''
+        idx = len(self.texts)
+        self.texts.append(intern(elmt.text))
+        self.parent_idx.append(parent)
+        self.linenums.append(elmt.linenum)
+        self.ends.append(idx + 1)
+        for c_elmt in elmt.children:
+            self.add_block(c_elmt, idx)
+        self.ends[idx] = len(self.texts)
+
+    def child_ids(self, idx):
+        '''Offsets of the direct children of line idx.'''
+        child = idx + 1
+        while child < self.ends[idx]:
+            yield child
+            child = self.ends[child]
+
+    def iter_parents(self):
+        '''Top level lines in config order - what build_index/QuerySet.evaluate expect.'''
+        idx = 0
+        while idx < len(self.texts):
+            yield CompactLine(self, idx)
+            idx = self.ends[idx]
+
+def load_compact(file1):
+    '''Stream file1 into a CompactConf - only one block is ever held as full objects.'''
+    conf = CompactConf()
+    for p_elmt in iter_blocks(file1):
+        conf.add_block(p_elmt)
+    return conf
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load Cisco IOS config files into the compact '
+            'model and report line sharing')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('paths', nargs='*', default=[CISCO_IOS_FILE],
+            help='config files or globs to load')
+    args = parser.parse_args()
+
+    myconfs = {}
+    for mypath in args.paths:
+        for myfile in glob.glob(mypath):
+            myconfs[myfile] = load_compact(myfile)
+    mylines = sum(len(conf) for conf in myconfs.values())
+    myunique = len(set(id(text) for conf in myconfs.values() for text in conf.texts))
+    print 'Loaded {} configs, {} lines, {} distinct line texts'.format(len(myconfs), mylines,
+                                                                       myunique)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Block aware diff of two Cisco IOS config revisions built on the parent/child model - reports the
+added, removed and changed children of each parent
+
+Each block (a line plus all of its children) is hashed once; blocks whose hashes match are
+skipped without looking at their children, so only blocks which actually differ are descended
+into.  Lines are matched by text, which makes the diff roughly linear in the config size.
+'''
+
+# Imports
+import argparse
+from collections import OrderedDict
+import hashlib
+
+# Local Imports
+from cfg_cache import load_conf
+from cfg_stream import iter_blocks
+
+# Globals
+ADDED = '+'
+REMOVED = '-'
+CHANGED = '~'
+OLD_FILE = 'cisco_ipsec.txt'
+NEW_FILE = 'cisco_ipsec2.txt'
+
+__version__ = '0.0.2'
+
+
+def block_hash(elmt, hashes):
+    '''Return the digest of elmt's text and all its children, memoized in hashes so each line is
+    only hashed once.  Trailing whitespace isn't significant.'''
+    # Keyed by the object itself, not id() - cached config lines are views created on access, so
+    # an id can be reused once a view is freed
+    digest = hashes.get(elmt)
+    if digest is None:
+        block_digest = hashlib.sha1(elmt.text.rstrip())
+        for c_elmt in elmt.children:
+            block_digest.update(block_hash(c_elmt, hashes))
+        digest = hashes[elmt] = block_digest.digest()
+    return digest
+
+def keyed(elmts):
+    '''Key config objects by (text, occurrence) so repeated identical lines pair up in order.'''
+    keys = OrderedDict()
+    seen = {}
+    for elmt in elmts:
+        text = elmt.text.rstrip()
+        occurrence = seen.get(text, 0)
+        seen[text] = occurrence + 1
+        keys[(text, occurrence)] = elmt
+    return keys
+
+def diff_blocks(old_elmts, new_elmts, hashes=None):
+    '''Compare two lists of sibling config objects.  Returns a list of (op, object, child diffs)
+    where op is ADDED, REMOVED or CHANGED and child diffs (for CHANGED) has the same format.'''
+    if hashes is None:
+        hashes = {}
+    old_keys = keyed(old_elmts)
+    new_keys = keyed(new_elmts)
+    diffs = []
+    for key, new_elmt in new_keys.items():
+        old_elmt = old_keys.get(key)
+        if old_elmt is None:
+            diffs.append((ADDED, new_elmt, []))
+        elif block_hash(old_elmt, hashes) != block_hash(new_elmt, hashes):
+            diffs.append((CHANGED, new_elmt, diff_blocks(old_elmt.children, new_elmt.children,
+                                                         hashes)))
+    for key, old_elmt in old_keys.items():
+        if key not in new_keys:
+            diffs.append((REMOVED, old_elmt, []))
+
+    return diffs
+
+def output_diff(diffs):
+    for op, elmt, child_diffs in diffs:
+        if op == CHANGED:
+            print '{} {}'.format(op, elmt.text.rstrip())
+            output_diff(child_diffs)
+        else:
+            # Whole block added/removed
+            for line in [elmt] + elmt.all_children:
+                print '{} {}'.format(op, line.text.rstrip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Show the block level differences between two '
+            'Cisco IOS config files')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('old', nargs='?', help='old config file', default=OLD_FILE)
+    parser.add_argument('new', nargs='?', help='new config file', default=NEW_FILE)
+    parser.add_argument('-c', '--cache', action='store_true',
+            help='use the parsed config cache, only parse files which changed')
+    args = parser.parse_args()
+
+    if args.cache:
+        old_parents, new_parents = load_conf(args.old), load_conf(args.new)
+    else:
+        old_parents, new_parents = list(iter_blocks(args.old)), list(iter_blocks(args.new))
+    output_diff(diff_blocks(old_parents, new_parents))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Build a one pass index of the IPsec related objects in a parsed Cisco IOS config - transform sets,
+ISAKMP policies and crypto maps keyed by name - so cross-reference lookups don't rescan the config
+'''
+
+# Imports
+from collections import OrderedDict
+import re
+
+# Globals
+CRYPTO_MAP = 'crypto-map'
+ISAKMP_POLICY = 'isakmp-policy'
+TRANSFORM_SET = 'transform-set'
+# Compile once at import time, not once per lookup
+INDEX_PATTERNS = [(TRANSFORM_SET, re.compile(r'^crypto ipsec transform-set ([\w-]+)\s')),
+                  (ISAKMP_POLICY, re.compile(r'^crypto isakmp policy (\d+)')),
+                  (CRYPTO_MAP, re.compile(r'^crypto map ([\w-]+)(?: (\d+)\b)?'))]
+
+__version__ = '0.0.2'
+
+
+def new_index():
+    '''Return an empty index - {object type:  {name:  [parent object, ...]}}.'''
+    return dict((obj_type, OrderedDict()) for obj_type, _ in INDEX_PATTERNS)
+
+def index_key(obj_type, p_elmt, match):
+    '''Name p_elmt is indexed under.  Crypto map entries are keyed by "<name> <sequence>", map
+    wide lines without a sequence number (crypto map X local-address ...) by their full text.'''
+    if obj_type == CRYPTO_MAP:
+        if match.group(2):
+            return '{} {}'.format(match.group(1), match.group(2))
+        return p_elmt.text.rstrip()
+    return match.group(1)
+
+def index_parent(cfg_index, p_elmt, obj_types=None):
+    '''Add one parent object to cfg_index if it is one of obj_types (default all types).  Returns
+    the object type it was indexed as or None.  Lets callers streaming a config index as they go.
+    Objects with the same name are all kept, in config order.'''
+    # Only crypto lines are of interest, cheap test before trying the patterns
+    if not p_elmt.text.startswith('crypto '):
+        return None
+    for obj_type, pattern in INDEX_PATTERNS:
+        if obj_types and obj_type not in obj_types:
+            continue
+        match = pattern.match(p_elmt.text)
+        if match:
+            cfg_index[obj_type].setdefault(index_key(obj_type, p_elmt, match), []).append(p_elmt)
+            return obj_type
+
+    return None
+
+def build_index(parents):
+    '''Walk the top level (parent) config objects once and return a dictionary of
+    {object type:  {name:  [parent object, ...]}}.  Crypto maps are keyed by "<name> <sequence>".
+    parents is any iterable of objects with a text attribute - e.g. the output of
+    CiscoConfParse.find_objects(r'^\S') or cfg_stream.iter_blocks().'''
+    cfg_index = new_index()
+    for p_elmt in parents:
+        index_parent(cfg_index, p_elmt)
+
+    return cfg_index
+
+def index_conf(cisco_conf):
+    '''Build the index from a CiscoConfParse object.'''
+    return build_index(cisco_conf.find_objects(r'^\S'))
+
+def iter_objects(cfg_index, obj_type):
+    '''Generator yielding every indexed object of obj_type - by name, in the order each name first
+    appears in the config.'''
+    for p_elmts in cfg_index[obj_type].itervalues():
+        for p_elmt in p_elmts:
+            yield p_elmt
+
+def lookup(cfg_index, obj_type, name):
+    '''Return the first object of obj_type called name or None.'''
+    p_elmts = cfg_index[obj_type].get(name)
+    return p_elmts[0] if p_elmts else None
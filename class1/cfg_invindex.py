@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Fleet-wide inverted index of Cisco IOS config lines - every normalized config line of every saved
+config is indexed along with its top level parent, so questions like "which devices have
+crypto map CRYPTO 20 with set pfs group2" are answered by an index lookup instead of re-parsing
+every config
+
+The index is a shelve database:
+ * normalized line text -> list of (device id, normalized top level parent - '' for top level
+   lines)
+ * DEVICES_KEY -> list of (hostname, config file) - position is the device id
+
+Usage:
+ cfg_invindex.py build <configs/directories/globs>
+ cfg_invindex.py query -p 'crypto map CRYPTO 20' 'set pfs group2'
+'''
+
+# Imports
+import argparse
+from collections import defaultdict
+import contextlib
+import glob
+import multiprocessing
+import os
+import shelve
+import sys
+
+# Local Imports
+from cfg_audit import find_configs, CHUNK_SIZE
+from cfg_stream import iter_blocks
+
+# Globals
+DEVICES_KEY = '\x00devices'
+INDEX_FILE = 'cfg_invindex'  # dbm backends may add their own extension(s)
+
+__version__ = '0.0.2'
+
+
+def normalize(text):
+    '''Strip leading/trailing whitespace and collapse internal runs of whitespace.'''
+    return ' '.join(text.split())
+
+def index_file(file1):
+    '''Return (file1, device name, set of (line, parent) pairs, error) for one config - runs in
+    a worker process.'''
+    device = os.path.basename(file1)
+    entries = set()
+    try:
+        for p_elmt in iter_blocks(file1):
+            parent = normalize(p_elmt.text)
+            if parent.startswith('hostname '):
+                device = parent.split()[1]
+            entries.add((parent, ''))
+            for c_elmt in p_elmt.all_children:
+                entries.add((normalize(c_elmt.text), parent))
+    except (IOError, OSError) as err:
+        return file1, device, entries, str(err)
+
+    return file1, device, entries, None
+
+def build_index(configs, index_file1=INDEX_FILE, processes=None, verbose=False):
+    '''Index configs in parallel and write the index to index_file1, replacing any existing
+    index.  Returns the list of (file, error) for configs which couldn't be read.'''
+    postings = defaultdict(list)
+    devices = []
+    errors = []
+    pool = multiprocessing.Pool(processes)
+    try:
+        for file1, device, entries, error in pool.imap_unordered(index_file, configs, CHUNK_SIZE):
+            if error:
+                errors.append((file1, error))
+                continue
+            if verbose:
+                print 'Indexed {} ({}) - {} entries'.format(device, file1, len(entries))
+            device_id = len(devices)
+            devices.append((device, file1))
+            for line, parent in entries:
+                # Parents repeat across every child and every device - store each string once
+                postings[intern(line)].append((device_id, intern(parent)))
+    finally:
+        pool.close()
+        pool.join()
+
+    with contextlib.closing(shelve.open(index_file1, 'n', protocol=2)) as index_db:
+        index_db[DEVICES_KEY] = devices
+        for line, line_postings in postings.iteritems():
+            index_db[line] = line_postings
+
+    return errors
+
+def query_index(index_db, lines, parent=None):
+    '''Return the sorted list of (hostname, config file) for devices with every line in lines
+    under the same top level parent.  parent, if given, is a prefix the parent must start with,
+    ending on a word boundary ('crypto map CRYPTO 20' doesn't match 'crypto map CRYPTO 200').  To
+    match top level lines pass them in lines with no parent.'''
+    parent = normalize(parent) if parent else None
+    matches = None
+    for line in lines:
+        line = normalize(line)
+        line_matches = set()
+        for device_id, line_parent in index_db.get(line, []):
+            if parent is None or line_parent == parent or line_parent.startswith(parent + ' '):
+                line_matches.add((device_id, line_parent))
+        matches = line_matches if matches is None else matches & line_matches
+        if not matches:
+            return []
+
+    devices = index_db[DEVICES_KEY]
+    return sorted(set(devices[device_id] for device_id, _ in matches))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query a fleet-wide inverted index of '
+            'Cisco IOS config lines')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-i', '--index', help='specify index file (default {})'.format(
+            INDEX_FILE), default=INDEX_FILE)
+    subparsers = parser.add_subparsers(dest='command')
+    build_parser = subparsers.add_parser('build', help='index config files')
+    build_parser.add_argument('paths', nargs='+', help='config files, directories or globs')
+    build_parser.add_argument('-p', '--processes', type=int,
+            help='number of worker processes (default is one per core)')
+    build_parser.add_argument('-v', '--verbose', action='store_true',
+            help='display verbose output')
+    query_parser = subparsers.add_parser('query', help='find devices with config lines')
+    query_parser.add_argument('lines', nargs='+', help='config lines which must all be present')
+    query_parser.add_argument('-p', '--parent', help='parent the lines must be under (prefix '
+            'match on whole words, e.g. "crypto map CRYPTO 20")')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        myconfigs = find_configs(args.paths)
+        if not myconfigs:
+            sys.exit('Error:  No config files found in {}'.format(' '.join(args.paths)))
+        myerrors = build_index(myconfigs, args.index, args.processes, args.verbose)
+        print 'Indexed {} configs into {}'.format(len(myconfigs) - len(myerrors), args.index)
+        for myfile, myerror in myerrors:
+            print 'Error:  Could not index {}:  {}'.format(myfile, myerror)
+    else:
+        if not glob.glob(args.index + '*'):
+            sys.exit('Error:  No index {} - run build first'.format(args.index))
+        with contextlib.closing(shelve.open(args.index, 'r')) as myindex:
+            mydevices = query_index(myindex, args.lines, args.parent)
+        print 'Devices matching ({}):'.format(len(mydevices))
+        for myhostname, myfile in mydevices:
+            print '  {} [{}]'.format(myhostname, myfile)
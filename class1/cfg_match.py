@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Multi-pattern literal matcher for config searches (Aho-Corasick)
+
+Most audit patterns - 'crypto map CRYPTO', 'set pfs group2', 'transform-set AES' - are plain
+literals, either anywhere in the line or anchored at its start.  Instead of one regex search or
+str.find per pattern per line, all literals are compiled into a single automaton and each line is
+scanned once, returning every pattern it matches.  The cost per line depends on the line length,
+not the number of patterns, so it pays off for large rule sets; below about LITERAL_MATCHER_MIN
+patterns a single combined regex search (which runs in C) is faster.  When every pattern is
+anchored the scan stops as soon as no pattern can still match, so at most the longest pattern's
+length of each line is read.
+'''
+
+# Imports
+from collections import deque
+
+# Globals
+PREFIX = 'prefix'  # Literal must start the line (regex ^literal)
+SUBSTRING = 'substring'  # Literal anywhere in the line (regex literal/str.find)
+REGEX_SPECIAL = set('.^$*+?{}[]\\|()')
+# Fewer literal patterns than this are faster as one combined regex than as an automaton
+LITERAL_MATCHER_MIN = 100
+
+__version__ = '0.0.2'
+
+
+def literal_spec(spec):
+    '''If regex spec is a plain literal, optionally anchored with ^, return (literal, kind),
+    otherwise None.'''
+    kind = SUBSTRING
+    if spec.startswith('^'):
+        spec = spec[1:]
+        kind = PREFIX
+    if not spec or REGEX_SPECIAL.intersection(spec):
+        return None
+    return spec, kind
+
+class LiteralMatcher(object):
+    '''Aho-Corasick automaton over a set of literal patterns'''
+
+    def __init__(self, patterns):
+        '''patterns is a list of (name, literal, kind) where kind is PREFIX or SUBSTRING.  The
+        same name may be used for several patterns.'''
+        # delta[state] - {character:  next state}, fully resolved through the failure links so a
+        # scan is one dictionary lookup per character (missing entries go to the root, state 0)
+        goto = [{}]
+        # outputs[state] - [(name, pattern length, kind), ...] of patterns ending at this state
+        outputs = [[]]
+        for name, literal, kind in patterns:
+            state = 0
+            for char in literal:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((name, len(literal), kind))
+
+        # Breadth first - a state's failure link is always resolved before its children's
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0)
+                queue.append(child)
+        self.goto = goto
+        self.delta = delta
+        self.outputs = outputs
+        # Anchored patterns only - a line is just walked down the trie from its first character
+        self.prefix_only = all(kind == PREFIX for _, _, kind in patterns)
+
+    def match(self, text):
+        '''Return the set of pattern names found in text.'''
+        outputs = self.outputs
+        state = 0
+        found = set()
+        if self.prefix_only:
+            goto = self.goto
+            for pos, char in enumerate(text):
+                state = goto[state].get(char)
+                if state is None:
+                    break
+                for name, length, _ in outputs[state]:
+                    if pos + 1 == length:
+                        found.add(name)
+            return found
+
+        delta = self.delta
+        for pos, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            for name, length, kind in outputs[state]:
+                if kind == SUBSTRING or pos + 1 == length:
+                    found.add(name)
+        return found
+
+    def scan(self, lines):
+        '''Generator yielding (line, set of matching pattern names) for each line.'''
+        for line in lines:
+            yield line, self.match(line)
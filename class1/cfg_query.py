@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Single pass multi-query engine for CiscoConfParse style searches - takes a set of
+(name, parentspec, childspec, mode) rules, compiles them once and evaluates all of them in one
+walk over the config, returning the matching parent objects grouped by rule
+
+Modes mirror the CiscoConfParse methods:
+ * find - find_objects(parentspec), childspec is ignored
+ * with - find_objects_w_child(parentspec, childspec)
+ * without - find_objects_wo_child(parentspec, childspec)
+
+Like those methods parentspec is checked against every line, nested ones included, and childspec
+against the matching line's direct children.  When every parentspec is anchored to a non-blank
+first character (e.g. ^crypto map) only top level lines can match, so nested lines are skipped.
+
+With LITERAL_MATCHER_MIN or more plain literal specs (optionally anchored with ^) the literals are
+matched with one Aho-Corasick scan per line (cfg_match) instead of one regex search per spec -
+smaller rule sets are faster with every spec in the combined regex.
+'''
+
+# Imports
+import argparse
+from collections import OrderedDict
+import os
+import re
+import sys
+import yaml
+
+# Local Imports
+from cfg_match import literal_spec, LiteralMatcher, LITERAL_MATCHER_MIN, PREFIX, REGEX_SPECIAL
+from cfg_stream import iter_blocks
+
+# Globals
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+FIND = 'find'
+W_CHILD = 'with'
+WO_CHILD = 'without'
+MODES = (FIND, W_CHILD, WO_CHILD)
+# The exercise8/9/10 queries
+DEFAULT_RULES = [('crypto-maps', r'^crypto map CRYPTO', None, FIND),
+                 ('pfs-group2', r'^crypto map CRYPTO', r'set pfs group2', W_CHILD),
+                 ('no-aes', r'^crypto map CRYPTO', r'transform-set AES', WO_CHILD)]
+
+__version__ = '0.0.5'
+
+
+def _top_level_spec(spec):
+    '''True if regex spec can only match a top level line - anchored with ^ to a literal,
+    non-blank first character.  Nested lines always start with whitespace.'''
+    return (len(spec) > 1 and spec[0] == '^' and spec[1] not in REGEX_SPECIAL and
+            not spec[1].isspace())
+
+class QuerySet(object):
+    '''A compiled set of config query rules'''
+
+    def __init__(self, rules):
+        '''rules is a list of (name, parentspec, childspec, mode) tuples or of dictionaries with
+        those keys (childspec/mode optional - default mode is find, or with if a childspec is
+        given).'''
+        self.names = []
+        # (name, parent spec index, child spec index, mode) - identical specs are only compiled
+        # once
+        self.rules = []
+        # Compiled regex per spec, None for plain literals which the literal matchers handle
+        self.parent_res = []
+        self.child_res = []
+        parent_ids = {}
+        child_ids = {}
+        parent_literals = []
+        child_literals = []
+        for rule in rules:
+            if isinstance(rule, dict):
+                childspec = rule.get('childspec')
+                rule = (rule['name'], rule['parentspec'], childspec,
+                        rule.get('mode', W_CHILD if childspec else FIND))
+            name, parentspec, childspec, mode = rule
+            if mode not in MODES:
+                raise ValueError('Invalid mode {} for rule {} - must be one of {}'.format(
+                    mode, name, ', '.join(MODES)))
+            if mode != FIND and not childspec:
+                raise ValueError('Rule {} needs a childspec for mode {}'.format(name, mode))
+            if parentspec not in parent_ids:
+                parent_ids[parentspec] = self._add_spec(parentspec, self.parent_res,
+                                                        parent_literals)
+            c_idx = None
+            if mode != FIND:
+                if childspec not in child_ids:
+                    child_ids[childspec] = self._add_spec(childspec, self.child_res,
+                                                          child_literals)
+                c_idx = child_ids[childspec]
+            self.names.append(name)
+            self.rules.append((name, parent_ids[parentspec], c_idx, mode))
+        # All literal specs are found in one scan of each line - unless there are too few for the
+        # automaton to beat the regexes
+        self.parent_matcher = self._literal_matcher(parent_literals, self.parent_res)
+        self.top_level_only = all(_top_level_spec(spec) for spec in parent_ids)
+        self.child_matcher = self._literal_matcher(child_literals, self.child_res)
+        # Most config lines match no rule - one combined search rejects those without trying each
+        # regex parentspec in turn
+        self.parent_regex_ids = [idx for idx, regex in enumerate(self.parent_res) if regex]
+        self.any_parent_re = None
+        if self.parent_regex_ids:
+            self.any_parent_re = re.compile('|'.join('(?:{})'.format(
+                self.parent_res[idx].pattern) for idx in self.parent_regex_ids))
+
+    @staticmethod
+    def _add_spec(spec, compiled, literals):
+        '''Register spec, return its index - plain literals go to literals for the literal
+        matcher, anything else is compiled as a regex.'''
+        idx = len(compiled)
+        literal = literal_spec(spec)
+        if literal:
+            literals.append((idx,) + literal)
+            compiled.append(None)
+        else:
+            compiled.append(re.compile(spec))
+        return idx
+
+    @staticmethod
+    def _literal_matcher(literals, compiled):
+        '''Return a LiteralMatcher for literals, or if there are fewer than LITERAL_MATCHER_MIN
+        compile each as a regex in compiled and return None.'''
+        if len(literals) >= LITERAL_MATCHER_MIN:
+            return LiteralMatcher(literals)
+        for idx, literal, kind in literals:
+            compiled[idx] = re.compile(('^' if kind == PREFIX else '') + re.escape(literal))
+        return None
+
+    def match(self, p_elmt):
+        '''Return the names of the rules a parent object matches.'''
+        text = p_elmt.text
+        if self.parent_matcher:
+            p_hits = self.parent_matcher.match(text)
+            if self.any_parent_re and self.any_parent_re.search(text):
+                p_hits.update(idx for idx in self.parent_regex_ids
+                              if self.parent_res[idx].search(text))
+        elif not self.any_parent_re.search(text):
+            # The usual case - rejected with a single search
+            return []
+        else:
+            p_hits = set(idx for idx in self.parent_regex_ids if self.parent_res[idx].search(text))
+        if not p_hits:
+            return []
+        # Each distinct childspec is only checked once per parent, and only if needed
+        c_hits = {}
+        c_literal_hits = None
+        matched = []
+        for name, p_idx, c_idx, mode in self.rules:
+            if p_idx not in p_hits:
+                continue
+            if mode != FIND:
+                if c_idx not in c_hits:
+                    if self.child_res[c_idx] is None:
+                        if c_literal_hits is None:
+                            # One scan of the children finds every literal childspec
+                            c_literal_hits = set()
+                            for c_elmt in p_elmt.children:
+                                c_literal_hits.update(self.child_matcher.match(c_elmt.text))
+                        c_hits[c_idx] = c_idx in c_literal_hits
+                    else:
+                        c_hits[c_idx] = any(self.child_res[c_idx].search(c_elmt.text)
+                                            for c_elmt in p_elmt.children)
+                if c_hits[c_idx] != (mode == W_CHILD):
+                    continue
+            matched.append(name)
+
+        return matched
+
+    def evaluate(self, parents):
+        '''Walk parents (the top level config objects) and their descendants once, return
+        {rule name:  [matching object, ...]} in rule order.'''
+        results = OrderedDict((name, []) for name in self.names)
+        for p_elmt in parents:
+            for elmt in [p_elmt] if self.top_level_only else [p_elmt] + p_elmt.all_children:
+                for name in self.match(elmt):
+                    results[name].append(elmt)
+
+        return results
+
+def query_conf(cisco_conf, queries):
+    '''Evaluate a QuerySet against a CiscoConfParse object.'''
+    return queries.evaluate(cisco_conf.find_objects(r'^\S'))
+
+def yaml_input(file1):
+    '''Read in query rules from YAML file - a list of name/parentspec/childspec/mode mappings.'''
+    if os.path.isfile(file1):
+        with open(file1) as fh1:
+            data1 = yaml.safe_load(fh1)
+        return data1
+    else:
+        sys.exit('Error:  Invalid filename {}'.format(file1))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a set of queries against a Cisco IOS config '
+            'file in a single pass')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--file', help='specify config file to parse',
+            default=CISCO_IOS_FILE)
+    parser.add_argument('-r', '--rules', help='specify YAML file to read query rules from '
+            '(default is the exercise8/9/10 queries)')
+    args = parser.parse_args()
+
+    myqueries = QuerySet(yaml_input(args.rules) if args.rules else DEFAULT_RULES)
+    myresults = myqueries.evaluate(iter_blocks(args.file))
+    for myrule, targets in myresults.items():
+        print '{} ({}):'.format(myrule, len(targets))
+        for p_elmt in targets:
+            print p_elmt.text
+        print ''
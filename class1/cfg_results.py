@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Structured match records for the class1 config audits plus renderers which write them as text
+(the original exercise8/9/10 output), JSON Lines or CSV
+
+Renderers consume any iterable of records (e.g. a generator from the streaming audits) and write
+in buffered batches, so output of any size is written in bulk with memory bounded by the batch.
+'''
+
+# Imports
+from collections import OrderedDict
+import csv
+import json
+
+# Globals
+BATCH_SIZE = 1000  # Records rendered per write
+CSV_FIELDS = ['parent', 'children', 'transform_set', 'transform_set_children']
+FORMATS = ('text', 'json', 'csv')
+
+__version__ = '0.0.1'
+
+
+def match_record(p_elmt, ts_parent=None):
+    '''Build the record for a matching parent object and, if given, its linked transform set.'''
+    record = OrderedDict([('parent', p_elmt.text),
+                          ('children', [c_elmt.text for c_elmt in p_elmt.all_children])])
+    if ts_parent is not None:
+        record['transform_set'] = OrderedDict([
+            ('parent', ts_parent.text),
+            ('children', [c_elmt.text for c_elmt in ts_parent.all_children])])
+    return record
+
+def _batches(records, render):
+    '''Render records in batches, yielding (string, number of records) per batch.'''
+    batch = []
+    for record in records:
+        batch.append(render(record))
+        if len(batch) >= BATCH_SIZE:
+            yield ''.join(batch), len(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch), len(batch)
+
+def _render_text(record):
+    lines = ['Found target:', record['parent']] + record['children']
+    if 'transform_set' in record:
+        lines += ['', record['transform_set']['parent']] + record['transform_set']['children']
+    return '\n'.join(lines) + '\n\n'
+
+def _render_json(record):
+    return json.dumps(record) + '\n'
+
+def write_text(records, fh1):
+    count = 0
+    for chunk, records_in_chunk in _batches(records, _render_text):
+        fh1.write(chunk)
+        count += records_in_chunk
+    return count
+
+def write_json(records, fh1):
+    '''Write records as JSON Lines - one JSON object per line.'''
+    count = 0
+    for chunk, records_in_chunk in _batches(records, _render_json):
+        fh1.write(chunk)
+        count += records_in_chunk
+    return count
+
+def write_csv(records, fh1):
+    '''Write records as CSV, one row per record - multiple children are newline separated
+    within their field.'''
+    writer = csv.writer(fh1)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    batch = []
+    for record in records:
+        ts_record = record.get('transform_set', {})
+        batch.append([record['parent'], '\n'.join(record['children']),
+                      ts_record.get('parent', ''), '\n'.join(ts_record.get('children', []))])
+        if len(batch) >= BATCH_SIZE:
+            writer.writerows(batch)
+            count += len(batch)
+            batch = []
+    writer.writerows(batch)
+    return count + len(batch)
+
+RENDERERS = {'text': write_text, 'json': write_json, 'csv': write_csv}
+
+def write_records(records, file_format, fh1):
+    '''Render records to open file fh1 in file_format, return the number of records written.'''
+    if file_format not in RENDERERS:
+        raise ValueError('Unsupported output format {} - must be one of {}'.format(
+            file_format, ', '.join(FORMATS)))
+    return RENDERERS[file_format](records, fh1)
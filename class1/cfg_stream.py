@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Streaming Cisco IOS config parser - read a config file line by line and yield each top level
+(parent) block with its children as soon as the block is complete.  Only one block is held in
+memory at a time, so memory use is bounded by the largest block rather than the file size.
+
+Yielded objects mimic the parts of the CiscoConfParse object model the class1 scripts use (text,
+children, all_children, parent, linenum) so the same query code works on either.
+'''
+
+# Imports
+import argparse
+import re
+
+# Globals
+COMMENT_DELIMITER = '!'
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+
+__version__ = '0.0.2'
+
+
+class ConfLine(object):
+    '''A single config line and its links to parent/child lines'''
+    __slots__ = ('text', 'linenum', 'indent', 'parent', 'children')
+
+    def __init__(self, text, linenum, indent, parent=None):
+        self.text = text
+        self.linenum = linenum
+        self.indent = indent
+        # Same convention as CiscoConfParse - a top level line is its own parent
+        self.parent = parent if parent else self
+        self.children = []
+
+    @property
+    def is_child(self):
+        return self.parent is not self
+
+    @property
+    def all_children(self):
+        '''All descendants in config order (children, grandchildren...)'''
+        descendants = []
+        for c_elmt in self.children:
+            descendants.append(c_elmt)
+            descendants.extend(c_elmt.all_children)
+        return descendants
+
+    def __repr__(self):
+        return '<ConfLine # {} {!r}>'.format(self.linenum, self.text)
+
+def iter_blocks(file1, ignore_comments=True):
+    '''Generator yielding each top level ConfLine of file1 (a file name or an open file/iterable
+    of lines) with its child lines attached.'''
+    if isinstance(file1, basestring):
+        with open(file1) as fh1:
+            for block in iter_blocks(fh1, ignore_comments):
+                yield block
+        return
+
+    block = None
+    # Stack of (indent, ConfLine) for the current branch of the block being built
+    branch = []
+    for linenum, line in enumerate(file1):
+        text = line.rstrip('\r\n')
+        stripped = text.lstrip()
+        if not stripped:
+            continue
+        if ignore_comments and stripped.startswith(COMMENT_DELIMITER):
+            continue
+        indent = len(text) - len(stripped)
+        if indent == 0:
+            if block:
+                yield block
+            block = ConfLine(text, linenum, indent)
+            branch = [block]
+        elif block:
+            while branch[-1].indent >= indent:
+                branch.pop()
+            c_elmt = ConfLine(text, linenum, indent, branch[-1])
+            branch[-1].children.append(c_elmt)
+            branch.append(c_elmt)
+    if block:
+        yield block
+
+def find_blocks(file1, parentspec):
+    '''Generator yielding the top level blocks whose text matches the compiled regex parentspec.'''
+    for p_elmt in iter_blocks(file1):
+        if parentspec.search(p_elmt.text):
+            yield p_elmt
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stream the parent/child blocks of a Cisco IOS '
+            'config file')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--file', help='specify config file to parse',
+            default=CISCO_IOS_FILE)
+    parser.add_argument('-p', '--parent', help='only output blocks whose parent line matches this '
+            'regular expression')
+    args = parser.parse_args()
+
+    if args.parent:
+        blocks = find_blocks(args.file, re.compile(args.parent))
+    else:
+        blocks = iter_blocks(args.file)
+    for p_elmt in blocks:
+        print p_elmt.text
+        for c_elmt in p_elmt.all_children:
+            print c_elmt.text
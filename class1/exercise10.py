@@ -7,38 +7,114 @@ configuration and outputs it along with the crypto map
 '''
 
 # Imports
+import argparse
 from ciscoconfparse import CiscoConfParse
 import re
+import sys
+
+# Local Imports
+from cfg_cache import load_conf
+from cfg_compact import load_compact
+from cfg_index import (build_index, index_conf, index_parent, iter_objects, lookup, new_index,
+                       CRYPTO_MAP, TRANSFORM_SET)
+from cfg_results import match_record, write_records, FORMATS
+from cfg_stream import iter_blocks
 
 # Globals
 P_PARSE_STRING = 'crypto map CRYPTO'
 C_PARSE_STRING = 'transform-set AES'
 CISCO_IOS_FILE = 'cisco_ipsec.txt'
 
-__version__ = '0.0.1'
+__version__ = '0.0.7'
 
 
-def parse_conf_file_ts(cfg1, ts_line):
+def parse_conf_file_ts(conf_index, ts_line):
     ts = re.findall(r'[\w-]+', ts_line)[2]
-    target = cfg1.find_objects(r'^\w.*transform-set ' + ts + r'\s')
+    # Constant time lookup in the prebuilt index instead of rescanning the config
+    target = lookup(conf_index, TRANSFORM_SET, ts)
     return target
 
+def is_target(p_elmt, c_parse_re):
+    # Equivalent of find_objects_wo_child
+    return p_elmt.text.startswith(P_PARSE_STRING) and not any(
+            c_parse_re.search(c_elmt.text) for c_elmt in p_elmt.children)
+
+def target_ts_line(p_elmt):
+    for c_elmt in p_elmt.all_children:
+        if c_elmt.text.find('set transform-set') >= 0:
+            return c_elmt.text
+    return None
+
+def audit_index(conf_index):
+    c_parse_re = re.compile(C_PARSE_STRING)
+    for p_elmt in iter_objects(conf_index, CRYPTO_MAP):
+        if not is_target(p_elmt, c_parse_re):
+            continue
+        ts_line = target_ts_line(p_elmt)
+        target_ts_parent = parse_conf_file_ts(conf_index, ts_line) if ts_line else None
+        yield match_record(p_elmt, target_ts_parent)
+
 def parse_conf_file_cm(file1):
     cisco_conf = CiscoConfParse(file1)
-    target = cisco_conf.find_objects_wo_child(parentspec=r'^' + P_PARSE_STRING,
-            childspec=C_PARSE_STRING)
-    for p_elmt in target:
-        print 'Found target:\n{}'.format(p_elmt.text)
-        for c_elmt in p_elmt.all_children:
-            print c_elmt.text
-            if c_elmt.text.find('set transform-set') >= 0:
-                target_ts = parse_conf_file_ts(cisco_conf, c_elmt.text)
-        target_ts_parent = target_ts[0]
-        print '\n{}'.format(target_ts_parent.text)
-        for c_elmt in target_ts_parent.all_children:
-            print c_elmt.text
-        print ''
+    return audit_index(index_conf(cisco_conf))
+
+def parse_conf_cache_cm(file1):
+    # Unchanged configs are loaded from the parsed config cache instead of being parsed again
+    return audit_index(build_index(load_conf(file1)))
+
+def parse_conf_compact_cm(file1):
+    # Compact interned model - for holding many configs in memory at once
+    return audit_index(build_index(load_compact(file1).iter_parents()))
+
+def parse_conf_stream_cm(file1):
+    # Only transform sets are kept from the stream - IOS writes them before the crypto maps, so
+    # matching maps can normally be output as soon as they are read.  Any map referencing a
+    # transform set not yet seen is held until the end of the file.
+    conf_index = new_index()
+    c_parse_re = re.compile(C_PARSE_STRING)
+    pending = []
+    for p_elmt in iter_blocks(file1):
+        if index_parent(conf_index, p_elmt, (TRANSFORM_SET,)):
+            continue
+        if not is_target(p_elmt, c_parse_re):
+            continue
+        ts_line = target_ts_line(p_elmt)
+        target_ts_parent = parse_conf_file_ts(conf_index, ts_line) if ts_line else None
+        if ts_line and not target_ts_parent:
+            pending.append((p_elmt, ts_line))
+        else:
+            yield match_record(p_elmt, target_ts_parent)
+    for p_elmt, ts_line in pending:
+        yield match_record(p_elmt, parse_conf_file_ts(conf_index, ts_line))
 
 if __name__ == '__main__':
-    parse_conf_file_cm(CISCO_IOS_FILE)
+    parser = argparse.ArgumentParser(description="Output the crypto maps which don't use AES, "
+            'and their transform sets, in a Cisco IOS config file')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--file', help='specify config file to parse',
+            default=CISCO_IOS_FILE)
+    group1 = parser.add_mutually_exclusive_group()
+    group1.add_argument('-s', '--stream', action='store_true',
+            help='stream the config file block by block instead of parsing it all up front')
+    group1.add_argument('-c', '--cache', action='store_true',
+            help='use the parsed config cache, only parse the file if it changed')
+    group1.add_argument('-m', '--compact', action='store_true',
+            help='load the config into the compact (interned, array based) model')
+    parser.add_argument('-o', '--format', choices=FORMATS, default='text',
+            help='output format - text (default) | json (JSON Lines) | csv')
+    parser.add_argument('-w', '--write', help='specify file to write results to (default stdout)')
+    args = parser.parse_args()
 
+    if args.stream:
+        records = parse_conf_stream_cm(args.file)
+    elif args.cache:
+        records = parse_conf_cache_cm(args.file)
+    elif args.compact:
+        records = parse_conf_compact_cm(args.file)
+    else:
+        records = parse_conf_file_cm(args.file)
+    if args.write:
+        with open(args.write, 'wb') as outfile:
+            write_records(records, args.format, outfile)
+    else:
+        write_records(records, args.format, sys.stdout)
@@ -5,24 +5,76 @@ Simple program which parses a Cisco IOS config file for crypto maps and outputs
 '''
 
 # Imports
+import argparse
 from ciscoconfparse import CiscoConfParse
+import sys
+
+# Local Imports
+from cfg_cache import load_conf
+from cfg_compact import load_compact
+from cfg_index import build_index, index_conf, iter_objects, CRYPTO_MAP
+from cfg_results import match_record, write_records, FORMATS
+from cfg_stream import iter_blocks
 
 # Globals
 PARSE_STRING = 'crypto map CRYPTO'
 CISCO_IOS_FILE = 'cisco_ipsec.txt'
 
-__version__ = '0.0.1'
+__version__ = '0.0.7'
+
 
+def audit_index(conf_index):
+    for p_elmt in iter_objects(conf_index, CRYPTO_MAP):
+        if not p_elmt.text.startswith(PARSE_STRING):
+            continue
+        yield match_record(p_elmt)
 
 def parse_conf_file(file1):
     cisco_conf = CiscoConfParse(file1)
-    target = cisco_conf.find_objects(r'^' + PARSE_STRING)
-    for p_elmt in target:
-        print 'Found target:\n{}'.format(p_elmt.text)
-        for c_elmt in p_elmt.all_children:
-            print c_elmt.text
-        print ''
+    return audit_index(index_conf(cisco_conf))
+
+def parse_conf_cache(file1):
+    # Unchanged configs are loaded from the parsed config cache instead of being parsed again
+    return audit_index(build_index(load_conf(file1)))
+
+def parse_conf_compact(file1):
+    # Compact interned model - for holding many configs in memory at once
+    return audit_index(build_index(load_compact(file1).iter_parents()))
+
+def parse_conf_stream(file1):
+    # Bounded memory - blocks are checked and discarded as they are read
+    for p_elmt in iter_blocks(file1):
+        if p_elmt.text.startswith(PARSE_STRING):
+            yield match_record(p_elmt)
 
 if __name__ == '__main__':
-    parse_conf_file(CISCO_IOS_FILE)
+    parser = argparse.ArgumentParser(description='Output the crypto maps in a Cisco IOS config '
+            'file')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--file', help='specify config file to parse',
+            default=CISCO_IOS_FILE)
+    group1 = parser.add_mutually_exclusive_group()
+    group1.add_argument('-s', '--stream', action='store_true',
+            help='stream the config file block by block instead of parsing it all up front')
+    group1.add_argument('-c', '--cache', action='store_true',
+            help='use the parsed config cache, only parse the file if it changed')
+    group1.add_argument('-m', '--compact', action='store_true',
+            help='load the config into the compact (interned, array based) model')
+    parser.add_argument('-o', '--format', choices=FORMATS, default='text',
+            help='output format - text (default) | json (JSON Lines) | csv')
+    parser.add_argument('-w', '--write', help='specify file to write results to (default stdout)')
+    args = parser.parse_args()
 
+    if args.stream:
+        records = parse_conf_stream(args.file)
+    elif args.cache:
+        records = parse_conf_cache(args.file)
+    elif args.compact:
+        records = parse_conf_compact(args.file)
+    else:
+        records = parse_conf_file(args.file)
+    if args.write:
+        with open(args.write, 'wb') as outfile:
+            write_records(records, args.format, outfile)
+    else:
+        write_records(records, args.format, sys.stdout)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_audit - run with python -m unittest test_cfg_audit
+'''
+
+# Imports
+import os
+import shutil
+import tempfile
+import unittest
+
+# Local Imports
+from cfg_audit import audit_file, find_configs
+
+# Globals
+# Transform sets after the crypto maps, so the no-aes audit has to resolve them at the end
+TEST_CONFIG = '''hostname test-rtr1
+!
+crypto map CRYPTO 10 ipsec-isakmp
+ set peer 1.1.1.1
+ set transform-set AES-SHA
+ set pfs group2
+!
+crypto map CRYPTO 20 ipsec-isakmp
+ set peer 2.2.2.1
+ set transform-set 3DES-SHA
+ set pfs group5
+!
+crypto ipsec transform-set AES-SHA esp-aes esp-sha-hmac
+ mode tunnel
+crypto ipsec transform-set 3DES-SHA esp-3des esp-sha-hmac
+ mode tunnel
+'''
+
+__version__ = '0.0.1'
+
+
+class TestAuditFile(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.config = os.path.join(self.workdir, 'test-rtr1.txt')
+        with open(self.config, 'w') as fh1:
+            fh1.write(TEST_CONFIG)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_findings(self):
+        file1, device, findings, error = audit_file(self.config)
+        self.assertEqual(file1, self.config)
+        self.assertEqual(device, 'test-rtr1')
+        self.assertIsNone(error)
+        self.assertEqual(findings['crypto-maps'], ['crypto map CRYPTO 10 ipsec-isakmp',
+                                                   'crypto map CRYPTO 20 ipsec-isakmp'])
+        self.assertEqual(findings['pfs-group2'], ['crypto map CRYPTO 10 ipsec-isakmp'])
+
+    def test_transform_set_after_map(self):
+        _, _, findings, _ = audit_file(self.config)
+        self.assertEqual(findings['no-aes'], [
+            'crypto map CRYPTO 20 ipsec-isakmp -> crypto ipsec transform-set 3DES-SHA esp-3des '
+            'esp-sha-hmac'])
+
+    def test_unreadable(self):
+        missing = os.path.join(self.workdir, 'missing.txt')
+        file1, device, _, error = audit_file(missing)
+        self.assertEqual(device, 'missing.txt')
+        self.assertTrue(error)
+
+    def test_find_configs(self):
+        os.mkdir(os.path.join(self.workdir, 'subdir'))
+        other = os.path.join(self.workdir, 'other.txt')
+        open(other, 'w').close()
+        self.assertEqual(find_configs([self.workdir]), sorted([self.config, other]))
+        self.assertEqual(find_configs([os.path.join(self.workdir, 'test-*')]), [self.config])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_blockstore - run with python -m unittest test_cfg_blockstore
+'''
+
+# Imports
+import os
+import shutil
+import tempfile
+import unittest
+
+# Local Imports
+from cfg_blockstore import device_names, BlockStore
+
+# Globals
+# Blank lines, comments, a CRLF line and no final newline must all survive the round trip
+TEST_CONFIG = ('!\r\nhostname test-rtr1\n\n!\ninterface FastEthernet0\n description uplink\n\n'
+               ' ip address 10.1.1.1 255.255.255.0\n!\nend')
+
+__version__ = '0.0.1'
+
+
+class TestBlockStore(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.store_dir = os.path.join(self.workdir, 'store')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write_config(self, name, text=TEST_CONFIG):
+        path = os.path.join(self.workdir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fh1:
+            fh1.write(text)
+        return path
+
+    def test_round_trip(self):
+        config = self.write_config('r1.txt')
+        store = BlockStore(self.store_dir)
+        store.add_config('r1.txt', config)
+        store.save()
+        self.assertEqual(BlockStore(self.store_dir).get_config('r1.txt'), TEST_CONFIG)
+
+    def test_stable_names(self):
+        # Added in separate runs, the same file name in two directories is still two devices
+        config1 = self.write_config(os.path.join('x', 'r1.txt'))
+        config2 = self.write_config(os.path.join('y', 'r1.txt'), TEST_CONFIG + '\n!')
+        for config in (config1, config2):
+            store = BlockStore(self.store_dir)
+            for device, file1 in device_names([config], self.workdir):
+                store.add_config(device, file1)
+            store.save()
+        store = BlockStore(self.store_dir)
+        self.assertEqual(store.devices.keys(), ['x/r1.txt', 'y/r1.txt'])
+        self.assertEqual(store.get_config('x/r1.txt'), TEST_CONFIG)
+        self.assertEqual(store.get_config('y/r1.txt'), TEST_CONFIG + '\n!')
+
+    def test_outside_root(self):
+        config = self.write_config('r1.txt')
+        with self.assertRaises(ValueError):
+            device_names([config], os.path.join(self.workdir, 'x'))
+
+    def test_no_overwrite(self):
+        config = self.write_config('r1.txt')
+        store = BlockStore(self.store_dir)
+        store.add_config('r1.txt', config)
+        store.save()
+        self.write_config('r1.txt', 'hostname test-rtr2\n')
+        store = BlockStore(self.store_dir)
+        with self.assertRaises(ValueError):
+            store.add_config('r1.txt', config)
+        store.add_config('r1.txt', config, replace=True)
+        self.assertEqual(store.get_config('r1.txt'), 'hostname test-rtr2\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_cache - run with python -m unittest test_cfg_cache
+'''
+
+# Imports
+import os
+import shutil
+import tempfile
+import unittest
+
+# Local Imports
+from cfg_cache import cache_path, load_conf, read_cache, write_cache
+from cfg_stream import iter_blocks
+
+# Globals
+# Includes a grandchild line so parent links more than one level deep are covered
+TEST_CONFIG = '''hostname test-rtr1
+interface FastEthernet0
+ description uplink
+ ip address 10.1.1.1 255.255.255.0
+crypto map CRYPTO 10 ipsec-isakmp
+ set peer 1.1.1.1
+policy-map QOS
+ class VOICE
+  priority 128
+'''
+
+__version__ = '0.0.1'
+
+
+def flatten(parents):
+    '''(text, linenum, parent text) for every line, in config order.'''
+    return [(elmt.text, elmt.linenum, elmt.parent.text)
+            for p_elmt in parents for elmt in [p_elmt] + p_elmt.all_children]
+
+class TestCfgCache(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.workdir, 'cache')
+        self.config = os.path.join(self.workdir, 'test-rtr1.txt')
+        with open(self.config, 'w') as fh1:
+            fh1.write(TEST_CONFIG)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_round_trip(self):
+        parents = list(iter_blocks(self.config))
+        path = os.path.join(self.cache_dir, 'test.cfgc')
+        write_cache(parents, path)
+        self.assertEqual(flatten(read_cache(path).iter_parents()), flatten(parents))
+
+    def test_cache_hit(self):
+        parsed = load_conf(self.config, self.cache_dir)
+        path = cache_path(self.config, self.cache_dir)
+        self.assertTrue(os.path.isfile(path))
+        mtime = os.path.getmtime(path)
+        self.assertEqual(flatten(load_conf(self.config, self.cache_dir)), flatten(parsed))
+        # Loaded, not rewritten
+        self.assertEqual(os.path.getmtime(path), mtime)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(path)])
+
+    def test_changed_config(self):
+        load_conf(self.config, self.cache_dir)
+        old_path = cache_path(self.config, self.cache_dir)
+        with open(self.config, 'a') as fh1:
+            fh1.write('ip domain-name example.com\n')
+        parents = load_conf(self.config, self.cache_dir)
+        self.assertNotEqual(cache_path(self.config, self.cache_dir), old_path)
+        self.assertEqual(parents[-1].text, 'ip domain-name example.com')
+
+    def test_invalid_cache_file(self):
+        path = cache_path(self.config, self.cache_dir)
+        os.makedirs(self.cache_dir)
+        with open(path, 'wb') as fh1:
+            fh1.write('not a cache file')
+        self.assertIsNone(read_cache(path))
+        # Reparsed and the bad file replaced
+        self.assertEqual(flatten(load_conf(self.config, self.cache_dir)),
+                         flatten(iter_blocks(self.config)))
+        self.assertIsNotNone(read_cache(path))
+
+    def test_truncated_cache_file(self):
+        load_conf(self.config, self.cache_dir)
+        path = cache_path(self.config, self.cache_dir)
+        size = os.path.getsize(path)
+        for new_size in (size - 1, size / 2):
+            with open(path, 'r+b') as fh1:
+                fh1.truncate(new_size)
+            self.assertIsNone(read_cache(path))
+            # Reparsed and rewritten in full
+            self.assertEqual(flatten(load_conf(self.config, self.cache_dir)),
+                             flatten(iter_blocks(self.config)))
+            self.assertEqual(os.path.getsize(path), size)
+
+if __name__ == '__main__':
+    unittest.main()
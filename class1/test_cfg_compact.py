@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_compact - run with python -m unittest test_cfg_compact
+'''
+
+# Imports
+from StringIO import StringIO
+import unittest
+
+# Local Imports
+from cfg_compact import load_compact
+from cfg_stream import iter_blocks
+
+# Globals
+# Includes a grandchild line so the ends ranges are nested
+TEST_CONFIG = '''hostname test-rtr1
+policy-map QOS
+ class VOICE
+  priority 128
+ class DATA
+  bandwidth 256
+crypto map CRYPTO 10 ipsec-isakmp
+ set pfs group2
+crypto map CRYPTO 20 ipsec-isakmp
+ set pfs group2
+'''
+
+__version__ = '0.0.1'
+
+
+def tree(elmt):
+    '''Nested (text, linenum, [children]) for elmt, compared across both models.'''
+    return (elmt.text, elmt.linenum, [tree(c_elmt) for c_elmt in elmt.children])
+
+class TestCompactConf(unittest.TestCase):
+
+    def setUp(self):
+        self.conf = load_compact(StringIO(TEST_CONFIG))
+        self.parents = list(self.conf.iter_parents())
+
+    def test_matches_stream_model(self):
+        self.assertEqual([tree(p_elmt) for p_elmt in self.parents],
+                         [tree(p_elmt) for p_elmt in iter_blocks(StringIO(TEST_CONFIG))])
+        self.assertEqual(len(self.conf), 10)
+
+    def test_children(self):
+        policy = self.parents[1]
+        self.assertEqual([c_elmt.text for c_elmt in policy.children],
+                         [' class VOICE', ' class DATA'])
+        self.assertEqual([c_elmt.text for c_elmt in policy.all_children],
+                         [' class VOICE', '  priority 128', ' class DATA', '  bandwidth 256'])
+        self.assertEqual(self.parents[0].children, [])
+
+    def test_parent(self):
+        policy = self.parents[1]
+        priority = policy.all_children[1]
+        self.assertTrue(priority.is_child)
+        self.assertEqual(priority.parent, policy.children[0])
+        self.assertEqual(priority.parent.parent, policy)
+        # A top level line is its own parent
+        self.assertFalse(policy.is_child)
+        self.assertEqual(policy.parent, policy)
+        self.assertEqual(priority.indent, 2)
+
+    def test_interned_texts(self):
+        group2 = [c_elmt.text for p_elmt in self.parents[2:] for c_elmt in p_elmt.children]
+        self.assertIs(group2[0], group2[1])
+        other = load_compact(StringIO(TEST_CONFIG))
+        self.assertIs(other.texts[0], self.conf.texts[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_invindex - run with python -m unittest test_cfg_invindex
+'''
+
+# Imports
+import unittest
+
+# Local Imports
+from cfg_invindex import query_index, DEVICES_KEY
+
+# Globals
+# rtr1 only has crypto map CRYPTO 200, rtr2 has CRYPTO 20
+INDEX = {DEVICES_KEY: [('rtr1', 'rtr1.txt'), ('rtr2', 'rtr2.txt')],
+         'set pfs group2': [(0, 'crypto map CRYPTO 200 ipsec-isakmp'),
+                            (1, 'crypto map CRYPTO 20 ipsec-isakmp')],
+         'set peer 1.1.1.1': [(0, 'crypto map CRYPTO 200 ipsec-isakmp'),
+                              (1, 'crypto map CRYPTO 20')]}
+
+__version__ = '0.0.1'
+
+
+class TestQueryIndex(unittest.TestCase):
+
+    def test_parent_word_boundary(self):
+        self.assertEqual(query_index(INDEX, ['set pfs group2'], 'crypto map CRYPTO 20'),
+                         [('rtr2', 'rtr2.txt')])
+        self.assertEqual(query_index(INDEX, ['set pfs group2'], 'crypto map CRYPTO 2'), [])
+
+    def test_parent_exact(self):
+        self.assertEqual(query_index(INDEX, ['set peer 1.1.1.1'], '  crypto  map CRYPTO 20 '),
+                         [('rtr2', 'rtr2.txt')])
+
+    def test_no_parent(self):
+        self.assertEqual(query_index(INDEX, ['set pfs group2']),
+                         [('rtr1', 'rtr1.txt'), ('rtr2', 'rtr2.txt')])
+
+if __name__ == '__main__':
+    unittest.main()
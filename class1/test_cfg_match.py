@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_match - run with python -m unittest test_cfg_match
+'''
+
+# Imports
+import random
+import unittest
+
+# Local Imports
+from cfg_match import literal_spec, LiteralMatcher, PREFIX, SUBSTRING
+
+# Globals
+RANDOM_SEED = 5
+RANDOM_ROUNDS = 200
+
+__version__ = '0.0.2'
+
+
+def brute_force(patterns, text):
+    '''What LiteralMatcher.match should return, found with str.startswith/str.find.'''
+    return set(name for name, literal, kind in patterns
+               if (text.startswith(literal) if kind == PREFIX else literal in text))
+
+class TestLiteralSpec(unittest.TestCase):
+
+    def test_literals(self):
+        self.assertEqual(literal_spec('^crypto map CRYPTO'), ('crypto map CRYPTO', PREFIX))
+        self.assertEqual(literal_spec('set pfs group2'), ('set pfs group2', SUBSTRING))
+
+    def test_regexes(self):
+        self.assertIsNone(literal_spec(r'^\S'))
+        self.assertIsNone(literal_spec('group[25]'))
+        self.assertIsNone(literal_spec('^'))
+
+class TestLiteralMatcher(unittest.TestCase):
+
+    def test_overlapping(self):
+        # Classic Aho-Corasick case - matches are only found through the failure links
+        patterns = [(literal, literal, SUBSTRING) for literal in ('he', 'she', 'his', 'hers')]
+        matcher = LiteralMatcher(patterns)
+        self.assertEqual(matcher.match('ushers'), set(['he', 'she', 'hers']))
+        self.assertEqual(matcher.match('ahis'), set(['his']))
+        self.assertEqual(matcher.match('xyz'), set())
+
+    def test_prefix(self):
+        matcher = LiteralMatcher([('map', 'crypto map', PREFIX),
+                                  ('group2', 'set pfs group2', SUBSTRING)])
+        self.assertEqual(matcher.match('crypto map CRYPTO 10'), set(['map']))
+        self.assertEqual(matcher.match(' crypto map CRYPTO'), set())
+        self.assertEqual(matcher.match(' set pfs group2'), set(['group2']))
+
+    def test_prefix_only(self):
+        matcher = LiteralMatcher([('map', 'crypto map', PREFIX), ('crypto', 'crypto', PREFIX),
+                                  ('isakmp', 'crypto isakmp', PREFIX)])
+        self.assertTrue(matcher.prefix_only)
+        self.assertEqual(matcher.match('crypto map CRYPTO 10'), set(['map', 'crypto']))
+        self.assertEqual(matcher.match('crypt'), set())
+        self.assertEqual(matcher.match(' crypto map'), set())
+        self.assertFalse(LiteralMatcher([('map', 'crypto map', SUBSTRING)]).prefix_only)
+
+    def test_shared_name(self):
+        matcher = LiteralMatcher([('aes', 'esp-aes', SUBSTRING), ('aes', 'AES', SUBSTRING)])
+        self.assertEqual(matcher.match('set transform-set AES-SHA'), set(['aes']))
+
+    def test_random(self):
+        rand = random.Random(RANDOM_SEED)
+        for _ in xrange(RANDOM_ROUNDS):
+            # Small alphabet so patterns overlap and share prefixes/suffixes often
+            patterns = [(num, ''.join(rand.choice('ab ') for _ in xrange(rand.randint(1, 4))),
+                         rand.choice((PREFIX, SUBSTRING))) for num in xrange(rand.randint(1, 8))]
+            text = ''.join(rand.choice('ab ') for _ in xrange(rand.randint(0, 20)))
+            self.assertEqual(LiteralMatcher(patterns).match(text), brute_force(patterns, text),
+                             'patterns {!r} text {!r}'.format(patterns, text))
+
+    def test_scan(self):
+        matcher = LiteralMatcher([('map', 'crypto map', PREFIX)])
+        lines = ['crypto map CRYPTO 10', 'interface Fa0']
+        self.assertEqual(list(matcher.scan(lines)), [(lines[0], set(['map'])),
+                                                     (lines[1], set())])
+
+if __name__ == '__main__':
+    unittest.main()
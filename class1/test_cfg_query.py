@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Regression tests for cfg_query - run with python -m unittest test_cfg_query
+'''
+
+# Imports
+from ciscoconfparse import CiscoConfParse
+import unittest
+
+# Local Imports
+from cfg_match import LITERAL_MATCHER_MIN
+from cfg_query import query_conf, QuerySet, FIND, W_CHILD, WO_CHILD
+from cfg_stream import iter_blocks
+
+# Globals
+CISCO_IOS_FILE = 'cisco_ipsec.txt'
+RULES = [('crypto-maps', r'^crypto map CRYPTO', None, FIND),
+         ('pfs-group2', r'^crypto map CRYPTO', r'set pfs group2', W_CHILD),
+         ('no-aes', r'^crypto map CRYPTO', r'transform-set AES', WO_CHILD),
+         ('ip-address', r'ip address', None, FIND),
+         ('no-shut', r'^interface', r'no ip address', W_CHILD),
+         ('nested', r'^\s+set peer', None, FIND)]
+
+__version__ = '0.0.2'
+
+
+class TestQuerySet(unittest.TestCase):
+
+    def setUp(self):
+        self.cisco_conf = CiscoConfParse(CISCO_IOS_FILE)
+
+    def expected(self, parentspec, childspec, mode):
+        if mode == FIND:
+            found = self.cisco_conf.find_objects(parentspec)
+        elif mode == W_CHILD:
+            found = self.cisco_conf.find_objects_w_child(parentspec, childspec)
+        else:
+            found = self.cisco_conf.find_objects_wo_child(parentspec, childspec)
+        return [elmt.text for elmt in found]
+
+    def test_matches_ciscoconfparse(self):
+        # Nested lines (ip address, set peer) must be found as well as top level ones
+        for results in (query_conf(self.cisco_conf, QuerySet(RULES)),
+                        QuerySet(RULES).evaluate(iter_blocks(CISCO_IOS_FILE))):
+            for name, parentspec, childspec, mode in RULES:
+                self.assertEqual([elmt.text for elmt in results[name]],
+                                 self.expected(parentspec, childspec, mode), name)
+            self.assertTrue(results['ip-address'])
+
+    def test_literal_matcher(self):
+        # Enough literal specs for the automaton - same results as the combined regex
+        padding = [('pad{}'.format(num), '^no such line {}'.format(num), 'pad child {}'.format(num),
+                    W_CHILD) for num in xrange(LITERAL_MATCHER_MIN)]
+        queries = QuerySet(RULES + padding)
+        self.assertIsNotNone(queries.parent_matcher)
+        self.assertIsNotNone(queries.child_matcher)
+        self.assertIsNone(QuerySet(RULES).parent_matcher)
+        results = queries.evaluate(iter_blocks(CISCO_IOS_FILE))
+        for name, parentspec, childspec, mode in RULES:
+            self.assertEqual([elmt.text for elmt in results[name]],
+                             self.expected(parentspec, childspec, mode), name)
+
+    def test_top_level_only(self):
+        self.assertTrue(QuerySet(RULES[:3]).top_level_only)
+        self.assertFalse(QuerySet(RULES).top_level_only)
+        self.assertFalse(QuerySet([('any', r'^\S', None, FIND)]).top_level_only)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,12 +9,14 @@
 
 # Imports
 import argparse
-from getpass import getpass
 from jnpr.junos import Device
 from jnpr.junos.utils.config import Config
 import os
 import sys
-import yaml
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import check_input, Inventory, SRX_FIELDS
 
 # Globals
 # Note:  Consider using function/class/method default parameters instead of global constants where
@@ -33,35 +35,10 @@ TIMEOUT = 60
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'June 25, 2016'
-__version__ = '0.0.1'
+__version__ = '0.0.4'
 
 
 ####################################################################################################
-def yaml_input(file1, verbose=False):
-    '''Read in router/switch authentication information from YAML file.'''
-    data1 = {}
-
-    if os.path.isfile(file1):
-        if verbose:
-            print 'Reading data file ({})'.format(file1)
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-    else:
-        # Don't output error if using default file name
-        if verbose and file1 != SRX_FILE:
-            print 'Error:  Invalid filename {}'.format(file1)
-
-    return data1
-
-def check_input(srx1, verbose=False):
-    '''Validate router input data, prompt for anything missing.'''
-    if 'HOST' not in srx1:
-        srx1['HOST'] = raw_input('SRX IPv4 Address: ')
-    if 'USER' not in srx1:
-        srx1['USER'] = raw_input('Username for SRX: ')
-    if 'PASSWORD' not in srx1:
-        srx1['PASSWORD'] = getpass()
-
 def srx_conf(srx1, srx1_cfg, cfg1, form1, merge1, commit1, commit_comment=None, verbose=False):
     '''Make configuration changes on SRX device.'''
     # Lock config
@@ -108,14 +85,14 @@ def main(args):
     # Initialize data structures
     mysrx = {}
     if not args.prompt:
-        mysrx = yaml_input(args.datafile, args.verbose)
+        mysrx = Inventory.load(args.datafile, SRX_FILE, verbose=args.verbose).first()
         # Debugging
         #if args.verbose:
         #    print 'mysrx = {}'.format(mysrx)
     else:
         if args.verbose:
             print 'Prompting specified - asking user for all connection details'
-    check_input(mysrx, args.verbose)
+    check_input(mysrx, SRX_FIELDS, verbose=args.verbose)
 
     mysrx_conn = Device(host=mysrx['HOST'], user=mysrx['USER'], password=mysrx['PASSWORD'])
     if args.verbose:
@@ -7,11 +7,16 @@ Using telnetlib, connect to a router, execute show ip interface brief, return th
 # Imports
 import argparse
 import os
+import re
+import select
 import socket
 import sys
 import telnetlib
 #import time
-import yaml
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import Inventory
 
 # Globals
 LOGIN_PROMPT = 'sername:'
@@ -20,72 +25,196 @@ ROUTER_CMD = 'show ip interface brief'
 ROUTER_FILE = 'router.yaml'
 ROUTER_NOPAGING = 'terminal length 0'
 ROUTER_PROMPT = r'>|#'
+# Prompt (e.g. pynet-rtr1#) ending the output - keeps a > or # inside command output from matching
+ROUTER_PROMPT_NAME = r'[\w.-]+(?:\([\w.-]+\))?'  # Hostname plus mode e.g. pynet-rtr1(config)
+ROUTER_PROMPT_LINE = r'(?:^|\n){}(?:{})\s*$'.format(ROUTER_PROMPT_NAME, ROUTER_PROMPT)
+STREAM_CHUNK = 65536  # Most output read at a time while streaming
+STREAM_HOLD = 256  # Longest partial line held back while streaming in case it's the prompt
 TELNET_PORT = 23
 TELNET_TIMEOUT = 5
 
-__version__ = '0.0.2'
-
+__version__ = '0.0.9'
 
-def yaml_input(file1):
-    '''Read in router/switch authentication information from YAML file.'''
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-        return data1
-    else:
-        sys.exit('Invalid filename {}'.format(file1))
 
 ####################################################################################################
-def node_login(router_auth, telnet_port, telnet_timeout, verbose=False):
-    '''Login to network node and return connection handle.'''
+class LoginError(Exception):
+    '''Connecting or logging in to a network node failed'''
+    pass
+
+class CommandError(Exception):
+    '''A network node's prompt never came back after a command - the session is out of step and
+    shouldn't be used again'''
+    pass
+
+def node_connect(router_auth, telnet_port, telnet_timeout, verbose=False):
+    '''Login to network node and return connection handle - raises LoginError on failure so
+    callers which handle many nodes (e.g. telnet_pool) can carry on.'''
     try:
         if verbose:
             print 'Trying {}...'.format(router_auth['ADDRESS'])
         node_conn = telnetlib.Telnet(router_auth['ADDRESS'], telnet_port, telnet_timeout)
-    # Omitting as err part since we're not using it:
     except socket.timeout:
-        sys.exit('Connection to {} timed out'.format(router_auth['ADDRESS']))
+        raise LoginError('Connection to {} timed out'.format(router_auth['ADDRESS']))
+    except socket.error as err:
+        raise LoginError('Connection to {} failed:  {}'.format(router_auth['ADDRESS'], err))
 
-    output = node_conn.read_until(LOGIN_PROMPT, telnet_timeout)
-    if verbose:
-        print 'Node authentication banner:\n{}'.format(output)
-        print 'Logging in as {}...'.format(router_auth['USERNAME'])
-    node_conn.write(router_auth['USERNAME'] + '\n')
-    output = node_conn.read_until(PASSWORD_PROMPT, telnet_timeout)
-    if verbose:
-        # Skip first line, node echoing back username
-        secondline = output.find('\n') + 1
-        print 'Node password prompt:\n{}'.format(output[secondline:])
-        print 'Submitting password...'
-    node_conn.write(router_auth['PASSWORD'] + '\n')
+    try:
+        output = node_conn.read_until(LOGIN_PROMPT, telnet_timeout)
+        if verbose:
+            print 'Node authentication banner:\n{}'.format(output)
+            print 'Logging in as {}...'.format(router_auth['USERNAME'])
+        node_conn.write(router_auth['USERNAME'] + '\n')
+        output = node_conn.read_until(PASSWORD_PROMPT, telnet_timeout)
+        if verbose:
+            # Skip first line, node echoing back username
+            secondline = output.find('\n') + 1
+            print 'Node password prompt:\n{}'.format(output[secondline:])
+            print 'Submitting password...'
+        node_conn.write(router_auth['PASSWORD'] + '\n')
 
-    post_login_prompt = [LOGIN_PROMPT, ROUTER_PROMPT]
-    if verbose:
-        print 'Checking for successful login...'
-    # We don't care about/use the match output from expect so assigned to '_'
-    post_login_index, _, post_login_output = node_conn.expect(
-        post_login_prompt, telnet_timeout*2)
+        post_login_prompt = [LOGIN_PROMPT, ROUTER_PROMPT]
+        if verbose:
+            print 'Checking for successful login...'
+        # We don't care about/use the match output from expect so assigned to '_'
+        post_login_index, _, post_login_output = node_conn.expect(
+            post_login_prompt, telnet_timeout*2)
+    except (EOFError, socket.error) as err:
+        node_conn.close()
+        raise LoginError('Connection to {} lost during login:  {}'.format(router_auth['ADDRESS'],
+                                                                          err))
     if verbose:
         print 'Post login output:\n{}'.format(post_login_output)
-    if post_login_index == 0:
-        sys.exit('Authentication failed')
-    else:
-        if verbose:
-            print 'Authentication succeeded'
+    if post_login_index != 1:
+        node_conn.close()
+        if post_login_index == 0:
+            raise LoginError('Authentication failed')
+        raise LoginError('Timed out waiting for {} to login'.format(router_auth['ADDRESS']))
+    if verbose:
+        print 'Authentication succeeded'
 
     return node_conn
 
+def node_login(router_auth, telnet_port, telnet_timeout, verbose=False):
+    '''Login to network node and return connection handle, exit on failure.'''
+    try:
+        return node_connect(router_auth, telnet_port, telnet_timeout, verbose)
+    except LoginError as err:
+        sys.exit(str(err))
+
 def node_nopaging(node_conn, telnet_timeout, verbose=False):
-    '''Disable terminal paging on network node.'''
+    '''Disable terminal paging on network node.  Raises CommandError if the prompt doesn't come
+    back.'''
     if verbose:
         print 'Disabling paging on node...'
     node_conn.write(ROUTER_NOPAGING + '\n')
-    output = node_conn.read_until(ROUTER_PROMPT, telnet_timeout)
+    output = []
+    node_read_prompt(node_conn, output.append, telnet_timeout)
     if verbose:
-        print 'Node output:\n{}'.format(output)
+        print 'Node output:\n{}'.format(''.join(output))
 
 def node_cmd(node_conn, cmd, telnet_timeout, verbose=False):
-    '''Run a command on network node and return its output.'''
+    '''Run a command on network node and return its output (without the node prompt).
+    telnet_timeout is how long the node may go without sending anything.  Raises CommandError if
+    the prompt doesn't come back.'''
+    output = []
+    node_cmd_stream(node_conn, cmd, output.append, telnet_timeout, verbose)
+    cmd_output = ''.join(output)
+    if verbose:
+        print 'Node output:\n{}'.format(cmd_output)
+
+    return cmd_output
+
+def node_cmds(node_conn, cmds, telnet_timeout, verbose=False):
+    '''Run several commands on network node sending them all at once and return a list of their
+    outputs - shorter than cmds if the node stops responding.'''
+    if verbose:
+        print 'Sending commands {}...'.format(', '.join(cmds))
+    # One write instead of a round trip per command - the node reads them as typed ahead input
+    node_conn.write(''.join(cmd + '\n' for cmd in cmds))
+    output = node_conn.read_until('\n', telnet_timeout)
+    if verbose:
+        print 'Node echoes back:  {}'.format(output)
+    cmd_outputs = []
+    for index, cmd in enumerate(cmds):
+        if index + 1 < len(cmds):
+            # Output ends where the node prompt is followed by the echo of the next command
+            end_prompt = r'(?:^|\n){}(?:{}){}[^\n]*\n'.format(ROUTER_PROMPT_NAME, ROUTER_PROMPT,
+                                                           re.escape(cmds[index + 1]))
+        else:
+            end_prompt = ROUTER_PROMPT_LINE
+        _, match, output = node_conn.expect([end_prompt], telnet_timeout)
+        if verbose:
+            print 'Node output for {}:\n{}'.format(cmd, output)
+        if not match:
+            cmd_outputs.append(output)
+            break
+        cmd_outputs.append(output[:match.start()])
+
+    return cmd_outputs
+
+def node_read_chunk(node_conn):
+    '''Like read_very_eager but stops once about STREAM_CHUNK characters are read - otherwise a
+    node sending faster than the output is consumed fills memory.'''
+    node_conn.process_rawq()
+    while (len(node_conn.cookedq) < STREAM_CHUNK and not node_conn.eof and
+           node_conn.sock_avail()):
+        node_conn.fill_rawq()
+        node_conn.process_rawq()
+    return node_conn.read_very_lazy()
+
+def node_read_prompt(node_conn, sink, telnet_timeout):
+    '''Pass the node's output to sink (file like object or callable) as it arrives until the node
+    prompt ends it - the prompt itself is dropped.  Only the last line read is searched for the
+    prompt, so the cost doesn't grow with the output, and memory use stays at a chunk plus
+    STREAM_HOLD.  Return the number of characters of output.  Raises CommandError if the node
+    goes telnet_timeout seconds without sending anything or closes the connection before the
+    prompt arrives.'''
+    write = sink.write if hasattr(sink, 'write') else sink
+    prompt_re = re.compile(ROUTER_PROMPT_LINE)
+
+    # pending is output not yet passed on - the end of it could be the start of the node prompt
+    pending = ''
+    midline = False  # pending doesn't start at the beginning of a line
+    total = 0
+    while True:
+        try:
+            pending += node_read_chunk(node_conn)
+        except EOFError:
+            raise CommandError('Connection to {} closed before the node prompt'.format(
+                node_conn.host))
+        # Only the last line can be the prompt so it's the only part checked or held back
+        lastline = pending.rfind('\n')
+        if lastline >= 0 or not midline:
+            match = prompt_re.search(pending, max(lastline, 0))
+            if match:
+                # Strip off last line - node prompt
+                pending = pending[:match.start()]
+                break
+        if len(pending) - lastline > STREAM_HOLD:
+            # Too long to be the prompt
+            lastline = len(pending)
+        if lastline > 0:
+            write(pending[:lastline])
+            total += lastline
+            midline = lastline == len(pending)
+            pending = pending[lastline:]
+
+        ready, _, _ = select.select([node_conn], [], [], telnet_timeout)
+        if not ready:
+            raise CommandError('Timed out waiting for the node prompt from {}'.format(
+                node_conn.host))
+    if pending:
+        write(pending)
+        total += len(pending)
+
+    return total
+
+def node_cmd_stream(node_conn, cmd, sink, telnet_timeout, verbose=False):
+    '''Run a command on network node passing its output to sink (file like object or callable)
+    as it arrives instead of returning it - memory use stays at a chunk plus STREAM_HOLD no matter
+    how big the output is.  telnet_timeout is how long the node may go without sending anything.
+    Return the number of characters of output.  Raises CommandError if the prompt doesn't come
+    back.'''
     if verbose:
         print 'Sending command {}...'.format(cmd)
     node_conn.write(cmd + '\n')
@@ -93,15 +222,8 @@ def node_cmd(node_conn, cmd, telnet_timeout, verbose=False):
     output = node_conn.read_until('\n', telnet_timeout)
     if verbose:
         print 'Node echoes back:  {}'.format(output)
-    # Read until node prompt, this should indicate command output is done
-    output = node_conn.read_until(ROUTER_PROMPT, telnet_timeout)
-    # Strip off last line - node prompt
-    lastline = output.rfind('\n')
-    cmd_output = output[:lastline]
-    if verbose:
-        print 'Node output:\n{}'.format(output)
 
-    return cmd_output
+    return node_read_prompt(node_conn, sink, telnet_timeout)
 
 ####################################################################################################
 if __name__ == '__main__':
@@ -115,14 +237,31 @@ if __name__ == '__main__':
         '-v', '--verbose', action='store_true', help='display verbose output', default=False)
     parser.add_argument(
         '-f', '--file', help='specify YAML file to read router info from', default=ROUTER_FILE)
+    parser.add_argument(
+        '-s', '--stream', help='write command output to this file ("-" for stdout) as it arrives '
+        'instead of holding it in memory')
     args = parser.parse_args()
 
-    myrouter_auth = yaml_input(args.file)
+    myrouter_auth = Inventory.load(args.file, required=True).first()
     mynode_conn = node_login(myrouter_auth, TELNET_PORT, TELNET_TIMEOUT, args.verbose)
-    node_nopaging(mynode_conn, TELNET_TIMEOUT, args.verbose)
-    myoutput = node_cmd(mynode_conn, ROUTER_CMD, TELNET_TIMEOUT, args.verbose)
+    try:
+        node_nopaging(mynode_conn, TELNET_TIMEOUT, args.verbose)
+        if args.stream:
+            if args.stream == '-':
+                node_cmd_stream(mynode_conn, ROUTER_CMD, sys.stdout, TELNET_TIMEOUT,
+                                args.verbose)
+                print
+            else:
+                with open(args.stream, 'wb') as outfile:
+                    node_cmd_stream(mynode_conn, ROUTER_CMD, outfile, TELNET_TIMEOUT,
+                                    args.verbose)
+        else:
+            myoutput = node_cmd(mynode_conn, ROUTER_CMD, TELNET_TIMEOUT, args.verbose)
 
-    print 'Command output:\n{}'.format(myoutput)
+            print 'Command output:\n{}'.format(myoutput)
+    except CommandError as err:
+        mynode_conn.close()
+        sys.exit(str(err))
 
     # Finished - cleanup
     mynode_conn.close()
@@ -7,20 +7,33 @@ Write a script that connects to the lab pynet-rtr1, logins, and executes the
 
 import telnetlib
 import time
+import re
+import select
 import socket
 import sys
 import getpass
 
+# Any prompt (e.g. pynet-rtr1>) at the end of the output - used until the router's own is known
+PROMPT_RE = re.compile(r'[>#]\s*$')
+# Any prompt at the start of a line - separates the outputs of several commands
+PROMPT_SPLIT_RE = re.compile(r'\n[\w.-]+(?:\([\w.-]+\))?[>#]')
+# Only the newly read data plus this many characters before it (more than any prompt) is searched
+# for prompts, so the cost of each read doesn't grow with the output
+PROMPT_OVERLAP = 256
+READ_DEADLINE = 10
 TELNET_PORT = 23
 TELNET_TIMEOUT = 6
 
 class Router(object):
     '''A class to represent a Cisco router'''
 
-    def __init__(self, ip_addr, username, password):
+    def __init__(self, ip_addr, username, password, read_deadline=READ_DEADLINE):
         self.ip_addr = ip_addr
         self.username = username
         self.password = password
+        self.read_deadline = read_deadline
+        self.prompt_re = PROMPT_RE
+        self.prompt_split_re = PROMPT_SPLIT_RE
         self.connection = telnetlib.Telnet()
 
     def _login(self):
@@ -31,8 +44,62 @@ class Router(object):
         self.connection.write(self.username + '\n')
         output += self.connection.read_until("ssword:", TELNET_TIMEOUT)
         self.connection.write(self.password + '\n')
+        login_output = self.read_until_prompt()
+        output += login_output
+
+        # Only match the router's own prompt from now on so a > or # ending a line of command
+        # output isn't taken for the prompt
+        prompt = login_output.rstrip().split('\n')[-1].strip()
+        if PROMPT_RE.search(prompt):
+            # (config) etc. is added to the prompt in configuration modes
+            name = re.escape(prompt[:-1]) + r'(?:\([\w.-]+\))?'
+            self.prompt_re = re.compile(r'(?:^|\n){}[>#]\s*$'.format(name))
+            self.prompt_split_re = re.compile(r'\n{}[>#]'.format(name))
         return output
 
+    def read_until_prompt(self, deadline=None, prompts=1):
+        '''
+        Read until the router prompt ends the output or the deadline (seconds, default
+        read_deadline) passes - returns as soon as the prompt arrives and keeps reading as long
+        as it hasn't.  With prompts > 1 the output must contain that many prompts (one per
+        command sent).
+
+        Return everything read
+        '''
+        deadline = time.time() + (deadline or self.read_deadline)
+        chunks = []
+        # The end of the output - the last read plus PROMPT_OVERLAP characters before it, and one
+        # more so a ^ in the prompt regex can't match where the window starts mid line
+        window = ''
+        size = 0
+        # Prompts found so far and the output position the next one must start at
+        found = 0
+        found_end = 0
+        while True:
+            try:
+                data = self.connection.read_very_eager()
+            except EOFError:
+                sys.exit("Connection closed by {}".format(self.ip_addr))
+            if data:
+                chunks.append(data)
+                size += len(data)
+                window = (window + data)[-(len(data) + PROMPT_OVERLAP + 1):]
+                start = size - len(window)
+                pos = 1 if start else 0
+                if prompts > 1:
+                    matches = self.prompt_split_re.finditer(window, max(found_end - start, pos))
+                    for match in matches:
+                        found += 1
+                        found_end = start + match.end()
+                if self.prompt_re.search(window, pos) and (prompts == 1 or found >= prompts):
+                    break
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # Sleep until more data arrives instead of for a fixed interval
+            select.select([self.connection], [], [], remaining)
+        return ''.join(chunks)
+
     def telnet_connect(self):
         '''
         Establish telnet connection
@@ -43,7 +110,10 @@ class Router(object):
             sys.exit("Connection timed-out")
 
         # Login
-        return self._login()
+        try:
+            return self._login()
+        except EOFError:
+            sys.exit("Connection closed by {}".format(self.ip_addr))
 
     def disable_paging(self, paging_cmd='terminal length 0'):
         '''
@@ -51,16 +121,38 @@ class Router(object):
         '''
         return self.send_command(paging_cmd)
 
-    def send_command(self, cmd):
+    def send_command(self, cmd, deadline=None):
         '''
         Send a command down the telnet channel
 
-        Return the response
+        Return the response (up to and including the prompt)
         '''
         cmd = cmd.rstrip()
         self.connection.write(cmd + '\n')
-        time.sleep(1)
-        return self.connection.read_very_eager()
+        return self.read_until_prompt(deadline)
+
+    def send_commands(self, cmds, deadline=None):
+        '''
+        Send several commands down the telnet channel at once instead of waiting for each
+        response before sending the next
+
+        Return a list of the responses (each as send_command returns it)
+        '''
+        cmds = [cmd.rstrip() for cmd in cmds]
+        self.connection.write(''.join(cmd + '\n' for cmd in cmds))
+        output = self.read_until_prompt(deadline, len(cmds))
+
+        # Split after each prompt - the next command's echo follows it on the same line
+        responses = []
+        start = 0
+        for match in self.prompt_split_re.finditer(output):
+            responses.append(output[start:match.end()])
+            start = match.end()
+        if responses:
+            responses[-1] += output[start:]
+        else:
+            responses.append(output)
+        return responses
 
 def main():
     '''
@@ -75,8 +167,6 @@ def main():
     myrouter = Router(ip_addr, username, password)
     output = myrouter.telnet_connect()
 
-    time.sleep(1)
-    myrouter.connection.read_very_eager()
     myrouter.disable_paging()
 
     output = myrouter.send_command('show ip int brief')
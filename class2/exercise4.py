@@ -7,15 +7,21 @@ sysDescr OIDs and print them out.
 # Primary Imports
 # Delete unused lines/comments!
 import argparse
+from collections import OrderedDict
 import os
 import sys
-import yaml
 
 # 3rd Party Imports
-from snmp_helper import snmp_get_oid, snmp_extract
+from pysnmp.entity.rfc3413.oneliner import cmdgen
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import iter_devices
 
 # Globals
+MAX_VARBINDS = 30  # Most OIDs requested in one PDU - larger requests are split up front
 ROUTER_FILE = 'routers.yaml'
+SNMP_TOOBIG = 1  # error-status when the response won't fit in one message
 # sysName, sysDescr
 SNMP_OIDs = [{'id': '1.3.6.1.2.1.1.5.0', 'obj': 'sysName'},
              {'id': '1.3.6.1.2.1.1.1.0', 'obj': 'sysDescr'}]
@@ -24,26 +30,49 @@ SNMP_OIDs = [{'id': '1.3.6.1.2.1.1.5.0', 'obj': 'sysName'},
 __author__ = 'James R. Small'
 __contact__ = 'james<period>r<period>small<at>outlook<period>com'
 __date__ = 'April 19, 2016'
-__version__ = '0.0.1'
-
+__version__ = '0.0.5'
 
-def yaml_input(file1):
-    '''Read in router/switch authentication information from YAML file.'''
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-        return data1
-    else:
-        sys.exit('Invalid filename {}'.format(file1))
 
-def snmp_query(node_info, oid):
-    '''Query for OID on node - all necessary parameters should be part of node_info data
-    structure
+def snmp_bulk_query(node_info, oids, max_varbinds=MAX_VARBINDS, verbose=False):
+    '''Query for all OIDs on node in as few requests as possible - up to max_varbinds OIDs per
+    GET PDU, with any request the agent answers with tooBig split in half and retried.  Returns
+    a dictionary of OID:  value (prettyPrint() text, or None if the agent had no value or didn't
+    respond) in the order of oids.
     '''
-    snmp_output = snmp_get_oid(node_info, oid)
-    output = snmp_extract(snmp_output)
+    a_host, community_string, snmp_port = node_info
+    cmd_gen = cmdgen.CommandGenerator()
+    community = cmdgen.CommunityData(community_string)
+    target = cmdgen.UdpTransportTarget((a_host, snmp_port))
+    results = OrderedDict((oid, None) for oid in oids)
+
+    pending = [oids[pos:pos + max_varbinds] for pos in xrange(0, len(oids), max_varbinds)]
+    while pending:
+        request = pending.pop()
+        error_detected, error_status, error_index, snmp_data = cmd_gen.getCmd(
+            community, target, *request, lookupNames=True, lookupValues=True)
+        if error_detected:
+            # No response (e.g. timed out) - retrying the rest won't help
+            if verbose:
+                print 'SNMP query to {} failed:  {}'.format(a_host, error_detected)
+            break
+        if int(error_status) == SNMP_TOOBIG and len(request) > 1:
+            if verbose:
+                print 'Response to {} OIDs too big - splitting request'.format(len(request))
+            half = len(request) // 2
+            pending.extend([request[half:], request[:half]])
+        elif int(error_status):
+            # Failed for one OID (e.g. SNMPv1 noSuchName) - leave it None and retry the others
+            if verbose:
+                print 'SNMP error {} for {}'.format(error_status.prettyPrint(),
+                                                     request[int(error_index) - 1])
+            if 0 < int(error_index) <= len(request) and len(request) > 1:
+                pending.append(request[:int(error_index) - 1] + request[int(error_index):])
+        else:
+            # Variable bindings come back in the order requested
+            for oid, (_, value) in zip(request, snmp_data):
+                results[oid] = value.prettyPrint()
 
-    return output
+    return results
 
 ####################################################################################################
 def main(args):
@@ -59,19 +88,26 @@ def main(args):
         '-v', '--verbose', action='store_true', help='display verbose output', default=False)
     parser.add_argument(
         '-f', '--file', help='specify YAML file to read router info from', default=ROUTER_FILE)
+    parser.add_argument('--host', action='append',
+        help='only query this router (hostname or IP address) - may be repeated')
+    parser.add_argument('--group', action='append',
+        help='only query routers in this group - may be repeated')
     args = parser.parse_args()
 
     # Populate router data structures list
-    myrouters = yaml_input(args.file)
+    myrouters = iter_devices(args.file, args.host, args.group, required=True)
 
     for router in myrouters:
         snmp_info = (router['ADDRESS'], router['SNMP_COMMUNITY'], router['SNMP_PORT'])
         print '{} [{}:{}]:'.format(router['HOSTNAME'], router['ADDRESS'],
                                    router['SNMP_PORT'])
+        # All OIDs in one request instead of a round trip each
+        results = snmp_bulk_query(snmp_info, [tgt_oid_info['id'] for tgt_oid_info in SNMP_OIDs],
+                                  verbose=args.verbose)
         for tgt_oid_info in SNMP_OIDs:
-            result = snmp_query(snmp_info, tgt_oid_info['id'])
+            result = results[tgt_oid_info['id']]
             print '{} ({}) ='.format(tgt_oid_info['obj'], tgt_oid_info['id']),
-            if len(result) > 79:
+            if result and len(result) > 79:
                 print ''
             print '{}'.format(result)
         print ''
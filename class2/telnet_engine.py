@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Concurrent telnet sessions driven from one event loop - the same login, paging and command steps
+as node_login, node_nopaging and node_cmd in exercise2.py, but for hundreds of routers at once
+from a single thread instead of one blocking telnetlib connection at a time
+
+Python 2 has no asyncio, so each session is a generator (session_steps) which yields what to send
+and what to wait for, and TelnetEngine multiplexes the non-blocking sockets with poll/select,
+feeding each session's generator as its data arrives.
+'''
+
+# Imports
+import argparse
+import errno
+import os
+import re
+import select
+import socket
+import sys
+from telnetlib import IAC, DO, DONT, WILL, WONT, SB, SE
+import time
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from exercise2 import (LOGIN_PROMPT, PASSWORD_PROMPT, ROUTER_CMD, ROUTER_NOPAGING, ROUTER_PROMPT,
+                       TELNET_PORT, TELNET_TIMEOUT)
+from inventory_helper import iter_devices
+
+# Globals
+LOGIN_RE = re.compile(re.escape(LOGIN_PROMPT))
+MAX_SESSIONS = 200  # Concurrent sessions
+PASSWORD_RE = re.compile(re.escape(PASSWORD_PROMPT))
+POLL_INTERVAL = 0.5  # Seconds - how often timeouts are checked when nothing arrives
+POST_LOGIN_RE = re.compile('(?P<login>{})|(?:{})'.format(re.escape(LOGIN_PROMPT), ROUTER_PROMPT))
+READ_BUF = 65536
+ROUTER_FILE = 'routers.yaml'
+
+__version__ = '0.0.3'
+
+
+class SessionError(Exception):
+    '''Router session failed (authentication, timeout, connection)'''
+    pass
+
+def session_steps(router_auth, commands, outputs, telnet_timeout=TELNET_TIMEOUT):
+    '''Generator with the login, paging and command steps of node_login, node_nopaging and
+    node_cmd.  Yields (data to send or None, regex to wait for, timeout) and is sent (text read
+    up to the end of the match, match).  (command, output) is appended to the list outputs for
+    each command - in order, so a repeated command keeps every output.'''
+    yield None, LOGIN_RE, telnet_timeout
+    yield router_auth['USERNAME'] + '\n', PASSWORD_RE, telnet_timeout
+    text, match = yield router_auth['PASSWORD'] + '\n', POST_LOGIN_RE, telnet_timeout * 2
+    if match.group('login'):
+        raise SessionError('Authentication failed')
+
+    # From here on wait for the router's own prompt (e.g. pynet-rtr1#) at the start of a line so
+    # a > or # in command output doesn't end the command early
+    prompt = text[text.rfind('\n') + 1:match.start()].strip()
+    prompt_re = re.compile(r'(?:^|\n){}(?:\([\w.-]+\))?(?:{})'.format(re.escape(prompt),
+                                                                   ROUTER_PROMPT))
+    yield ROUTER_NOPAGING + '\n', prompt_re, telnet_timeout
+
+    for cmd in commands:
+        text, _ = yield cmd + '\n', prompt_re, telnet_timeout
+        # Strip off first line (router echoing back the command) and last line (router prompt)
+        firstline = text.find('\n')
+        lastline = text.rfind('\n')
+        outputs.append((cmd, text[firstline + 1:lastline] if lastline > firstline else ''))
+
+class TelnetSession(object):
+    '''One router's non-blocking telnet connection, advanced by TelnetEngine'''
+
+    def __init__(self, router_auth, commands, port=TELNET_PORT, telnet_timeout=TELNET_TIMEOUT):
+        self.router_auth = router_auth
+        self.address = router_auth['ADDRESS']
+        self.port = router_auth.get('TELNET_PORT', port)
+        self.timeout = telnet_timeout
+        self.outputs = []  # [(command, output), ...]
+        self.steps = session_steps(router_auth, commands, self.outputs, telnet_timeout)
+        self.error = None
+        self.done = False
+        self.sock = None
+        self.fd = None
+        self.connected = False
+        self.incoming = ''  # Received text (telnet commands removed) not matched yet
+        self.partial_iac = ''  # Incomplete telnet command at the end of the last read
+        self.outgoing = ''
+        self.pattern = None
+        self.deadline = None
+
+    def fileno(self):
+        return self.fd
+
+    def start(self):
+        '''Start connecting - completion is signalled by the socket becoming writable.'''
+        self.deadline = time.time() + self.timeout
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setblocking(0)
+            self.fd = self.sock.fileno()
+            err = self.sock.connect_ex((self.address, self.port))
+        except socket.error as err:
+            self.fail('Connection to {} failed:  {}'.format(self.address, err))
+            return
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            self.fail('Connection to {} failed:  {}'.format(self.address, errno.errorcode.get(
+                err, err)))
+
+    def want_write(self):
+        return not self.connected or bool(self.outgoing)
+
+    def handle_write(self):
+        if not self.connected:
+            err = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err:
+                self.fail('Connection to {} failed:  {}'.format(self.address,
+                                                               errno.errorcode.get(err, err)))
+                return
+            self.connected = True
+            self._advance(None)
+            return
+        try:
+            sent = self.sock.send(self.outgoing)
+        except socket.error as err:
+            if err.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                self.fail('Send to {} failed:  {}'.format(self.address, err))
+            return
+        self.outgoing = self.outgoing[sent:]
+
+    def handle_read(self):
+        try:
+            data = self.sock.recv(READ_BUF)
+        except socket.error as err:
+            if err.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                self.fail('Connection to {} failed:  {}'.format(self.address, err))
+            return
+        if not data:
+            self.fail('Connection closed by {}'.format(self.address))
+            return
+        self.incoming += self._process_iac(data)
+        while self.pattern and not self.done:
+            match = self.pattern.search(self.incoming)
+            if not match:
+                break
+            text = self.incoming[:match.end()]
+            self.incoming = self.incoming[match.end():]
+            self._advance((text, match))
+
+    def _process_iac(self, data):
+        '''Remove telnet commands from data and refuse all option requests like telnetlib.'''
+        data = self.partial_iac + data
+        self.partial_iac = ''
+        text = []
+        pos = 0
+        while True:
+            iac = data.find(IAC, pos)
+            if iac < 0:
+                text.append(data[pos:])
+                break
+            text.append(data[pos:iac])
+            if iac + 1 >= len(data):
+                self.partial_iac = data[iac:]
+                break
+            cmd = data[iac + 1]
+            if cmd == IAC:
+                # Escaped 255 data byte
+                text.append(IAC)
+                pos = iac + 2
+            elif cmd in (DO, DONT, WILL, WONT):
+                if iac + 2 >= len(data):
+                    self.partial_iac = data[iac:]
+                    break
+                opt = data[iac + 2]
+                self.outgoing += IAC + (WONT if cmd in (DO, DONT) else DONT) + opt
+                pos = iac + 3
+            elif cmd == SB:
+                end = data.find(IAC + SE, iac + 2)
+                if end < 0:
+                    self.partial_iac = data[iac:]
+                    break
+                pos = end + 2
+            else:
+                pos = iac + 2
+        return ''.join(text)
+
+    def _advance(self, value):
+        '''Feed value to the session steps and set up the next send/wait.'''
+        try:
+            send, self.pattern, timeout = self.steps.send(value)
+        except StopIteration:
+            self.close()
+            return
+        except SessionError as err:
+            self.fail(str(err))
+            return
+        if send:
+            self.outgoing += send
+        self.deadline = time.time() + timeout
+
+    def check_timeout(self, now):
+        if not self.done and now > self.deadline:
+            if self.connected:
+                self.fail('Timed out waiting for {} from {}'.format(
+                    self.pattern.pattern, self.address))
+            else:
+                self.fail('Connection to {} timed out'.format(self.address))
+
+    def fail(self, error):
+        self.error = error
+        self.close()
+
+    def close(self):
+        self.done = True
+        if self.sock:
+            self.sock.close()
+
+class TelnetEngine(object):
+    '''Runs many TelnetSessions concurrently from one event loop'''
+
+    def __init__(self, max_sessions=MAX_SESSIONS, port=TELNET_PORT,
+                 telnet_timeout=TELNET_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.port = port
+        self.timeout = telnet_timeout
+
+    @staticmethod
+    def _wait(sessions, timeout):
+        '''Return (sessions ready to read, sessions ready to write).'''
+        if not hasattr(select, 'poll'):
+            readable, writable, _ = select.select(
+                sessions, [session for session in sessions if session.want_write()], [], timeout)
+            return readable, writable
+        poller = select.poll()
+        by_fd = {}
+        for session in sessions:
+            by_fd[session.fd] = session
+            poller.register(session.fd, select.POLLIN | (select.POLLOUT if session.want_write()
+                                                         else 0))
+        readable = []
+        writable = []
+        for fd, event in poller.poll(timeout * 1000):
+            if event & select.POLLOUT:
+                writable.append(by_fd[fd])
+            if event & (select.POLLIN | select.POLLHUP | select.POLLERR):
+                readable.append(by_fd[fd])
+        return readable, writable
+
+    def run(self, routers, commands):
+        '''Generator yielding each TelnetSession as it finishes (check session.error, output is
+        in session.outputs).  routers is any iterable of router_auth dictionaries - no more than
+        max_sessions are open at a time.'''
+        routers = iter(routers)
+        active = []
+        while True:
+            while len(active) < self.max_sessions:
+                router_auth = next(routers, None)
+                if router_auth is None:
+                    break
+                session = TelnetSession(router_auth, commands, self.port, self.timeout)
+                session.start()
+                if session.done:
+                    yield session
+                else:
+                    active.append(session)
+            if not active:
+                return
+
+            readable, writable = self._wait(active, POLL_INTERVAL)
+            for session in writable:
+                if not session.done:
+                    session.handle_write()
+            for session in readable:
+                if not session.done:
+                    session.handle_read()
+            now = time.time()
+            for session in active:
+                session.check_timeout(now)
+            for session in [session for session in active if session.done]:
+                active.remove(session)
+                yield session
+
+####################################################################################################
+def main(args):
+    '''Run commands on all routers in the inventory concurrently and print output as each router
+    finishes.'''
+    parser = argparse.ArgumentParser(
+        description='Connect to routers concurrently over telnet and run commands')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--file', help='specify YAML file to read router info from',
+                        default=ROUTER_FILE)
+    parser.add_argument('-c', '--command', action='append',
+                        help='command to run - may be repeated (default {})'.format(ROUTER_CMD))
+    parser.add_argument('-n', '--sessions', type=int, default=MAX_SESSIONS,
+                        help='maximum concurrent sessions (default {})'.format(MAX_SESSIONS))
+    parser.add_argument('-t', '--timeout', type=float, default=TELNET_TIMEOUT,
+                        help='seconds to wait for each response (default {})'.format(
+                            TELNET_TIMEOUT))
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="don't display command output, only the summary", default=False)
+    args = parser.parse_args()
+
+    commands = args.command or [ROUTER_CMD]
+    engine = TelnetEngine(args.sessions, TELNET_PORT, args.timeout)
+    start = time.time()
+    succeeded = failed = 0
+    for session in engine.run(iter_devices(args.file, required=True), commands):
+        name = session.router_auth.get('HOSTNAME', session.address)
+        if session.error:
+            failed += 1
+            print 'Failed - {}:  {}'.format(name, session.error)
+            continue
+        succeeded += 1
+        if not args.quiet:
+            for cmd, output in session.outputs:
+                print '{} on {}:\n{}\n'.format(cmd, name, output)
+    print '{} routers succeeded, {} failed in {:.2f} seconds'.format(succeeded, failed,
+                                                                      time.time() - start)
+
+# Call main and put all logic there per best practices.
+# No triple quotes here because not a function!
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]) or 0)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+####################################################################################################
+'''
+Pool of logged in, paging disabled telnet sessions so repeated commands to the same router reuse
+a session instead of going through node_login and node_nopaging (exercise2.py) every time
+
+Idle sessions are closed once they've been unused for longer than idle_timeout (keep this below
+the router's exec-timeout) and are health checked - an empty line must get the prompt back -
+before being handed out again.  Sessions that fail are discarded and replaced with a new login.
+'''
+
+# Imports
+import argparse
+from contextlib import contextmanager
+import os
+import socket
+import sys
+import threading
+import time
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from exercise2 import (CommandError, LoginError, node_cmd, node_connect, node_nopaging,
+                       ROUTER_CMD, ROUTER_PROMPT_LINE, TELNET_PORT, TELNET_TIMEOUT)
+from inventory_helper import iter_devices
+
+# Globals
+HEALTH_TIMEOUT = 2  # Seconds to wait for the prompt when checking an idle session
+IDLE_TIMEOUT = 300  # Seconds - Cisco's default exec-timeout is 10 minutes
+MAX_IDLE = 4  # Idle sessions kept per router
+ROUTER_FILE = 'routers.yaml'
+
+__version__ = '0.0.3'
+
+
+####################################################################################################
+def node_healthy(node_conn, health_timeout=HEALTH_TIMEOUT):
+    '''Return True if the node still answers an empty line with its prompt.'''
+    try:
+        # Discard anything left over (e.g. log messages) so it isn't taken for the prompt
+        node_conn.read_very_eager()
+        node_conn.write('\n')
+        index, _, _ = node_conn.expect([ROUTER_PROMPT_LINE], health_timeout)
+    except (EOFError, socket.error):
+        return False
+    return index == 0
+
+class TelnetPool(object):
+    '''Hands out logged in telnet sessions, keeping released ones open for reuse'''
+
+    def __init__(self, telnet_port=TELNET_PORT, telnet_timeout=TELNET_TIMEOUT,
+                 idle_timeout=IDLE_TIMEOUT, max_idle=MAX_IDLE, verbose=False):
+        self.telnet_port = telnet_port
+        self.telnet_timeout = telnet_timeout
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self.verbose = verbose
+        self.idle = {}  # (address, port, username):  [(node_conn, time released), ...]
+        self.lock = threading.Lock()
+        self.logins = 0
+        self.reused = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _key(self, router_auth):
+        return (router_auth['ADDRESS'], router_auth.get('TELNET_PORT', self.telnet_port),
+                router_auth['USERNAME'])
+
+    def acquire(self, router_auth):
+        '''Return an idle session for router_auth that passes the health check, or log in to a
+        new one.  Raises LoginError if a new session can't be set up.'''
+        key = self._key(router_auth)
+        while True:
+            with self.lock:
+                sessions = self.idle.get(key)
+                if not sessions:
+                    break
+                node_conn, released = sessions.pop()
+            if time.time() - released > self.idle_timeout:
+                node_conn.close()
+            elif node_healthy(node_conn):
+                self.reused += 1
+                return node_conn
+            else:
+                if self.verbose:
+                    print 'Discarding unresponsive session to {}'.format(key[0])
+                node_conn.close()
+
+        node_conn = node_connect(router_auth, key[1], self.telnet_timeout, self.verbose)
+        try:
+            node_nopaging(node_conn, self.telnet_timeout, self.verbose)
+        except (CommandError, EOFError, socket.error) as err:
+            node_conn.close()
+            raise LoginError('Disabling paging on {} failed:  {}'.format(key[0], err))
+        self.logins += 1
+        return node_conn
+
+    def release(self, router_auth, node_conn, broken=False):
+        '''Return a session to the pool - broken sessions are closed instead.'''
+        if not broken:
+            with self.lock:
+                sessions = self.idle.setdefault(self._key(router_auth), [])
+                if len(sessions) < self.max_idle:
+                    sessions.append((node_conn, time.time()))
+                    return
+        node_conn.close()
+
+    @contextmanager
+    def session(self, router_auth):
+        '''with pool.session(router_auth) as node_conn: - the session is discarded if the block
+        raises.'''
+        node_conn = self.acquire(router_auth)
+        try:
+            yield node_conn
+        except:
+            self.release(router_auth, node_conn, broken=True)
+            raise
+        self.release(router_auth, node_conn)
+
+    def run(self, router_auth, cmd):
+        '''Run cmd on router_auth with a pooled session and return its output.  Raises
+        CommandError (and discards the session) if the router's prompt doesn't come back.'''
+        with self.session(router_auth) as node_conn:
+            return node_cmd(node_conn, cmd, self.telnet_timeout, self.verbose)
+
+    def prune(self):
+        '''Close idle sessions unused for longer than idle_timeout.'''
+        now = time.time()
+        with self.lock:
+            for key, sessions in self.idle.items():
+                keep = []
+                for node_conn, released in sessions:
+                    if now - released > self.idle_timeout:
+                        node_conn.close()
+                    else:
+                        keep.append((node_conn, released))
+                if keep:
+                    self.idle[key] = keep
+                else:
+                    del self.idle[key]
+
+    def close(self):
+        '''Close all idle sessions.'''
+        with self.lock:
+            for sessions in self.idle.itervalues():
+                for node_conn, _ in sessions:
+                    node_conn.close()
+            self.idle = {}
+
+####################################################################################################
+def main(args):
+    '''Run commands on the inventory's routers for several cycles reusing pooled sessions.'''
+    parser = argparse.ArgumentParser(
+        description='Run commands repeatedly on routers over pooled telnet sessions')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--file', help='specify YAML file to read router info from',
+                        default=ROUTER_FILE)
+    parser.add_argument('-c', '--command', action='append',
+                        help='command to run - may be repeated (default {})'.format(ROUTER_CMD))
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='number of cycles to run the commands (default 1)')
+    parser.add_argument('-i', '--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help='seconds before an unused session is closed (default {})'.format(
+                            IDLE_TIMEOUT))
+    parser.add_argument('-v', '--verbose', action='store_true', help='display verbose output',
+                        default=False)
+    args = parser.parse_args()
+
+    commands = args.command or [ROUTER_CMD]
+    routers = list(iter_devices(args.file, required=True))
+    start = time.time()
+    with TelnetPool(idle_timeout=args.idle_timeout, verbose=args.verbose) as pool:
+        for _ in xrange(args.repeat):
+            for router_auth in routers:
+                for cmd in commands:
+                    try:
+                        output = pool.run(router_auth, cmd)
+                    except (CommandError, LoginError) as err:
+                        print 'Error:  {}\n'.format(err)
+                        break
+                    print '{} on {}:\n{}\n'.format(cmd, router_auth['ADDRESS'], output)
+            pool.prune()
+        print '{} logins, {} sessions reused in {:.2f} seconds'.format(pool.logins, pool.reused,
+                                                                        time.time() - start)
+
+# Call main and put all logic there per best practices.
+# No triple quotes here because not a function!
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]) or 0)
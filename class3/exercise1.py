@@ -10,16 +10,17 @@
 import argparse
 from collections import OrderedDict
 import datetime
-import json
 import os
-import pickle
 import sys
 import termcolor
 import time
-import yaml
 
 # Local Imports
 from email_helper import send_mail
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import iter_devices
+from journal_helper import StateJournal
+from serial_helper import FORMATS, get_serializer
 import snmp_helper
 
 # Globals
@@ -41,27 +42,17 @@ SNMP_TARGETS = OrderedDict([('sysUpTime', '1.3.6.1.2.1.1.3.0'),
 #SNMP_TRACK = 'ccmHistory'  # Only track changes in SNMP TARGETS starting with this prefix
 SNMP_TRACK = 'ccmHistoryRunning'  # Only track changes in SNMP TARGETS starting with this prefix
 SUBJECT = 'Alert - router configuration change'
-YAML_BOF = '---\n'
 
 # Metadata
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'April 23, 2016'
-__version__ = '0.0.4'
+__version__ = '0.0.9'
 
 
-def yaml_input(file1):
-    '''Read in router/switch authentication information from YAML file.'''
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-        return data1
-    else:
-        sys.exit('Error:  Invalid filename {}'.format(file1))
-
 def read_data(infile, file_format, infile_format, verbose=False):
-    '''Read in router data from specified file.  Support Python pickle format, yaml format or
-    json format and return data structure.'''
+    '''Read in router data from specified file.  Support any format registered in serial_helper
+    (Python pickle, yaml, json, marshal) and return data structure.'''
     if infile_format:
         read_format = infile_format
     else:
@@ -70,16 +61,13 @@ def read_data(infile, file_format, infile_format, verbose=False):
     if verbose:
         print 'Reading in previous output as {} formatted data from {}...'.format(read_format,
             infile)
+    try:
+        load_func, _ = get_serializer(read_format)
+    except ValueError as err:
+        sys.exit('Error:  {}.'.format(err))
     if os.path.isfile(infile):
         with open(infile, 'rb') as file1:
-            if read_format == 'native':
-                router_cfg_times = pickle.load(file1)
-            elif read_format == 'yaml':
-                router_cfg_times = yaml.load(file1)
-            elif read_format == 'json':
-                router_cfg_times = json.load(file1)
-            else:
-                sys.exit('Error:  Unsupported file format {}.'.format(read_format))
+            router_cfg_times = load_func(file1)
     else:
         sys.exit('Error:  Invalid filename {}'.format(infile))
     if verbose:
@@ -89,13 +77,17 @@ def read_data(infile, file_format, infile_format, verbose=False):
 
 def write_data(outfile, router_cfg_times, file_format, outfile_format, overwrite=False,
                verbose=False, yaml_format=True):
-    '''Write router data from specified file.  Support Python pickle format, yaml format or
-    json format and return data structure.'''
+    '''Write router data to specified file.  Support any format registered in serial_helper
+    (Python pickle, yaml, json, marshal).'''
     if outfile_format:
         write_format = outfile_format
     else:
         write_format = file_format
 
+    try:
+        _, dump_func = get_serializer(write_format)
+    except ValueError as err:
+        sys.exit('Error:  {}.'.format(err))
     if verbose:
         print 'Writing output as {} formatted data to {}...'.format(write_format, outfile)
     # In this case, want to make sure file doesn't exist so don't clobber something:
@@ -103,15 +95,7 @@ def write_data(outfile, router_cfg_times, file_format, outfile_format, overwrite
         if verbose and os.path.isfile(outfile):
             print 'Overwriting {}...'.format(outfile)
         with open(outfile, 'wb') as file1:
-            if write_format == 'native':
-                pickle.dump(router_cfg_times, file1)
-            elif write_format == 'yaml':
-                file1.write(YAML_BOF)
-                file1.write(yaml.dump(router_cfg_times, default_flow_style=yaml_format))
-            elif write_format == 'json':
-                json.dump(router_cfg_times, file1)
-            else:
-                sys.exit('Error:  Unsupported file format {}.'.format(write_format))
+            dump_func(router_cfg_times, file1, default_flow_style=yaml_format)
     else:
         sys.exit('Error:  Existing filename {} - use --overwrite to force'.format(outfile))
 
@@ -210,6 +194,10 @@ def main(args):
     parser.add_argument('--version', action='version', version=__version__)
     parser.add_argument('-d', '--datafile', help='specify YAML file to read router info from',
         default=ROUTER_FILE)
+    parser.add_argument('--host', action='append',
+        help='only poll this router (hostname or IP address) - may be repeated')
+    parser.add_argument('--group', action='append',
+        help='only poll routers in this group - may be repeated')
     parser.add_argument('-r', '--read',
         help='specify output file to load (from previous run of program - default is to start ' + \
             'from scratch)')
@@ -225,14 +213,18 @@ def main(args):
     group2.add_argument('-o', '--once', action='store_true',
         help='poll once and display results', default=False)
     parser.add_argument('-w', '--write', help='specify file to write results to (implies -o)')
+    parser.add_argument('-j', '--journal',
+        help='specify journal file - state is restored from it at start and changes are ' + \
+            'appended to it after every poll (works with -c)')
     parser.add_argument('--overwrite', action='store_true',
         help='overwrite existing file (with -w)', default=False)
-    parser.add_argument('-f', '--format', help='specify input/output file format - native ' + \
-        '(Python pickle - default if not specified) | yaml | json', default='native')
-    parser.add_argument('--informat', help='specify input file format - native ' + \
-        '(Python pickle) | yaml | json - (takes precedence over -f)')
-    parser.add_argument('--outformat', help='specify output file format - native ' + \
-        '(Python pickle) | yaml | json - (takes precedence over -f)')
+    parser.add_argument('-f', '--format', choices=FORMATS, help='specify input/output file ' + \
+        'format - native (Python pickle - default if not specified) | yaml | json | marshal ' + \
+        '(compact binary)', default='native')
+    parser.add_argument('--informat', choices=FORMATS, help='specify input file format - ' + \
+        'native (Python pickle) | yaml | json | marshal - (takes precedence over -f)')
+    parser.add_argument('--outformat', choices=FORMATS, help='specify output file format - ' + \
+        'native (Python pickle) | yaml | json | marshal - (takes precedence over -f)')
     args = parser.parse_args()
 
     # Sanity checks
@@ -243,15 +235,23 @@ def main(args):
             '(use -ow {} to avoid this message)'.format(args.write, args.write)
         args.once = True
 
-    myrouters = yaml_input(args.datafile)
+    myrouters = iter_devices(args.datafile, args.host, args.group, required=True)
     # Working data structure
     myrouter_cfg_times = {}
     if args.read:
         myrouter_cfg_times = read_data(args.read, args.format, args.informat, args.verbose)
+    myjournal = None
+    if args.journal:
+        myjournal = StateJournal(args.journal, verbose=args.verbose)
+        # Journal is the most recent state - takes precedence over -r
+        myrouter_cfg_times.update(myjournal.replay())
     if args.once:
         if args.verbose:
             print 'Poll once and display results selected.'
         myrouter_cfg_times = poll_device(myrouters, myrouter_cfg_times, args.verbose, args.quiet)
+        if myjournal:
+            myjournal.record(myrouter_cfg_times)
+            myjournal.close()
         if args.write:
             write_data(args.write, myrouter_cfg_times, args.format, args.outformat, args.overwrite,
                 args.verbose)
@@ -261,10 +261,14 @@ def main(args):
     else:
         if args.verbose:
             print 'Real-time monitoring selected.'
+        # Every poll walks all routers - keep them instead of re-reading the file
+        myrouters = list(myrouters)
         # Keep polling every POLL_INTERVAL forever
         while True:
             myrouter_cfg_times = poll_device(myrouters, myrouter_cfg_times, args.verbose,
                 args.quiet)
+            if myjournal:
+                myjournal.record(myrouter_cfg_times)
             if args.verbose:
                 del_str = '\b' * 24
                 count = POLL_INTERVAL
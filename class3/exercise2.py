@@ -14,11 +14,14 @@ import os
 import pygal
 import sys
 import time
-import yaml
 
 # Local Imports
 import snmp_helper
 
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import Inventory
+
 # Globals
 DEL_STR = '\b' * 24
 GRAPH1_OUT = 'graph1.svg'
@@ -43,17 +46,8 @@ YAML_BOF = '---\n'
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'April 29, 2016'
-__version__ = '0.0.3'
-
+__version__ = '0.0.4'
 
-def yaml_input(file1):
-    '''Read in router/switch authentication information from YAML file.'''
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-        return data1
-    else:
-        sys.exit('Error:  Invalid filename {}'.format(file1))
 
 ####################################################################################################
 def get_snmp_data(snmp_device, snmp_auth, oid):
@@ -135,7 +129,7 @@ def main(args):
     args = parser.parse_args()
 
     # Initialize data structures
-    myrouter = yaml_input(args.datafile)
+    myrouter = Inventory.load(args.datafile, required=True).first()
     if args.verbose:
         print 'Target router:  {}'.format(myrouter['HOSTNAME'])
     myrouter_io_set = {}
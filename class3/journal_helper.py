@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Append-only journal for saved poller state (router_cfg_times) - instead of rewriting the whole
+state after every poll only the changed values of each router are appended, and the state is
+rebuilt on restart by replaying the journal.
+
+Files:
+ * <journal> - one JSON record per line:  {"router": hostname, "set": [[key, value], ...]}
+ * <journal>.snap - snapshot of the full state (native format) written by compaction
+
+Every append is flushed and fsync'd so a crash loses at most the record being written - a partial
+last line (anything without its trailing newline, even if it parses) is dropped on replay.  Once
+the journal holds COMPACT_RECORDS records the full state is written to the snapshot (atomically)
+and the journal is truncated.  Replaying a record twice gives the same result, so a crash between
+the two steps is harmless.
+'''
+
+# Standard Imports
+from collections import OrderedDict
+import json
+import os
+import tempfile
+
+# Local Imports
+from serial_helper import get_serializer
+
+# Globals
+COMPACT_RECORDS = 10000  # Compact the journal after this many records
+SNAPSHOT_EXT = '.snap'
+SNAPSHOT_FORMAT = 'native'
+
+# Metadata
+__author__ = 'James R. Small'
+__contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
+__date__ = 'October 18, 2026'
+__version__ = '0.0.3'
+
+
+class StateJournal(object):
+    '''Append-only, crash-safe journal of per-router state changes'''
+
+    def __init__(self, path, compact_records=COMPACT_RECORDS, verbose=False):
+        self.path = path
+        self.snap_path = path + SNAPSHOT_EXT
+        self.compact_records = compact_records
+        self.verbose = verbose
+        # Last persisted state - deltas are computed against this
+        self.state = {}
+        self.records = 0
+        self.journal = None
+
+    def replay(self):
+        '''Rebuild and return the state from the snapshot and the journal.'''
+        self.state = {}
+        self.records = 0
+        if os.path.isfile(self.snap_path):
+            load_func, _ = get_serializer(SNAPSHOT_FORMAT)
+            with open(self.snap_path, 'rb') as file1:
+                self.state = load_func(file1)
+        good_offset = 0
+        if os.path.isfile(self.path):
+            with open(self.path, 'rb') as file1:
+                for line in file1:
+                    try:
+                        # An unterminated last line is partial even if it parses - the next
+                        # record would be appended straight onto it
+                        if not line.endswith('\n'):
+                            raise ValueError('Unterminated journal record')
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        # Partial record from a crash - everything after it is discarded
+                        if self.verbose:
+                            print 'Discarding partial journal record at offset {}'.format(
+                                good_offset)
+                        break
+                    good_offset += len(line)
+                    self.records += 1
+        self.journal = open(self.path, 'ab')
+        self.journal.truncate(good_offset)
+        if self.verbose:
+            print 'Replayed {} journal records for {} routers from {}'.format(self.records,
+                len(self.state), self.path)
+
+        # Return a copy so the caller's updates don't change the persisted state
+        return dict((router, OrderedDict(values)) for router, values in self.state.iteritems())
+
+    def _apply(self, record):
+        # Checked before anything is changed so an invalid record is skipped as a whole
+        if (not isinstance(record, dict) or not isinstance(record.get('router'), basestring) or
+                not isinstance(record.get('set'), list) or
+                not all(isinstance(pair, list) and len(pair) == 2 for pair in record['set'])):
+            raise ValueError('Invalid journal record')
+        # Keys and values come back from JSON as unicode - saved state uses str
+        router = str(record['router'])
+        values = self.state.setdefault(router, OrderedDict())
+        for key, value in record['set']:
+            values[str(key)] = str(value) if isinstance(value, basestring) else value
+
+    def record(self, router_cfg_times):
+        '''Append the changes in router_cfg_times since the last call, return the number of
+        records written.'''
+        if self.journal is None:
+            self.replay()
+        lines = []
+        for router, values in router_cfg_times.iteritems():
+            old_values = self.state.get(router, {})
+            delta = [[key, value] for key, value in values.iteritems()
+                     if key not in old_values or old_values[key] != value]
+            if delta:
+                lines.append(json.dumps({'router': router, 'set': delta}) + '\n')
+                self.state[router] = OrderedDict(values)
+        if lines:
+            self.journal.write(''.join(lines))
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.records += len(lines)
+        if self.records >= self.compact_records:
+            self.compact()
+
+        return len(lines)
+
+    def compact(self):
+        '''Write the full state to the snapshot and truncate the journal.'''
+        if self.verbose:
+            print 'Compacting {} journal records into {}...'.format(self.records, self.snap_path)
+        _, dump_func = get_serializer(SNAPSHOT_FORMAT)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.snap_path)))
+        with os.fdopen(fd, 'wb') as file1:
+            dump_func(self.state, file1)
+            file1.flush()
+            os.fsync(file1.fileno())
+        os.rename(tmp_path, self.snap_path)
+        if self.journal is not None:
+            self.journal.truncate(0)
+        self.records = 0
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
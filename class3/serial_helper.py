@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Serializer registry for saved poller state (router_cfg_times) - each file format maps to a
+load and a dump function so read_data/write_data don't hard-code them.
+
+Formats:
+ * native - Python pickle (cPickle when available, highest protocol)
+ * yaml - libyaml C loader/dumper (CSafeLoader/CSafeDumper) when available, pure Python otherwise
+ * json - JSON
+ * marshal - compact binary, fastest to load/dump; only readable by the same Python version
+
+Run this file directly to benchmark load/dump time and file size for each format.
+'''
+
+# Standard Imports
+import argparse
+from collections import OrderedDict
+import datetime
+import json
+import marshal
+import os
+import sys
+import tempfile
+import time
+import yaml
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Globals
+BENCH_ROUTERS = 10000
+YAML_BOF = '---\n'
+
+# Metadata
+__author__ = 'James R. Small'
+__contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
+__date__ = 'October 18, 2026'
+__version__ = '0.0.2'
+
+# Use libyaml if PyYAML was built with it
+try:
+    YamlLoader = yaml.CSafeLoader
+    _YamlDumperBase = yaml.CSafeDumper
+except AttributeError:
+    YamlLoader = yaml.SafeLoader
+    _YamlDumperBase = yaml.SafeDumper
+LEGACY_ORDEREDDICT_TAG = 'tag:yaml.org,2002:python/object/apply:collections.OrderedDict'
+
+
+class YamlDumper(_YamlDumperBase):
+    '''Safe dumper which writes OrderedDicts as plain mappings so the safe loader can read them
+    (registered here, not on the shared PyYAML dumper)'''
+    pass
+
+YamlDumper.add_representer(OrderedDict, lambda dumper, data: dumper.represent_dict(data.items()))
+
+class LegacyYamlLoader(yaml.SafeLoader):
+    '''Safe loader which also accepts the OrderedDict tags written by earlier versions - any
+    other python/ tag is still rejected'''
+    pass
+
+def _construct_ordereddict(loader, node):
+    if isinstance(node, yaml.SequenceNode):
+        args = loader.construct_sequence(node, deep=True)
+    else:
+        args = loader.construct_mapping(node, deep=True).get('args', [])
+    return OrderedDict(*args)
+
+LegacyYamlLoader.add_constructor(LEGACY_ORDEREDDICT_TAG, _construct_ordereddict)
+
+
+
+def _plain(data):
+    '''Convert OrderedDicts (which marshal doesn't support) to plain dictionaries.'''
+    if isinstance(data, dict):
+        return dict((key, _plain(value)) for key, value in data.iteritems())
+    elif isinstance(data, list):
+        return [_plain(value) for value in data]
+    return data
+
+def load_native(file1):
+    return pickle.load(file1)
+
+def dump_native(data, file1, **options):
+    pickle.dump(data, file1, pickle.HIGHEST_PROTOCOL)
+
+def load_yaml(file1):
+    try:
+        return yaml.load(file1, Loader=YamlLoader)
+    except yaml.constructor.ConstructorError:
+        # Files written by earlier versions contain python/object tags for OrderedDict
+        file1.seek(0)
+        return yaml.load(file1, Loader=LegacyYamlLoader)
+
+def dump_yaml(data, file1, **options):
+    file1.write(YAML_BOF)
+    yaml.dump(data, file1, Dumper=YamlDumper,
+              default_flow_style=options.get('default_flow_style', True))
+
+def load_json(file1):
+    return json.load(file1)
+
+def dump_json(data, file1, **options):
+    json.dump(data, file1)
+
+def load_marshal(file1):
+    return marshal.load(file1)
+
+def dump_marshal(data, file1, **options):
+    marshal.dump(_plain(data), file1)
+
+# Format:  (load function, dump function)
+SERIALIZERS = OrderedDict([('native', (load_native, dump_native)),
+                           ('yaml', (load_yaml, dump_yaml)),
+                           ('json', (load_json, dump_json)),
+                           ('marshal', (load_marshal, dump_marshal))])
+FORMATS = SERIALIZERS.keys()
+
+def register_serializer(file_format, load_func, dump_func):
+    '''Add (or replace) a file format - load_func(file) returns the data, dump_func(data, file,
+    **options) writes it.'''
+    SERIALIZERS[file_format] = (load_func, dump_func)
+    if file_format not in FORMATS:
+        FORMATS.append(file_format)
+
+def get_serializer(file_format):
+    '''Return (load function, dump function) for file_format.  Raises ValueError if
+    unsupported.'''
+    if file_format not in SERIALIZERS:
+        raise ValueError('Unsupported file format {}'.format(file_format))
+    return SERIALIZERS[file_format]
+
+####################################################################################################
+def bench_data(routers):
+    '''Generate router_cfg_times style state for the passed number of routers.'''
+    now = str(datetime.datetime.today())
+    data = {}
+    for num in xrange(routers):
+        data['pynet-rtr{}'.format(num)] = OrderedDict([
+            ('LAST_POLLTIME', now), ('CHECK_TIMES', True),
+            ('sysUpTime', str(1000000 + num)),
+            ('ccmHistoryRunningLastChanged', str(500000 + num)),
+            ('ccmHistoryRunningLastChanged_CHANGED', False),
+            ('ccmHistoryRunningLastSaved', str(400000 + num)),
+            ('ccmHistoryRunningLastSaved_CHANGED', False),
+            ('ccmHistoryStartupLastChanged', str(300000 + num))])
+    return data
+
+def benchmark(data, formats=None):
+    '''Return [(format, dump seconds, load seconds, file size in bytes), ...].'''
+    results = []
+    for file_format in formats or FORMATS:
+        load_func, dump_func = get_serializer(file_format)
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            start = time.time()
+            with open(path, 'wb') as file1:
+                dump_func(data, file1)
+            dumped = time.time()
+            with open(path, 'rb') as file1:
+                load_func(file1)
+            loaded = time.time()
+            results.append((file_format, dumped - start, loaded - dumped,
+                            os.path.getsize(path)))
+        finally:
+            os.remove(path)
+    return results
+
+def main(args):
+    '''Benchmark the registered serializers.'''
+    parser = argparse.ArgumentParser(
+        description='Compare load/dump time and file size of the poller state file formats')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-n', '--routers', type=int, default=BENCH_ROUTERS,
+        help='number of routers in generated state (default {})'.format(BENCH_ROUTERS))
+    parser.add_argument('-f', '--format', action='append', choices=FORMATS,
+        help='format to benchmark - may be repeated (default all)')
+    args = parser.parse_args()
+
+    print 'YAML using {}/{}'.format(YamlLoader.__name__, _YamlDumperBase.__name__)
+    print '{:<10}{:>12}{:>12}{:>14}'.format('Format', 'Dump (s)', 'Load (s)', 'Size (bytes)')
+    for file_format, dump_time, load_time, size in benchmark(bench_data(args.routers),
+                                                             args.format):
+        print '{:<10}{:>12.4f}{:>12.4f}{:>14}'.format(file_format, dump_time, load_time, size)
+
+# Call main and put all logic there per best practices.
+# No triple quotes here because not a function!
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]) or 0)
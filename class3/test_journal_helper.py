@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Regression tests for journal_helper - run with python -m unittest test_journal_helper
+'''
+
+# Standard Imports
+from collections import OrderedDict
+import os
+import shutil
+import tempfile
+import unittest
+
+# Local Imports
+from journal_helper import StateJournal
+
+__version__ = '0.0.1'
+
+
+class TestStateJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.workdir, 'state.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write_records(self, *states):
+        journal = StateJournal(self.path)
+        journal.replay()
+        for state in states:
+            journal.record(state)
+        journal.close()
+
+    def append(self, data):
+        with open(self.path, 'ab') as file1:
+            file1.write(data)
+
+    def test_replay(self):
+        self.write_records({'rtr1': OrderedDict([('a', '1'), ('b', 2)])},
+                           {'rtr1': OrderedDict([('a', '3'), ('b', 2)])})
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.replay(), {'rtr1': {'a': '3', 'b': 2}})
+        # Only the changed value was journaled the second time
+        self.assertEqual(journal.records, 2)
+        journal.close()
+
+    def test_unterminated_last_line(self):
+        self.write_records({'rtr1': {'a': '1'}})
+        # Parses as JSON but the newline never made it to disk
+        self.append('{"router": "rtr1", "set": [["a", "2"]]}')
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.replay(), {'rtr1': {'a': '1'}})
+        journal.record({'rtr1': {'a': '3'}})
+        journal.close()
+
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.replay(), {'rtr1': {'a': '3'}})
+        self.assertEqual(journal.records, 2)
+        journal.close()
+
+    def test_partial_last_line(self):
+        self.write_records({'rtr1': {'a': '1'}})
+        self.append('{"router": "rtr1", "se')
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.replay(), {'rtr1': {'a': '1'}})
+        journal.close()
+        self.assertTrue(open(self.path).read().endswith('\n'))
+
+    def test_non_dict_record(self):
+        self.write_records({'rtr1': {'a': '1'}})
+        for record in ('[1, 2]\n', '"text"\n', '{"router": "rtr1", "set": [["a"]]}\n'):
+            self.append(record)
+            journal = StateJournal(self.path)
+            self.assertEqual(journal.replay(), {'rtr1': {'a': '1'}})
+            journal.close()
+
+    def test_compact(self):
+        journal = StateJournal(self.path, compact_records=2)
+        journal.replay()
+        journal.record({'rtr1': {'a': '1'}})
+        journal.record({'rtr1': {'a': '2'}, 'rtr2': {'b': '1'}})
+        self.assertEqual(journal.records, 0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+        journal.close()
+
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.replay(), {'rtr1': {'a': '2'}, 'rtr2': {'b': '1'}})
+        journal.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,13 +4,15 @@
 
 # Imports
 import argparse
-from getpass import getpass
 import os
 import paramiko
 import socket
 import sys
 import time
-import yaml
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import check_input, Inventory, SSH_FIELDS
 
 # Globals
 READ_BUF = 5000
@@ -23,7 +25,7 @@ YAML_BOF = '---\n'
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'May 7, 2016'
-__version__ = '0.0.1'
+__version__ = '0.0.2'
 
 
 ####################################################################################################
@@ -79,44 +81,6 @@ class Router(object):
         return self.conn.recv(READ_BUF)
 
 
-def yaml_input(file1, verbose=False):
-    '''Read in router/switch authentication information from YAML file.'''
-    data1 = {}
-
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-    else:
-        # Don't output error if using default file name
-        if verbose and file1 != ROUTER_FILE:
-            print 'Error:  Invalid filename {}'.format(file1)
-
-    return data1
-
-def check_input(router1, ssh_port, verbose=False):
-    '''Validate router input data, prompt for anything missing.'''
-    if 'ADDRESS' not in router1:
-        router1['ADDRESS'] = raw_input('Router IPv4 Address: ')
-    if 'HOSTNAME' not in router1:
-        router1['HOSTNAME'] = router1['ADDRESS']
-    if 'USERNAME' not in router1:
-        router1['USERNAME'] = raw_input('Username for Router: ')
-    if 'PASSWORD' not in router1:
-        router1['PASSWORD'] = getpass()
-    if 'SSH_PORT' not in router1:
-        if verbose and not ssh_port:
-            print 'SSH_PORT not specified, using default of 22.  Override with -p option.'
-        if not ssh_port:
-            ssh_port = 22
-        router1['SSH_PORT'] = ssh_port
-    elif ssh_port:
-        if verbose:
-            print 'overriding SSH_PORT value ({}) with passed -p value ({})'.format(
-                router1['SSH_PORT'], ssh_port)
-        router1['SSH_PORT'] = ssh_port
-
-
-
 ####################################################################################################
 def main(args):
     '''Acquire necessary input options, call to retrieve version info from router,
@@ -135,8 +99,8 @@ def main(args):
     args = parser.parse_args()
 
     # Initialize data structures
-    myrouter = yaml_input(args.datafile, args.verbose)
-    check_input(myrouter, args.port, args.verbose)
+    myrouter = Inventory.load(args.datafile, ROUTER_FILE, verbose=args.verbose).first()
+    check_input(myrouter, SSH_FIELDS, 'SSH_PORT', args.port, args.verbose)
 
     if args.verbose:
         print 'Target router:  {}'.format(myrouter['HOSTNAME'])
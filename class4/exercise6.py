@@ -5,11 +5,13 @@
 # Imports
 import argparse
 import datetime
-from getpass import getpass
 import netmiko
 import os
 import sys
-import yaml
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import check_input, connect_args, iter_devices, NETMIKO_FIELDS
 
 # Globals
 READ_BUF = 5000
@@ -20,45 +22,7 @@ TIMEOUT = 5
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'May 7, 2016'
-__version__ = '0.0.1'
-
-
-####################################################################################################
-def yaml_input(file1, verbose=False):
-    '''Read in router/switch authentication information from YAML file.'''
-    data1 = {}
-
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-    else:
-        # Don't output error if using default file name
-        if verbose and file1 != ROUTER_FILE:
-            print 'Error:  Invalid filename {}'.format(file1)
-
-    return data1
-
-def check_input(router1, ssh_port, verbose=False):
-    '''Validate router input data, prompt for anything missing.'''
-    if 'device_type' not in router1:
-        router1['device_type'] = raw_input('Router device type: ')
-    if 'ip' not in router1:
-        router1['ip'] = raw_input('Router IPv4 Address: ')
-    if 'username' not in router1:
-        router1['username'] = raw_input('Username for Router: ')
-    if 'password' not in router1:
-        router1['password'] = getpass()
-    if 'port' not in router1:
-        if verbose and not ssh_port:
-            print 'Ssh port not specified, using default of 22.  Override with -p option.'
-        if not ssh_port:
-            ssh_port = 22
-        router1['port'] = ssh_port
-    elif ssh_port:
-        if verbose:
-            print 'overriding (ssh) port value ({}) with passed -p value ({})'.format(
-                router1['port'], ssh_port)
-        router1['port'] = ssh_port
+__version__ = '0.0.3'
 
 
 ####################################################################################################
@@ -74,6 +38,10 @@ def main(args):
     parser.add_argument('--version', action='version', version=__version__)
     parser.add_argument('-d', '--datafile', help='specify YAML file to read router info from',
                         default=ROUTER_FILE)
+    parser.add_argument('--host', action='append',
+                        help='only use this router (hostname or IP address) - may be repeated')
+    parser.add_argument('--group', action='append',
+                        help='only use routers in this group - may be repeated')
     parser.add_argument('-p', '--port', help='specify ssh port (default is 22)')
     parser.add_argument('--prompt', action='store_true',
                         help='prompt for router info (do not try to read in from file)',
@@ -84,17 +52,17 @@ def main(args):
 
     # Initialize data structures
     if not args.prompt:
-        myrouters = yaml_input(args.datafile, args.verbose)
-        if myrouters == {}:
-            myrouters = [{}]
+        myrouters = iter_devices(args.datafile, args.host, args.group, default_file=ROUTER_FILE,
+                                 verbose=args.verbose)
     else:
         myrouters = [{}]
-    for router in myrouters:
-        check_input(router, args.port, args.verbose)
     cmd = 'show arp'
 
+    # Routers are validated as they're read so the first connections start while the rest of the
+    # file is still being parsed
     for router in myrouters:
-        router_conn = netmiko.ConnectHandler(**router)
+        check_input(router, NETMIKO_FIELDS, 'port', args.port, args.verbose)
+        router_conn = netmiko.ConnectHandler(**connect_args(router))
         output = router_conn.send_command(cmd)
         print '{} on [{}:{}]:\n{}\n'.format(cmd, router['ip'], router['port'], output)
         router_conn.disconnect()
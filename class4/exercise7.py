@@ -4,11 +4,13 @@
 
 # Imports
 import argparse
-from getpass import getpass
 import netmiko
 import os
 import sys
-import yaml
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import check_input, connect_args, Inventory, NETMIKO_FIELDS
 
 # Globals
 READ_BUF = 5000
@@ -19,45 +21,7 @@ TIMEOUT = 5
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'May 7, 2016'
-__version__ = '0.0.1'
-
-
-####################################################################################################
-def yaml_input(file1, verbose=False):
-    '''Read in router/switch authentication information from YAML file.'''
-    data1 = {}
-
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-    else:
-        # Don't output error if using default file name
-        if verbose and file1 != ROUTER_FILE:
-            print 'Error:  Invalid filename {}'.format(file1)
-
-    return data1
-
-def check_input(router1, ssh_port, verbose=False):
-    '''Validate router input data, prompt for anything missing.'''
-    if 'device_type' not in router1:
-        router1['device_type'] = raw_input('Router device type: ')
-    if 'ip' not in router1:
-        router1['ip'] = raw_input('Router IPv4 Address: ')
-    if 'username' not in router1:
-        router1['username'] = raw_input('Username for Router: ')
-    if 'password' not in router1:
-        router1['password'] = getpass()
-    if 'port' not in router1:
-        if verbose and not ssh_port:
-            print 'Ssh port not specified, using default of 22.  Override with -p option.'
-        if not ssh_port:
-            ssh_port = 22
-        router1['port'] = ssh_port
-    elif ssh_port:
-        if verbose:
-            print 'overriding (ssh) port value ({}) with passed -p value ({})'.format(
-                router1['port'], ssh_port)
-        router1['port'] = ssh_port
+__version__ = '0.0.2'
 
 
 ####################################################################################################
@@ -79,13 +43,13 @@ def main(args):
 
     # Initialize data structures
     if not args.prompt:
-        myrouter = yaml_input(args.datafile, args.verbose)
+        myrouter = Inventory.load(args.datafile, ROUTER_FILE, verbose=args.verbose).first()
     else:
         myrouter = {}
-    check_input(myrouter, args.port, args.verbose)
+    check_input(myrouter, NETMIKO_FIELDS, 'port', args.port, args.verbose)
 
     try:
-        myrouter_conn = netmiko.ConnectHandler(**myrouter)
+        myrouter_conn = netmiko.ConnectHandler(**connect_args(myrouter))
     except netmiko.ssh_exception.NetMikoTimeoutException:
         sys.exit('Error:  Connection to {}:{} timed out...'.format(myrouter['ip'],
             myrouter['port']))
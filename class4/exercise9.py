@@ -7,12 +7,16 @@ This program uses multiprocessing for accessing routers in parallel.'''
 # Imports
 import argparse
 import datetime
-from getpass import getpass
 import multiprocessing
 import netmiko
 import os
 import sys
-import yaml
+import time
+
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from inventory_helper import check_input, connect_args, iter_devices, NETMIKO_FIELDS
+from results_helper import format_result, result_record, ResultWriter, STDOUT
 
 # Globals
 READ_BUF = 5000
@@ -23,67 +27,41 @@ TIMEOUT = 5
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'May 9, 2016'
-__version__ = '0.0.1'
+__version__ = '0.0.5'
 
 
 ####################################################################################################
-def yaml_input(file1, verbose=False):
-    '''Read in router/switch authentication information from YAML file.'''
-    data1 = {}
-
-    if os.path.isfile(file1):
-        with open(file1) as fh1:
-            data1 = yaml.load(fh1)
-    else:
-        # Don't output error if using default file name
-        if verbose and file1 != ROUTER_FILE:
-            print 'Error:  Invalid filename {}'.format(file1)
-
-    return data1
-
-def check_input(router1, ssh_port, verbose=False):
-    '''Validate router input data, prompt for anything missing.'''
-    if 'device_type' not in router1:
-        router1['device_type'] = raw_input('Router device type: ')
-    if 'ip' not in router1:
-        router1['ip'] = raw_input('Router IPv4 Address: ')
-    if 'username' not in router1:
-        router1['username'] = raw_input('Username for Router: ')
-    if 'password' not in router1:
-        router1['password'] = getpass()
-    if 'port' not in router1:
-        if verbose and not ssh_port:
-            print 'Ssh port not specified, using default of 22.  Override with -p option.'
-        if not ssh_port:
-            ssh_port = 22
-        router1['port'] = ssh_port
-    elif ssh_port:
-        if verbose:
-            print 'overriding (ssh) port value ({}) with passed -p value ({})'.format(
-                router1['port'], ssh_port)
-        router1['port'] = ssh_port
-
 def rcmd(routerx, cmd, outq):
-    '''Execute passed command on remote router and return result in passed queue'''
+    '''Execute passed command on remote router and return result record in passed queue'''
+    device = '{}:{}'.format(routerx['ip'], routerx['port'])
+    start = time.time()
+    connected = None
+    # Any failure must still put a record - main waits for one per router
     try:
-        router_conn = netmiko.ConnectHandler(**routerx)
-        output = None
-        success = True
+        router_conn = netmiko.ConnectHandler(**connect_args(routerx))
+        connected = time.time()
+        try:
+            output = router_conn.send_command(cmd)
+        finally:
+            router_conn.disconnect()
     except netmiko.ssh_exception.NetMikoTimeoutException:
-        output = 'Error:  Connection to {}:{} timed out...\n'.format(routerx['ip'],
-                 routerx['port'])
-        success = False
+        error = 'Connection to {} timed out...'.format(device)
     except netmiko.ssh_exception.NetMikoAuthenticationException:
-        output = 'Error:  Authentication to {}:{} failed - check username/password\n'.format(
-                 routerx['ip'], routerx['port'])
-        success = False
-
-    if not output:
-        cmd_out = router_conn.send_command(cmd)
-        output = '{} on [{}:{}]:\n{}\n'.format(cmd, routerx['ip'], routerx['port'], cmd_out)
-        router_conn.disconnect()
+        error = 'Authentication to {} failed - check username/password'.format(device)
+    except Exception as err:
+        error = 'Command on {} failed:  {}'.format(device, err)
+    else:
+        error = None
+    if error:
+        failed = time.time()
+        if connected is None:
+            connected = failed
+        outq.put(result_record(device, cmd, start, connected - start, failed - connected,
+                               error=error))
+        return
 
-    outq.put((success, output))
+    outq.put(result_record(device, cmd, start, connected - start, time.time() - connected,
+                           output))
 
 
 ####################################################################################################
@@ -92,13 +70,16 @@ def main(args):
     process per CLI args.'''
     # Benchmark
     prog_start = datetime.datetime.now()
-    print 'Program start time:  {}\n'.format(prog_start)
 
     parser = argparse.ArgumentParser(
         description='Execute show arp on specified routers concurrently')
     parser.add_argument('--version', action='version', version=__version__)
     parser.add_argument('-d', '--datafile', help='specify YAML file to read router info from',
                         default=ROUTER_FILE)
+    parser.add_argument('--host', action='append',
+                        help='only use this router (hostname or IP address) - may be repeated')
+    parser.add_argument('--group', action='append',
+                        help='only use routers in this group - may be repeated')
     parser.add_argument('-p', '--port', help='specify ssh port (default is 22)')
     parser.add_argument('--prompt', action='store_true',
                         help='prompt for router info (do not try to read in from file)',
@@ -107,53 +88,63 @@ def main(args):
                         default=False)
     parser.add_argument('-w', '--wait', action='store_true',
                         help="don't display results until all routers processed", default=False)
+    parser.add_argument('-o', '--output',
+                        help='write results as NDJSON - one JSON record per router as soon as it '
+                             'finishes - to this file ("-" for stdout)')
     args = parser.parse_args()
+    # Keep stdout for the results if they're written there
+    bench_out = sys.stderr if args.output == STDOUT else sys.stdout
+    print >>bench_out, 'Program start time:  {}\n'.format(prog_start)
 
     # Initialize data structures
     if not args.prompt:
-        myrouters = yaml_input(args.datafile, args.verbose)
-        if myrouters == {}:
-            myrouters = [{}]
+        myrouters = iter_devices(args.datafile, args.host, args.group, default_file=ROUTER_FILE,
+                                 verbose=args.verbose)
     else:
         myrouters = [{}]
-    for router in myrouters:
-        check_input(router, args.port, args.verbose)
     cmd = 'show arp'
     resultq = multiprocessing.Queue()
     processes = []
 
+    # Routers are validated as they're read so the first processes start while the rest of the
+    # file is still being parsed
     for router in myrouters:
+        check_input(router, NETMIKO_FIELDS, 'port', args.port, args.verbose)
         process = multiprocessing.Process(target=rcmd, args=(router, cmd, resultq))
         processes.append(process)
         process.start()
 
     # Believe preferable to print results as they are available versus waiting for everyone, so
     # this is default behavior which can be overridden by -w
-    if args.wait:
+    if args.output:
+        # Each record is written (buffered) as it arrives - nothing is kept in memory
+        with ResultWriter(args.output) as writer:
+            writer.write_from(resultq, len(processes))
+    elif args.wait:
         for process in processes:
             process.join()
 
-        worked = 'Succeeded:\n'
-        failed = 'Failed:\n'
+        worked = ['Succeeded:\n']
+        failed = ['Failed:\n']
         for process in processes:
-            status, result = resultq.get()
-            if status:
-                worked += result + '\n'
+            record = resultq.get()
+            if record['success']:
+                worked.append(format_result(record) + '\n')
             else:
-                failed += result
-        print '{}\n{}'.format(worked, failed)
+                failed.append(format_result(record))
+        print '{}\n{}'.format(''.join(worked), ''.join(failed))
     else:
         for process in processes:
-            status, result = resultq.get()
-            if not status:
+            record = resultq.get()
+            if not record['success']:
                 print 'Failed -',
-            print result
+            print format_result(record)
 
     # Benchmark
     prog_end = datetime.datetime.now()
-    print 'Program start time:  {}'.format(prog_end)
+    print >>bench_out, 'Program start time:  {}'.format(prog_end)
     prog_time = prog_end - prog_start
-    print 'Ellapsed time:  {}'.format(prog_time)
+    print >>bench_out, 'Ellapsed time:  {}'.format(prog_time)
 
 
 # Call main and put all logic there per best practices.
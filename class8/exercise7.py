@@ -13,15 +13,22 @@
 
 # Imports
 # Stdlib
+import argparse
 from datetime import datetime
+import os
 import multiprocessing
 import sys
+import time
 
 # 3rd Party
 import django
 from netmiko import ConnectHandler
 from net_system.models import NetworkDevice
 
+# Local Imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from results_helper import result_record, ResultWriter, STDOUT
+
 # Globals
 # Note:  Consider using function/class/method default parameters instead of global constants where
 # it makes sense
@@ -31,25 +38,52 @@ from net_system.models import NetworkDevice
 __author__ = 'James R. Small'
 __contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
 __date__ = 'June 19, 2016'
-__version__ = '0.0.1'
+__version__ = '0.0.4'
 
 
 def rcmd(cmd, ndev, q):
-    '''Execute cmd on ndev, support concurrency.'''
-    conn = ConnectHandler(device_type=ndev.device_type, ip=ndev.ip_address,
-                          username=ndev.credentials.username,
-                          password=ndev.credentials.password, port=ndev.port)
-    result = conn.send_command_expect(cmd)
-
-    dict1 = {}
-    mydev = ndev.device_name
-    output = '\n{} on {}:\n'.format(cmd, mydev)
-    output += '=' * 80 + '\n{}\n'.format(result) + '=' * 80
-    dict1[mydev] = output
-    q.put(dict1)
+    '''Execute cmd on ndev, support concurrency - puts the device's result record on q.'''
+    start = time.time()
+    connected = None
+    # Any failure must still produce exactly one record - the manager waits for one per device
+    try:
+        conn = ConnectHandler(device_type=ndev.device_type, ip=ndev.ip_address,
+                              username=ndev.credentials.username,
+                              password=ndev.credentials.password, port=ndev.port)
+        connected = time.time()
+        try:
+            result = conn.send_command_expect(cmd)
+        finally:
+            conn.disconnect()
+    except Exception as err:
+        failed = time.time()
+        if connected is None:
+            connected = failed
+        q.put(result_record(ndev.device_name, cmd, start, connected - start, failed - connected,
+                            error=str(err)))
+        return
+
+    q.put(result_record(ndev.device_name, cmd, start, connected - start, time.time() - connected,
+                        result))
+
+def format_output(record):
+    '''Format result record for display.'''
+    if not record['success']:
+        return '\nError on {}:  {}'.format(record['device'], record['error'])
+    output = '\n{} on {}:\n'.format(record['command'], record['device'])
+    output += '=' * 80 + '\n{}\n'.format(record['output']) + '=' * 80
+    return output
 
 def main(args):
     '''Setup database access and base functionality.'''
+    parser = argparse.ArgumentParser(
+        description='Execute show version on all devices in the database concurrently')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-o', '--output',
+                        help='write results as NDJSON - one JSON record per device as soon as it '
+                             'finishes - to this file ("-" for stdout)')
+    args = parser.parse_args()
+
     django.setup()
     start_time = datetime.now()
     net_devs = NetworkDevice.objects.all()
@@ -63,18 +97,27 @@ def main(args):
         worker.start()
         workers.append(worker)
 
-    for worker in workers:
-        print worker
-        # Wait for worker to exit in manager
-        worker.join()
+    if args.output:
+        # Write each device's record as it finishes - nothing is collected in memory
+        with ResultWriter(args.output) as writer:
+            writer.write_from(q, len(workers))
+        for worker in workers:
+            worker.join()
+    else:
+        for worker in workers:
+            print worker
+            # Wait for worker to exit in manager
+            worker.join()
 
-    while not q.empty():
-        dict1 = q.get()
-        result_dict[dict1.keys()[0]] = dict1.values()[0]
-    for ndev in net_devs:
-        print result_dict[ndev.device_name]
+        while not q.empty():
+            record = q.get()
+            result_dict[record['device']] = record
+        for ndev in net_devs:
+            print format_output(result_dict[ndev.device_name])
     end_time = datetime.now()
-    print '\nEllapsed time:  {}\n'.format(end_time - start_time)
+    # Keep stdout for the results if they're written there
+    bench_out = sys.stderr if args.output == STDOUT else sys.stdout
+    print >>bench_out, '\nEllapsed time:  {}\n'.format(end_time - start_time)
 
 # Call main and put all logic there per best practices.
 # No triple quotes here because not a function!
@@ -0,0 +1,830 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Local stand-in for the lab routers - emulates IOS login, prompts, terminal length/paging, config
+mode and canned show command output over telnet and (if paramiko is installed) SSH, so the session
+code in class2 and class4 can be run and benchmarked without the real routers
+
+Each emulated device listens on its own port (TELNET_PORT + n / SSH_PORT + n), or with
+--by-address on its own loopback address (127.0.0.1 + n - Linux routes all of 127/8 to lo) with
+the same ports for every device.  All telnet devices are served from one poll loop so thousands
+can run on one box; SSH sessions are handed to paramiko, which uses a thread per connection.
+
+Conditions which can be injected:
+ * --latency - seconds before each response (and echo) is sent
+ * --bandwidth - bytes/second per session
+ * --fail-rate - fraction of sessions dropped after a random number (0-3) of lines
+ * --auth-fail-rate - fraction of logins rejected even with the right password
+ * --hang-rate - fraction of commands never answered
+ * --down-rate - fraction of devices not listening at all
+
+--inventory writes the devices out in the inventory format the class scripts read, e.g.:
+    ./fake_device.py -n 500 -i fake-routers.yaml --latency 0.05
+    class2/telnet_engine.py -f fake-routers.yaml
+'''
+
+# Imports
+import argparse
+from collections import deque
+import random
+import re
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+import yaml
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+# Globals
+ADDRESS = '127.0.0.1'
+BURST = 0.05  # Seconds worth of bandwidth which may be sent at once
+CONFIG = 'config'
+DEVICES = 10
+DROP_LINES = 3  # Sessions picked by --fail-rate drop after 0 to this many lines
+EXEC = 'exec'
+HOSTNAME = 'fake-rtr{}'
+LOGIN_TRIES = 3
+MORE = ' --More-- '
+PAGE_LINES = 24  # IOS default terminal length
+PASSWORD = 'password'
+PASSWORD_STATE = 'password'
+READ_BUF = 65536
+SSH_PORT = 20000  # Ports stay below Linux's ephemeral range (32768+)
+SSH_TIMEOUT = 10
+TECH_LINES = 20000  # Lines of show tech-support - something large for streaming tests
+TELNET_OPTIONS = '\xff\xfb\x01\xff\xfb\x03'  # IAC WILL ECHO, IAC WILL SUPPRESS-GO-AHEAD
+TELNET_PORT = 10000
+USERNAME = 'pyclass'
+USERNAME_STATE = 'username'
+
+SHOW_ARP = '''Protocol  Address          Age (min)  Hardware Addr   Type   Interface
+Internet  {address:<16} -          {mac}  ARPA   FastEthernet4
+Internet  10.220.88.1           5   001f.9e92.16fb  ARPA   FastEthernet4'''
+SHOW_IP_INT_BRIEF = '''Interface                  IP-Address      OK? Method Status                Protocol
+FastEthernet0              unassigned      YES unset  down                  down
+FastEthernet1              unassigned      YES unset  down                  down
+FastEthernet2              unassigned      YES unset  down                  down
+FastEthernet3              unassigned      YES unset  down                  down
+FastEthernet4              {address:<15} YES NVRAM  up                    up
+Vlan1                      unassigned      YES unset  down                  down'''
+SHOW_VERSION = '''Cisco IOS Software, C880 Software (C880DATA-UNIVERSALK9-M), Version 15.4(2)T1, RELEASE SOFTWARE (fc3)
+Technical Support: http://www.cisco.com/techsupport
+Copyright (c) 1986-2014 by Cisco Systems, Inc.
+Compiled Thu 26-Jun-14 14:15 by prod_rel_team
+
+ROM: System Bootstrap, Version 12.4(22r)YB5, RELEASE SOFTWARE (fc1)
+
+{hostname} uptime is {uptime} minutes
+System returned to ROM by power-on
+System image file is "flash:c880data-universalk9-mz.154-2.T1.bin"
+Last reload type: Normal Reload
+Last reload reason: power-on
+
+Cisco 881 (MPC8300) processor (revision 1.0) with 236544K/25600K bytes of memory.
+Processor board ID FTX{serial:07d}
+
+5 FastEthernet interfaces
+1 Virtual Private Network (VPN) Module
+256K bytes of non-volatile configuration memory.
+126000K bytes of ATA CompactFlash (Read/Write)
+
+License Info:
+
+License UDI:
+
+-------------------------------------------------
+Device#   PID                   SN
+-------------------------------------------------
+*0        CISCO881-SEC-K9       FTX{serial:07d}
+
+Configuration register is 0x2102'''
+STARTUP_CONFIG = '''!
+version 15.4
+service timestamps debug datetime msec
+service timestamps log datetime msec
+no service password-encryption
+!
+hostname {hostname}
+!
+boot-start-marker
+boot-end-marker
+!
+logging buffered 8192
+!
+username {username} privilege 15 secret 5 $1$fake$removed
+!
+interface FastEthernet4
+ ip address {address} 255.255.255.0
+ duplex auto
+ speed auto
+!
+line vty 0 4
+ login local
+ transport input telnet ssh
+!
+end'''
+
+# Command keywords (any unambiguous abbreviation is accepted) and the CLISession method run
+EXEC_COMMANDS = [('configure terminal', 'configure'),
+                 ('disable', 'disable'),
+                 ('enable', 'enable'),
+                 ('end', 'noop'),
+                 ('exit', 'logout'),
+                 ('logout', 'logout'),
+                 ('quit', 'logout'),
+                 ('show arp', 'show_arp'),
+                 ('show clock', 'show_clock'),
+                 ('show ip interface brief', 'show_ip_int_brief'),
+                 ('show running-config', 'show_running_config'),
+                 ('show tech-support', 'show_tech_support'),
+                 ('show version', 'show_version'),
+                 ('terminal length', 'terminal_length'),
+                 ('terminal width', 'noop')]
+CONFIG_COMMANDS = [('do', 'config_do'),
+                   ('end', 'config_end'),
+                   ('exit', 'config_end')]
+PIPE_COMMANDS = ['begin', 'exclude', 'include']
+
+# Metadata
+__author__ = 'James R. Small'
+__contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
+__date__ = 'October 18, 2026'
+__version__ = '0.0.1'
+
+
+####################################################################################################
+class Conditions(object):
+    '''Network conditions and faults injected into every emulated device'''
+
+    def __init__(self, latency=0.0, bandwidth=0, fail_rate=0.0, auth_fail_rate=0.0,
+                 hang_rate=0.0, down_rate=0.0, tech_lines=TECH_LINES, seed=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.fail_rate = fail_rate
+        self.auth_fail_rate = auth_fail_rate
+        self.hang_rate = hang_rate
+        self.down_rate = down_rate
+        self.tech_lines = tech_lines
+        self.rng = random.Random(seed)
+
+class FakeDevice(object):
+    '''One emulated router - name, addresses, credentials and running config'''
+
+    def __init__(self, index, address, telnet_port, ssh_port, username=USERNAME,
+                 password=PASSWORD):
+        self.index = index
+        self.hostname = HOSTNAME.format(index + 1)
+        self.address = address
+        self.telnet_port = telnet_port
+        self.ssh_port = ssh_port
+        self.username = username
+        self.password = password
+        self.mac = '0000.0c{:02x}.{:04x}'.format((index >> 16) & 0xff, index & 0xffff)
+        self.booted = time.time()
+        self.config = STARTUP_CONFIG.format(hostname=self.hostname, address=address,
+                                            username=username).split('\n')
+        self.down = False
+
+    def configure(self, words):
+        '''Apply a global configuration command - "no ..." removes matching lines, otherwise a
+        line with the same keywords (all but the last word) is replaced.'''
+        if words[0] == 'no':
+            prefix = ' '.join(words[1:])
+            self.config = [line for line in self.config if not line.startswith(prefix)]
+            return
+        line = ' '.join(words)
+        keywords = ' '.join(words[:-1]) + ' ' if len(words) > 1 else line
+        for index, old in enumerate(self.config):
+            if old == line or (len(words) > 1 and old.startswith(keywords)):
+                self.config[index] = line
+                return
+        # Before the closing !/end
+        self.config.insert(len(self.config) - 2, line)
+
+def match_command(words, commands):
+    '''Return (method name, remaining words) for the command words - IOS style abbreviations
+    ("sh ip int br") are accepted as long as they're unambiguous.  The method name is None if
+    nothing or more than one command matches.'''
+    found = []
+    for name, method in commands:
+        keywords = name.split()
+        if len(words) >= len(keywords) and all(
+                keyword.startswith(word) for word, keyword in zip(words, keywords)):
+            if words[:len(keywords)] == keywords:
+                return method, words[len(keywords):]
+            found.append((method, words[len(keywords):]))
+    if len(found) == 1:
+        return found[0]
+    return None, words
+
+class CLISession(object):
+    '''IOS command line for one connection - feed() takes what the client sent and returns what
+    the device sends back.  Shared by the telnet and SSH servers.'''
+
+    def __init__(self, device, conditions, login=True):
+        self.device = device
+        self.conditions = conditions
+        self.state = USERNAME_STATE if login else EXEC
+        self.privileged = True
+        self.page_lines = PAGE_LINES
+        self.more = []  # Output lines still to be paged through
+        self.line = ''
+        self.after_cr = False
+        self.username = None
+        self.login_failures = 0
+        self.lines = 0
+        self.closed = False
+        self.hung = False
+        self.drop_after = None
+        if conditions.rng.random() < conditions.fail_rate:
+            self.drop_after = conditions.rng.randint(0, DROP_LINES)
+
+    def prompt(self):
+        mode = '(config)' if self.state == CONFIG else ''
+        return '{}{}{}'.format(self.device.hostname, mode, '#' if self.privileged else '>')
+
+    def banner(self):
+        '''Return what the device sends when the session starts.'''
+        if self.state == USERNAME_STATE:
+            return '\r\n\r\nUser Access Verification\r\n\r\nUsername: '
+        return '\r\n' + self.prompt()
+
+    def feed(self, data):
+        '''Process client input and return the device's response (echo included).'''
+        out = []
+        for char in data:
+            if self.closed or self.hung:
+                break
+            if char == '\0' or (char == '\n' and self.after_cr):
+                pass
+            elif self.more:
+                out.append(self._page(char))
+            elif char in '\r\n':
+                out.append('\r\n')
+                out.append(self._enter(self.line))
+                self.line = ''
+            elif char in '\x08\x7f':
+                if self.line:
+                    self.line = self.line[:-1]
+                    if self.state != PASSWORD_STATE:
+                        out.append('\x08 \x08')
+            else:
+                self.line += char
+                if self.state != PASSWORD_STATE:
+                    out.append(char)
+            self.after_cr = char == '\r'
+        return ''.join(out)
+
+    def _enter(self, line):
+        '''Handle a complete line and return the response.'''
+        self.lines += 1
+        if self.drop_after is not None and self.lines > self.drop_after:
+            self.closed = True
+            return ''
+        if self.state == USERNAME_STATE:
+            self.username = line
+            self.state = PASSWORD_STATE
+            return 'Password: '
+        if self.state == PASSWORD_STATE:
+            if (self.username == self.device.username and line == self.device.password and
+                    self.conditions.rng.random() >= self.conditions.auth_fail_rate):
+                self.state = EXEC
+                return self.prompt()
+            self.login_failures += 1
+            if self.login_failures >= LOGIN_TRIES:
+                self.closed = True
+                return '% Authentication failed\r\n'
+            self.state = USERNAME_STATE
+            return '% Authentication failed\r\n\r\nUsername: '
+        if self.conditions.rng.random() < self.conditions.hang_rate:
+            self.hung = True
+            return ''
+        return self.execute(line.strip())
+
+    def execute(self, line):
+        '''Run a command line (with an optional | begin/exclude/include filter) and return the
+        output followed by the prompt.'''
+        if not line:
+            return self.prompt()
+        command, _, pipe = line.partition('|')
+        words = command.split()
+        if self.state == CONFIG:
+            method, args = match_command(words, CONFIG_COMMANDS)
+            if not method:
+                self.device.configure(words)
+                return self.prompt()
+        else:
+            method, args = match_command(words, EXEC_COMMANDS)
+        if not method:
+            return self._respond(self._invalid(line, words))
+
+        lines = getattr(self, method)(args)
+        if self.closed:
+            return ''
+        if pipe:
+            lines = self._filter(lines, pipe, line)
+        return self._respond(lines)
+
+    def _invalid(self, line, words):
+        candidates = [name for name, _ in EXEC_COMMANDS if words and all(
+            keyword.startswith(word) for word, keyword in zip(words, name.split()))]
+        if len(candidates) > 1:
+            return ['% Ambiguous command:  "{}"'.format(line)]
+        return [' ' * len(self.prompt()) + '^', "% Invalid input detected at '^' marker.", '']
+
+    def _filter(self, lines, pipe, line):
+        words = pipe.split(None, 1)
+        if len(words) < 2:
+            return self._invalid(line, words)
+        method, _ = match_command(words[:1], [(name, name) for name in PIPE_COMMANDS])
+        if not method:
+            return self._invalid(line, words)
+        try:
+            regex = re.compile(words[1].strip())
+        except re.error:
+            return self._invalid(line, words)
+        if method == 'include':
+            return [text for text in lines if regex.search(text)]
+        if method == 'exclude':
+            return [text for text in lines if not regex.search(text)]
+        for index, text in enumerate(lines):
+            if regex.search(text):
+                return lines[index:]
+        return []
+
+    def _respond(self, lines):
+        '''Return output lines and the prompt - paged if longer than the terminal length.'''
+        if self.page_lines and len(lines) >= self.page_lines:
+            self.more = lines[self.page_lines - 1:]
+            return ''.join(text + '\r\n' for text in lines[:self.page_lines - 1]) + MORE
+        return ''.join(text + '\r\n' for text in lines) + self.prompt()
+
+    def _page(self, char):
+        '''Handle a key pressed at --More-- - space for the next page, q to stop, anything else
+        for one more line.'''
+        erase = '\r' + ' ' * len(MORE) + '\r'
+        if char in 'qQ':
+            self.more = []
+            return erase + self.prompt()
+        count = self.page_lines - 1 if char == ' ' else 1
+        lines, self.more = self.more[:count], self.more[count:]
+        output = erase + ''.join(text + '\r\n' for text in lines)
+        return output + (MORE if self.more else self.prompt())
+
+    # Commands - each returns a list of output lines
+    def configure(self, args):
+        self.state = CONFIG
+        return ['Enter configuration commands, one per line.  End with CNTL/Z.']
+
+    def config_do(self, args):
+        self.state = EXEC
+        method, args = match_command(args, EXEC_COMMANDS)
+        lines = getattr(self, method)(args) if method else self._invalid(' '.join(args), args)
+        self.state = CONFIG
+        return lines
+
+    def config_end(self, args):
+        self.state = EXEC
+        return []
+
+    def disable(self, args):
+        self.privileged = False
+        return []
+
+    def enable(self, args):
+        self.privileged = True
+        return []
+
+    def logout(self, args):
+        self.closed = True
+        return []
+
+    def noop(self, args):
+        return []
+
+    def show_arp(self, args):
+        return SHOW_ARP.format(address=self.device.address, mac=self.device.mac).split('\n')
+
+    def show_clock(self, args):
+        return ['*' + time.strftime('%H:%M:%S.000 UTC %a %b %d %Y', time.gmtime())]
+
+    def show_ip_int_brief(self, args):
+        return SHOW_IP_INT_BRIEF.format(address=self.device.address).split('\n')
+
+    def show_running_config(self, args):
+        config = self.device.config
+        size = sum(len(line) + 1 for line in config)
+        return ['Building configuration...', '',
+                'Current configuration : {} bytes'.format(size)] + config
+
+    def show_tech_support(self, args):
+        lines = ['', '------------------ show version ------------------', '']
+        lines += self.show_version(args)
+        lines += ['', '------------------ show running-config ------------------', '']
+        lines += self.show_running_config(args)
+        lines += ['', '------------------ show interfaces ------------------', '']
+        for index in xrange(self.conditions.tech_lines):
+            lines.append('     {} packets input, {} bytes, 0 no buffer'.format(index, index * 64))
+        return lines
+
+    def show_version(self, args):
+        uptime = int(time.time() - self.device.booted) // 60
+        return SHOW_VERSION.format(hostname=self.device.hostname, uptime=uptime,
+                                   serial=self.device.index).split('\n')
+
+    def terminal_length(self, args):
+        if len(args) != 1 or not args[0].isdigit():
+            return self._invalid('terminal length ' + ' '.join(args), args)
+        self.page_lines = int(args[0])
+        return []
+
+class TelnetConnection(object):
+    '''One client connection to an emulated device's telnet port'''
+
+    def __init__(self, sock, session):
+        self.sock = sock
+        self.session = session
+        self.queue = deque()  # [time it may be sent, data]
+        self.partial_iac = ''
+        self.tokens = 0.0
+        self.token_time = time.time()
+
+    def strip_iac(self, data):
+        '''Remove telnet commands - the client's answers to TELNET_OPTIONS aren't needed.'''
+        data = self.partial_iac + data
+        self.partial_iac = ''
+        text = []
+        pos = 0
+        while True:
+            iac = data.find('\xff', pos)
+            if iac < 0:
+                text.append(data[pos:])
+                break
+            text.append(data[pos:iac])
+            # IAC IAC is a 255 data byte, IAC SB ... IAC SE subnegotiation, IAC DO/DONT/WILL/WONT
+            # option three bytes and anything else two
+            if iac + 1 >= len(data):
+                self.partial_iac = data[iac:]
+                break
+            cmd = data[iac + 1]
+            if cmd == '\xff':
+                text.append(cmd)
+                end = iac + 2
+            elif cmd == '\xfa':
+                end = data.find('\xff\xf0', iac + 2)
+                end = end + 2 if end >= 0 else -1
+            elif cmd in '\xfb\xfc\xfd\xfe':
+                end = iac + 3 if iac + 2 < len(data) else -1
+            else:
+                end = iac + 2
+            if end < 0:
+                self.partial_iac = data[iac:]
+                break
+            pos = end
+        return ''.join(text)
+
+class FakeNetwork(object):
+    '''Serves the emulated devices - telnet from a single poll loop, SSH through paramiko'''
+
+    def __init__(self, devices, conditions, ssh=False, host_key=None, verbose=False):
+        self.devices = devices
+        self.conditions = conditions
+        self.ssh = ssh
+        self.host_key = host_key
+        self.verbose = verbose
+        self.listeners = {}  # fd:  (socket, device, protocol)
+        self.conns = {}  # fd:  TelnetConnection
+        self.pending = set()  # TelnetConnections with queued output
+        self.connections = 0
+        if hasattr(select, 'epoll'):
+            self.poller = select.epoll()
+            self.poll_scale = 1
+        else:
+            self.poller = select.poll()
+            self.poll_scale = 1000
+
+    def listen(self):
+        '''Open the listening sockets for all devices which aren't down.'''
+        for device in self.devices:
+            device.down = self.conditions.rng.random() < self.conditions.down_rate
+            if device.down:
+                continue
+            ports = [(device.telnet_port, 'telnet')]
+            if self.ssh:
+                ports.append((device.ssh_port, 'ssh'))
+            for port, protocol in ports:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                try:
+                    sock.bind((device.address, port))
+                except socket.error as err:
+                    sys.exit('Error:  Unable to listen on {}:{} - {}'.format(device.address, port,
+                                                                           err))
+                sock.listen(128)
+                sock.setblocking(0)
+                self.listeners[sock.fileno()] = (sock, device, protocol)
+                self.poller.register(sock.fileno(), select.POLLIN)
+
+    def serve_forever(self):
+        while True:
+            now = time.time()
+            timeout = self._flush_pending(now)
+            for fd, event in self.poller.poll(timeout * self.poll_scale):
+                if fd in self.listeners:
+                    self._accept(*self.listeners[fd])
+                elif fd in self.conns:
+                    self._read(self.conns[fd])
+
+    def _accept(self, sock, device, protocol):
+        while True:
+            try:
+                client, peer = sock.accept()
+            except socket.error:
+                return
+            self.connections += 1
+            if self.verbose:
+                print '{} connection to {} from {}:{}'.format(protocol, device.hostname, *peer)
+            if protocol == 'ssh':
+                thread = threading.Thread(target=self._ssh_session, args=(client, device))
+                thread.daemon = True
+                thread.start()
+                continue
+            client.setblocking(0)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = CLISession(device, self.conditions)
+            conn = TelnetConnection(client, session)
+            self.conns[client.fileno()] = conn
+            self.poller.register(client.fileno(), select.POLLIN)
+            self._queue(conn, TELNET_OPTIONS + session.banner())
+
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(READ_BUF)
+        except socket.error:
+            data = ''
+        if not data:
+            self._close(conn)
+            return
+        output = conn.session.feed(conn.strip_iac(data))
+        if output:
+            self._queue(conn, output)
+        elif conn.session.closed:
+            self._close(conn)
+
+    def _queue(self, conn, data):
+        conn.queue.append([time.time() + self.conditions.latency, data])
+        self.pending.add(conn)
+
+    def _flush_pending(self, now):
+        '''Send whatever queued output is due and return how long until more is.'''
+        timeout = 1.0
+        for conn in list(self.pending):
+            wait = self._flush(conn, now)
+            if wait is None:
+                self.pending.discard(conn)
+                if conn.session.closed:
+                    self._close(conn)
+            else:
+                timeout = min(timeout, wait)
+        return timeout
+
+    def _flush(self, conn, now):
+        '''Send conn's due output within its bandwidth - return seconds until it can send more or
+        None if its queue is empty.'''
+        bandwidth = self.conditions.bandwidth
+        while conn.queue:
+            ready, data = conn.queue[0]
+            if ready > now:
+                return ready - now
+            allowed = len(data)
+            if bandwidth:
+                conn.tokens = min(conn.tokens + (now - conn.token_time) * bandwidth,
+                                  max(bandwidth * BURST, 1))
+                conn.token_time = now
+                allowed = min(allowed, int(conn.tokens))
+                if not allowed:
+                    return (1 - conn.tokens) / bandwidth
+            try:
+                sent = conn.sock.send(data[:allowed])
+            except socket.error:
+                # Client isn't keeping up (or is gone - the read side will find out)
+                return BURST
+            conn.tokens -= sent
+            if sent < len(data):
+                conn.queue[0][1] = data[sent:]
+            else:
+                conn.queue.popleft()
+        return None
+
+    def _close(self, conn):
+        fd = conn.sock.fileno()
+        if fd in self.conns:
+            self.poller.unregister(fd)
+            del self.conns[fd]
+        self.pending.discard(conn)
+        conn.sock.close()
+
+    def _ssh_session(self, sock, device):
+        '''Run an SSH session (in its own thread) - paramiko handles authentication.'''
+        transport = paramiko.Transport(sock)
+        transport.add_server_key(self.host_key)
+        server = SSHServer(device, self.conditions)
+        try:
+            transport.start_server(server=server)
+            chan = transport.accept(SSH_TIMEOUT)
+            if chan is None or not server.shell.wait(SSH_TIMEOUT):
+                return
+            session = CLISession(device, self.conditions, login=False)
+            self._ssh_send(chan, session.banner())
+            while not session.closed:
+                data = chan.recv(READ_BUF)
+                if not data:
+                    break
+                self._ssh_send(chan, session.feed(data))
+            chan.close()
+        except (paramiko.SSHException, EOFError, socket.error):
+            pass
+        finally:
+            transport.close()
+
+    def _ssh_send(self, chan, data):
+        if not data:
+            return
+        if self.conditions.latency:
+            time.sleep(self.conditions.latency)
+        if not self.conditions.bandwidth:
+            chan.sendall(data)
+            return
+        size = max(int(self.conditions.bandwidth * BURST), 1)
+        for pos in xrange(0, len(data), size):
+            chan.sendall(data[pos:pos + size])
+            time.sleep(float(size) / self.conditions.bandwidth)
+
+if paramiko:
+    class SSHServer(paramiko.ServerInterface):
+        '''Password authentication and an interactive shell for one SSH connection'''
+
+        def __init__(self, device, conditions):
+            self.device = device
+            self.conditions = conditions
+            self.shell = threading.Event()
+
+        def get_allowed_auths(self, username):
+            return 'password'
+
+        def check_auth_password(self, username, password):
+            if (username == self.device.username and password == self.device.password and
+                    self.conditions.rng.random() >= self.conditions.auth_fail_rate):
+                return paramiko.AUTH_SUCCESSFUL
+            return paramiko.AUTH_FAILED
+
+        def check_channel_request(self, kind, chanid):
+            if kind == 'session':
+                return paramiko.OPEN_SUCCEEDED
+            return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+        def check_channel_pty_request(self, channel, term, width, height, pixelwidth,
+                                      pixelheight, modes):
+            return True
+
+        def check_channel_shell_request(self, channel):
+            self.shell.set()
+            return True
+
+def build_devices(count, address=ADDRESS, telnet_port=TELNET_PORT, ssh_port=SSH_PORT,
+                  by_address=False, username=USERNAME, password=PASSWORD):
+    '''Return count FakeDevices - each on its own ports, or with by_address its own address.'''
+    base = struct.unpack('!I', socket.inet_aton(address))[0]
+    devices = []
+    for index in xrange(count):
+        if by_address:
+            device = FakeDevice(index, socket.inet_ntoa(struct.pack('!I', base + index)),
+                                telnet_port, ssh_port, username, password)
+        else:
+            device = FakeDevice(index, address, telnet_port + index, ssh_port + index, username,
+                                password)
+        if max(device.telnet_port, device.ssh_port) > 65535:
+            sys.exit('Error:  Not enough ports for {} devices - use --by-address'.format(count))
+        devices.append(device)
+    return devices
+
+def write_inventory(devices, file1, netmiko=False):
+    '''Write the devices as an inventory - ADDRESS/TELNET_PORT/SSH_PORT/... for the class2 and
+    class4 paramiko/pexpect scripts, or netmiko's ip/port/... keys.'''
+    inventory = []
+    for device in devices:
+        if netmiko:
+            inventory.append({'HOSTNAME': device.hostname, 'device_type': 'cisco_ios',
+                              'ip': device.address, 'port': device.ssh_port,
+                              'username': device.username, 'password': device.password})
+        else:
+            inventory.append({'HOSTNAME': device.hostname, 'ADDRESS': device.address,
+                              'TELNET_PORT': device.telnet_port, 'SSH_PORT': device.ssh_port,
+                              'USERNAME': device.username, 'PASSWORD': device.password})
+    with open(file1, 'w') as f1:
+        yaml.safe_dump(inventory, f1, explicit_start=True, default_flow_style=False)
+
+def load_host_key(file1=None):
+    '''Return the SSH host key saved in file1, creating it if it doesn't exist yet - a key which
+    stays the same across runs means ssh (e.g. the pexpect scripts) only has to accept it once.'''
+    if file1:
+        try:
+            return paramiko.RSAKey.from_private_key_file(file1)
+        except IOError:
+            pass
+    host_key = paramiko.RSAKey.generate(2048)
+    if file1:
+        host_key.write_private_key_file(file1)
+    return host_key
+
+def raise_fd_limit():
+    '''Allow as many open sockets as the hard limit does - each device needs a listener.'''
+    try:
+        import resource
+        _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError):
+        pass
+
+
+####################################################################################################
+def main(args):
+    '''Acquire necessary input options, start the emulated devices and serve them until
+    interrupted.'''
+    parser = argparse.ArgumentParser(
+        description='Emulate IOS routers over telnet/SSH for testing and benchmarking')
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-n', '--devices', type=int, default=DEVICES,
+                        help='number of devices (default {})'.format(DEVICES))
+    parser.add_argument('-a', '--address', default=ADDRESS,
+                        help='address to listen on (default {})'.format(ADDRESS))
+    parser.add_argument('--by-address', action='store_true', default=False,
+                        help='give each device its own address (starting at --address) instead '
+                             'of its own ports')
+    parser.add_argument('-t', '--telnet-port', type=int, default=TELNET_PORT,
+                        help='first telnet port (default {})'.format(TELNET_PORT))
+    parser.add_argument('-s', '--ssh-port', type=int, default=SSH_PORT,
+                        help='first SSH port (default {})'.format(SSH_PORT))
+    parser.add_argument('--ssh', action='store_true', default=False,
+                        help='also serve SSH (requires paramiko)')
+    parser.add_argument('-k', '--host-key',
+                        help='SSH host key file - created if missing (default a new key each run)')
+    parser.add_argument('-u', '--username', default=USERNAME, help='login username')
+    parser.add_argument('-P', '--password', default=PASSWORD, help='login password')
+    parser.add_argument('-i', '--inventory', help='write the devices to this YAML inventory')
+    parser.add_argument('--netmiko', action='store_true', default=False,
+                        help='write the inventory with netmiko keys (device_type, ip, port, ...)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds before each response is sent')
+    parser.add_argument('--bandwidth', type=int, default=0,
+                        help='bytes/second per session (default unlimited)')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='fraction of sessions dropped partway through')
+    parser.add_argument('--auth-fail-rate', type=float, default=0.0,
+                        help='fraction of logins rejected')
+    parser.add_argument('--hang-rate', type=float, default=0.0,
+                        help='fraction of commands never answered')
+    parser.add_argument('--down-rate', type=float, default=0.0,
+                        help='fraction of devices not listening')
+    parser.add_argument('--tech-lines', type=int, default=TECH_LINES,
+                        help='lines of show tech-support output (default {})'.format(TECH_LINES))
+    parser.add_argument('--seed', type=int, help='random seed for repeatable fault injection')
+    parser.add_argument('-v', '--verbose', action='store_true', help='display verbose output',
+                        default=False)
+    args = parser.parse_args()
+
+    host_key = None
+    if args.ssh:
+        if not paramiko:
+            sys.exit('Error:  SSH requires paramiko - pip install paramiko')
+        host_key = load_host_key(args.host_key)
+
+    raise_fd_limit()
+    conditions = Conditions(args.latency, args.bandwidth, args.fail_rate, args.auth_fail_rate,
+                            args.hang_rate, args.down_rate, args.tech_lines, args.seed)
+    devices = build_devices(args.devices, args.address, args.telnet_port, args.ssh_port,
+                            args.by_address, args.username, args.password)
+    network = FakeNetwork(devices, conditions, args.ssh, host_key, args.verbose)
+    network.listen()
+    if args.inventory:
+        write_inventory(devices, args.inventory, args.netmiko)
+
+    print 'Serving {} devices ({} down) - telnet {}:{}{}'.format(
+        len(devices), len([device for device in devices if device.down]), devices[0].address,
+        devices[0].telnet_port, ', ssh {}:{}'.format(devices[0].address, devices[0].ssh_port)
+        if args.ssh else '')
+    sys.stdout.flush()
+    try:
+        network.serve_forever()
+    except KeyboardInterrupt:
+        print '\n{} connections served'.format(network.connections)
+
+# Call main and put all logic there per best practices.
+# No triple quotes here because not a function!
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]) or 0)
@@ -0,0 +1,440 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Shared router/switch inventory for the class scripts (routers.yaml, routers-nm.yaml, srx1.yaml,
+...) - replaces the yaml_input/check_input functions each script used to carry
+
+Devices are streamed one at a time instead of loading the whole file with yaml.load, so callers
+can start working on the first devices while the rest of the file is still being parsed and
+memory is proportional to one device record.  Supported inventory layouts:
+ * YAML - a sequence of devices, a single device mapping, or several documents (--- separated)
+   each holding either of those
+ * JSON Lines (.jsonl/.ndjson) - one JSON object per line
+
+Parsing a large inventory with PyYAML takes longer than a small run's actual work, so each
+inventory is also compiled into a binary cache (<inventory dir>/.invcache/<inventory>.invc - a
+header pickle followed by a pickle of the devices plus hostname, IP address, device type and group
+indexes).  The cache is used as long as the inventory's mtime and size - or, if those changed, its
+SHA-1 hash - still match, otherwise it's rebuilt the next time the whole inventory is loaded
+(Inventory.load, or running this module on the inventory).  iter_devices doesn't rebuild it - on
+a miss devices are streamed straight from the inventory file.
+
+Inventory wraps the compiled form for lookups by hostname/IP address/device type/group without
+scanning the device list, and check_input prompts for any connection details a device is missing.
+
+Scripts in the class directories import this with:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from inventory_helper import ...
+'''
+
+# Imports
+from getpass import getpass
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import yaml
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Streaming needs node composition one sequence item at a time, which the libyaml loaders don't
+# expose - combine the libyaml event parser (if available) with the pure Python composer
+try:
+    from yaml.cyaml import CParser as YamlParser
+except ImportError:
+    class YamlParser(yaml.reader.Reader, yaml.scanner.Scanner, yaml.parser.Parser):
+        def __init__(self, stream):
+            yaml.reader.Reader.__init__(self, stream)
+            yaml.scanner.Scanner.__init__(self)
+            yaml.parser.Parser.__init__(self)
+
+# Globals
+CACHE_DIR = '.invcache'
+CACHE_EXT = '.invc'
+CACHE_VERSION = 2
+DEFAULT_SSH_PORT = 22
+DEVICE_TYPE_KEYS = ('device_type', 'DEVICE_TYPE')
+GROUP_KEYS = ('GROUPS', 'groups', 'GROUP', 'group')  # Value may be one group or a list
+HASH_BLOCK = 1024 * 1024
+HOSTNAME_KEYS = ('HOSTNAME', 'hostname')
+IP_KEYS = ('ADDRESS', 'ip', 'HOST', 'host')
+JSONL_EXTS = ('.jsonl', '.ndjson')
+# Keys only used for inventory lookups - not valid connection (e.g. netmiko) arguments
+INVENTORY_KEYS = HOSTNAME_KEYS + GROUP_KEYS
+# Connection details check_input ensures are present:  [(key, prompt, copy from key), ...] - a
+# missing key is copied from "copy from key" if set, else prompted for (getpass if no prompt)
+NETMIKO_FIELDS = [('device_type', 'Router device type: ', None),
+                  ('ip', 'Router IPv4 Address: ', None),
+                  ('username', 'Username for Router: ', None),
+                  ('password', None, None)]
+SRX_FIELDS = [('HOST', 'SRX IPv4 Address: ', None),
+              ('USER', 'Username for SRX: ', None),
+              ('PASSWORD', None, None)]
+SSH_FIELDS = [('ADDRESS', 'Router IPv4 Address: ', None),
+              ('HOSTNAME', None, 'ADDRESS'),
+              ('USERNAME', 'Username for Router: ', None),
+              ('PASSWORD', None, None)]
+
+# Metadata
+__author__ = 'James R. Small'
+__contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
+__date__ = 'October 18, 2026'
+__version__ = '0.0.5'
+
+
+class StreamLoader(YamlParser, yaml.composer.Composer, yaml.constructor.SafeConstructor,
+                   yaml.resolver.Resolver):
+    '''Safe YAML loader which can compose and construct one node at a time'''
+
+    def __init__(self, stream):
+        YamlParser.__init__(self, stream)
+        yaml.composer.Composer.__init__(self)
+        yaml.constructor.SafeConstructor.__init__(self)
+        yaml.resolver.Resolver.__init__(self)
+
+def _str_keys(pairs):
+    '''JSON object hook - use str keys so records can be passed as **kwargs like YAML ones.'''
+    return dict((str(key), value) for key, value in pairs)
+
+def _iter_jsonl(fh1):
+    for line in fh1:
+        if line.strip():
+            yield json.loads(line, object_pairs_hook=_str_keys)
+
+def _iter_yaml(fh1):
+    # Walk the event stream and construct one sequence item (device) at a time
+    loader = StreamLoader(fh1)
+    try:
+        loader.get_event()  # StreamStart
+        while loader.check_event(yaml.DocumentStartEvent):
+            loader.get_event()
+            if loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    yield loader.construct_document(loader.compose_node(None, None))
+                loader.get_event()
+            else:
+                device = loader.construct_document(loader.compose_node(None, None))
+                # Skip empty documents
+                if device is not None:
+                    yield device
+            loader.get_event()  # DocumentEnd
+    finally:
+        loader.dispose()
+
+def parse_inventory(file1):
+    '''Generator yielding the devices parsed from inventory file file1 one at a time.'''
+    with open(file1) as fh1:
+        if os.path.splitext(file1)[1].lower() in JSONL_EXTS:
+            for device in _iter_jsonl(fh1):
+                yield device
+        else:
+            for device in _iter_yaml(fh1):
+                yield device
+
+####################################################################################################
+def file_hash(file1):
+    '''Return the SHA-1 hex digest of file1's contents.'''
+    digest = hashlib.sha1()
+    with open(file1, 'rb') as fh1:
+        for chunk in iter(lambda: fh1.read(HASH_BLOCK), ''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_path(file1):
+    dir1, name = os.path.split(os.path.abspath(file1))
+    return os.path.join(dir1, CACHE_DIR, name + CACHE_EXT)
+
+def _first_key(device, keys):
+    for key in keys:
+        if key in device:
+            return device[key]
+    return None
+
+def _device_groups(device):
+    groups = _first_key(device, GROUP_KEYS)
+    if isinstance(groups, basestring):
+        return [groups]
+    return groups or []
+
+def compile_inventory(devices):
+    '''Return the compiled form of a list of devices - {'devices': devices, 'hostnames':
+    {hostname: position}, 'ips': {IP address: position}, 'device_types': {device type:
+    [position, ...]}, 'groups': {group: [position, ...]}}.'''
+    hostnames = {}
+    ips = {}
+    device_types = {}
+    groups = {}
+    for pos, device in enumerate(devices):
+        if not isinstance(device, dict):
+            continue
+        hostname = _first_key(device, HOSTNAME_KEYS)
+        if hostname is not None:
+            hostnames.setdefault(hostname, pos)
+        ip_addr = _first_key(device, IP_KEYS)
+        if ip_addr is not None:
+            ips.setdefault(ip_addr, pos)
+        device_type = _first_key(device, DEVICE_TYPE_KEYS)
+        if device_type is not None:
+            device_types.setdefault(device_type, []).append(pos)
+        for group in _device_groups(device):
+            groups.setdefault(group, []).append(pos)
+    return {'devices': devices, 'hostnames': hostnames, 'ips': ips,
+            'device_types': device_types, 'groups': groups}
+
+def write_cache(file1, compiled, digest=None):
+    '''Save compiled inventory for file1 - written to a temporary file and renamed into place.
+    Failure to write (e.g. read-only directory) isn't an error, the cache just isn't used.'''
+    path = cache_path(file1)
+    try:
+        stat1 = os.stat(file1)
+        header = {'version': CACHE_VERSION, 'mtime': stat1.st_mtime, 'size': stat1.st_size,
+                  'hash': digest or file_hash(file1)}
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as fh1:
+            pickle.dump(header, fh1, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(compiled, fh1, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        return False
+    return True
+
+def read_cache(file1):
+    '''Return the compiled inventory for file1 if its cache is still valid, otherwise None.'''
+    path = cache_path(file1)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'rb') as fh1:
+            header = pickle.load(fh1)
+            if header.get('version') != CACHE_VERSION:
+                return None
+            stat1 = os.stat(file1)
+            if header['mtime'] != stat1.st_mtime or header['size'] != stat1.st_size:
+                # Touched or copied but maybe not changed - compare contents
+                digest = file_hash(file1)
+                if header['hash'] != digest:
+                    return None
+                compiled = pickle.load(fh1)
+                # Record the new mtime so the hash isn't needed next time
+                write_cache(file1, compiled, digest)
+                return compiled
+            return pickle.load(fh1)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError, KeyError, AttributeError,
+            ValueError, IndexError):
+        return None
+
+def load_inventory(file1, verbose=False):
+    '''Return the compiled inventory for file1 - from the cache if valid, otherwise parse the
+    file and update the cache.'''
+    compiled = read_cache(file1)
+    if compiled is not None:
+        if verbose:
+            print 'Loaded data file ({}) from cache'.format(file1)
+        return compiled
+    if verbose:
+        print 'Reading data file ({})'.format(file1)
+    compiled = compile_inventory(list(parse_inventory(file1)))
+    write_cache(file1, compiled)
+    return compiled
+
+def iter_inventory(file1, verbose=False, use_cache=True):
+    '''Generator yielding the devices in inventory file file1 one at a time.  If the cache is
+    valid devices come from it, otherwise they're streamed from the file as it's parsed and the
+    cache is updated once all have been read.  With use_cache=False memory stays proportional
+    to one device.'''
+    compiled = read_cache(file1) if use_cache else None
+    if compiled is not None:
+        if verbose:
+            print 'Loaded data file ({}) from cache'.format(file1)
+        for device in compiled['devices']:
+            yield device
+        return
+    if verbose:
+        print 'Reading data file ({})'.format(file1)
+    devices = []
+    for device in parse_inventory(file1):
+        if use_cache:
+            # Callers may fill in missing values (e.g. a prompted password) - cache a copy
+            devices.append(dict(device) if isinstance(device, dict) else device)
+        yield device
+    if use_cache:
+        write_cache(file1, compile_inventory(devices))
+
+####################################################################################################
+class Inventory(object):
+    '''Inventory devices with lookups by hostname, IP address, device type and group'''
+
+    def __init__(self, compiled=None):
+        if compiled is None:
+            compiled = compile_inventory([])
+        self.devices = compiled['devices']
+        self.hostnames = compiled['hostnames']
+        self.ips = compiled['ips']
+        self.device_types = compiled['device_types']
+        self.groups = compiled['groups']
+
+    @classmethod
+    def load(cls, file1, default_file=None, required=False, verbose=False):
+        '''Load inventory file1 (or its compiled cache).  If file1 doesn't exist exit when
+        required, otherwise return an empty inventory - reporting the error if verbose unless
+        file1 is default_file.'''
+        if os.path.isfile(file1):
+            return cls(load_inventory(file1, verbose))
+        if required:
+            sys.exit('Error:  Invalid filename {}'.format(file1))
+        # Don't output error if using default file name
+        if verbose and file1 != default_file:
+            print 'Error:  Invalid filename {}'.format(file1)
+        return cls()
+
+    def __iter__(self):
+        return iter(self.devices)
+
+    def __len__(self):
+        return len(self.devices)
+
+    def first(self):
+        '''Return the first device (for single device inventories) or {} if there are none.'''
+        return self.devices[0] if self.devices else {}
+
+    def by_hostname(self, hostname):
+        pos = self.hostnames.get(hostname)
+        return None if pos is None else self.devices[pos]
+
+    def by_ip(self, ip_addr):
+        pos = self.ips.get(ip_addr)
+        return None if pos is None else self.devices[pos]
+
+    def of_type(self, device_type):
+        return [self.devices[pos] for pos in self.device_types.get(device_type, [])]
+
+    def in_group(self, group):
+        return [self.devices[pos] for pos in self.groups.get(group, [])]
+
+    def select(self, hosts=None, groups=None, device_type=None):
+        '''Generator yielding the devices (in inventory order) matching all of the passed
+        filters - hosts is a list of hostnames or IP addresses, groups a list of groups (any
+        may match).'''
+        selected = None
+        if hosts:
+            selected = set()
+            for host in hosts:
+                pos = self.hostnames.get(host, self.ips.get(host))
+                if pos is not None:
+                    selected.add(pos)
+        if groups:
+            in_groups = set()
+            for group in groups:
+                in_groups.update(self.groups.get(group, []))
+            selected = in_groups if selected is None else selected & in_groups
+        if device_type:
+            of_type = set(self.device_types.get(device_type, []))
+            selected = of_type if selected is None else selected & of_type
+        if selected is None:
+            for device in self.devices:
+                yield device
+        else:
+            for pos in sorted(selected):
+                yield self.devices[pos]
+
+def select_devices(devices, hosts=None, groups=None, device_type=None):
+    '''Generator yielding the devices from iterable devices matching all of the passed filters -
+    the streaming equivalent of Inventory.select, one device in memory at a time.'''
+    if not (hosts or groups or device_type):
+        for device in devices:
+            yield device
+        return
+    # Like the hostname/IP indexes only the first device with each host is selected
+    hosts = set(hosts) if hosts else None
+    groups = set(groups) if groups else None
+    for device in devices:
+        if not isinstance(device, dict):
+            continue
+        if hosts is not None:
+            host = _first_key(device, HOSTNAME_KEYS)
+            if host not in hosts:
+                host = _first_key(device, IP_KEYS)
+                if host not in hosts:
+                    continue
+        if groups and not groups.intersection(_device_groups(device)):
+            continue
+        if device_type and _first_key(device, DEVICE_TYPE_KEYS) != device_type:
+            continue
+        if hosts is not None:
+            hosts.discard(host)
+        yield device
+
+def iter_devices(file1, hosts=None, groups=None, device_type=None, default_file=None,
+                 required=False, verbose=False, use_cache=True):
+    '''Generator for fanning out over the devices in file1 matching the passed filters (see
+    Inventory.select).  If file1's cache is valid devices are looked up in its indexes,
+    otherwise (or with use_cache=False) they're streamed and filtered as file1 is parsed so
+    memory stays proportional to one device.  If file1 doesn't exist either exit (required) or
+    yield a single empty device for check_input to prompt for - as for an empty file1 with no
+    filters.'''
+    if not os.path.isfile(file1):
+        Inventory.load(file1, default_file, required, verbose)
+        yield {}
+        return
+    compiled = read_cache(file1) if use_cache else None
+    if compiled is not None:
+        if verbose:
+            print 'Loaded data file ({}) from cache'.format(file1)
+        devices = Inventory(compiled).select(hosts, groups, device_type)
+    else:
+        if verbose:
+            print 'Reading data file ({})'.format(file1)
+        devices = select_devices(parse_inventory(file1), hosts, groups, device_type)
+    found = False
+    for device in devices:
+        found = True
+        yield device
+    if not found and not (hosts or groups or device_type):
+        yield {}
+
+def connect_args(device):
+    '''Return device without the inventory only keys (hostname, groups) so it can be passed as
+    **kwargs to e.g. netmiko.ConnectHandler.'''
+    return dict((key, value) for key, value in device.iteritems() if key not in INVENTORY_KEYS)
+
+def check_input(device, fields, port_key=None, ssh_port=None, verbose=False):
+    '''Validate device input data, prompt for anything missing.  fields is one of NETMIKO_FIELDS,
+    SRX_FIELDS or SSH_FIELDS.  If port_key is passed the device's SSH port is set from ssh_port
+    (e.g. a -p option) if passed, else left as is or set to the default of 22 if missing.'''
+    for key, prompt, copy_key in fields:
+        if key not in device:
+            if copy_key:
+                device[key] = device[copy_key]
+            elif prompt:
+                device[key] = raw_input(prompt)
+            else:
+                device[key] = getpass()
+    if port_key is None:
+        return device
+    if port_key not in device:
+        if verbose and not ssh_port:
+            print '{} not specified, using default of {}.  Override with -p option.'.format(
+                port_key, DEFAULT_SSH_PORT)
+        device[port_key] = ssh_port or DEFAULT_SSH_PORT
+    elif ssh_port:
+        if verbose:
+            print 'overriding {} value ({}) with passed -p value ({})'.format(port_key,
+                device[port_key], ssh_port)
+        device[port_key] = ssh_port
+    return device
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Usage:  {} <inventory file> [...] - compile inventory cache(s)'.format(
+            sys.argv[0]))
+    for myfile in sys.argv[1:]:
+        myinventory = Inventory.load(myfile, required=True, verbose=True)
+        print '{}:  {} devices, {} hostnames, {} device types, {} groups'.format(myfile,
+            len(myinventory), len(myinventory.hostnames), len(myinventory.device_types),
+            len(myinventory.groups))
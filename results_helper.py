@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Streaming result sink for fleet command runs - one JSON record per device (NDJSON/JSON Lines)
+is written as soon as that device's worker finishes, so memory stays flat no matter how many
+devices are run instead of collecting every output before printing
+
+Records:
+    {"device": ..., "command": ..., "success": true/false, "start": ISO timestamp,
+     "connect_time": seconds, "command_time": seconds, "elapsed": seconds,
+     "output": command output or null, "error": error message or null}
+
+Writes are buffered - the buffer is written once it holds BUFFER_RECORDS records or
+FLUSH_INTERVAL seconds have passed since the last write.  write_from, which takes the records off
+the workers' result queue, also flushes whenever the queue has been idle for FLUSH_INTERVAL, so a
+record is never left sitting in the buffer while the remaining devices are slow to finish.
+
+Scripts in the class directories import this with:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from results_helper import ...
+'''
+
+# Imports
+from collections import OrderedDict
+import datetime
+import json
+import Queue
+import sys
+import time
+
+# Globals
+BUFFER_RECORDS = 100
+FLUSH_INTERVAL = 1.0  # Seconds
+STDOUT = '-'
+
+# Metadata
+__author__ = 'James R. Small'
+__contact__ = 'james<dot>r<dot>small<at>outlook<dot>com'
+__date__ = 'October 18, 2026'
+__version__ = '0.0.2'
+
+
+def result_record(device, command, start, connect_time, command_time=0.0, output=None,
+                  error=None):
+    '''Build the result record for one device - start is a time.time() value, connect_time and
+    command_time are in seconds.  Pass error (and no output) if the device failed.'''
+    return OrderedDict([('device', device), ('command', command), ('success', error is None),
+                        ('start', datetime.datetime.fromtimestamp(start).isoformat()),
+                        ('connect_time', round(connect_time, 3)),
+                        ('command_time', round(command_time, 3)),
+                        ('elapsed', round(connect_time + command_time, 3)),
+                        ('output', output), ('error', error)])
+
+def format_result(record):
+    '''Return record as text (the scripts' non NDJSON output).'''
+    if record['success']:
+        return '{} on [{}]:\n{}\n'.format(record['command'], record['device'], record['output'])
+    return 'Error:  {}\n'.format(record['error'])
+
+class ResultWriter(object):
+    '''Buffered NDJSON writer of result records to a file or stdout ("-")'''
+
+    def __init__(self, file1=STDOUT, buffer_records=BUFFER_RECORDS,
+                 flush_interval=FLUSH_INTERVAL):
+        if file1 == STDOUT:
+            self.fh1 = sys.stdout
+        else:
+            self.fh1 = open(file1, 'wb')
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.count = 0
+        self.last_flush = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record):
+        self.buffer.append(json.dumps(record) + '\n')
+        self.count += 1
+        if (len(self.buffer) >= self.buffer_records or
+                time.time() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def write_from(self, queue, count):
+        '''Write count records from queue (a Queue.Queue or multiprocessing.Queue) as they
+        arrive, flushing the buffer if no record arrives within flush_interval.'''
+        for _ in xrange(count):
+            while True:
+                try:
+                    record = queue.get(timeout=self.flush_interval)
+                    break
+                except Queue.Empty:
+                    if self.buffer:
+                        self.flush()
+            self.write(record)
+
+    def flush(self):
+        if self.buffer:
+            self.fh1.write(''.join(self.buffer))
+            self.buffer = []
+        self.fh1.flush()
+        self.last_flush = time.time()
+
+    def close(self):
+        self.flush()
+        if self.fh1 is not sys.stdout:
+            self.fh1.close()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+####################################################################################################
+'''Regression tests for the inventory_helper compiled cache - run with
+python -m unittest test_inventory_helper
+'''
+
+# Imports
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Local Imports
+import inventory_helper
+from inventory_helper import cache_path, iter_devices, iter_inventory, load_inventory, read_cache
+
+# Globals
+ROUTERS = '''---
+- ADDRESS: 10.1.1.1
+  HOSTNAME: rtr1
+  USERNAME: pyclass
+- ADDRESS: 10.1.1.2
+  HOSTNAME: rtr2
+  USERNAME: pyclass
+  GROUPS: [core]
+'''
+
+__version__ = '0.0.2'
+
+
+class TestInventoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.inventory = os.path.join(self.workdir, 'routers.yaml')
+        self.write_inventory(ROUTERS)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write_inventory(self, text, mtime=None):
+        with open(self.inventory, 'w') as fh1:
+            fh1.write(text)
+        if mtime is not None:
+            os.utime(self.inventory, (mtime, mtime))
+
+    def hostnames(self, compiled):
+        return sorted(compiled['hostnames'])
+
+    def test_cache_written_and_used(self):
+        self.assertIsNone(read_cache(self.inventory))
+        compiled = load_inventory(self.inventory)
+        self.assertTrue(os.path.isfile(cache_path(self.inventory)))
+        self.assertEqual(read_cache(self.inventory), compiled)
+        self.assertEqual(self.hostnames(compiled), ['rtr1', 'rtr2'])
+
+    def test_changed_size(self):
+        load_inventory(self.inventory)
+        self.write_inventory(ROUTERS + '- ADDRESS: 10.1.1.3\n  HOSTNAME: rtr3\n')
+        self.assertIsNone(read_cache(self.inventory))
+        self.assertEqual(self.hostnames(load_inventory(self.inventory)), ['rtr1', 'rtr2', 'rtr3'])
+
+    def test_changed_same_size(self):
+        # Same size, different contents - only the hash catches this
+        load_inventory(self.inventory)
+        mtime = os.path.getmtime(self.inventory)
+        self.write_inventory(ROUTERS.replace('rtr2', 'rtr9'), mtime + 10)
+        self.assertIsNone(read_cache(self.inventory))
+        self.assertEqual(self.hostnames(load_inventory(self.inventory)), ['rtr1', 'rtr9'])
+
+    def test_touched_not_changed(self):
+        compiled = load_inventory(self.inventory)
+        mtime = os.path.getmtime(self.inventory)
+        os.utime(self.inventory, (mtime + 10, mtime + 10))
+        self.assertEqual(read_cache(self.inventory), compiled)
+        # The cache header was updated with the new mtime
+        with open(cache_path(self.inventory), 'rb') as fh1:
+            self.assertEqual(pickle.load(fh1)['mtime'], os.path.getmtime(self.inventory))
+
+    def test_old_cache_version(self):
+        load_inventory(self.inventory)
+        version = inventory_helper.CACHE_VERSION
+        inventory_helper.CACHE_VERSION = version + 1
+        try:
+            self.assertIsNone(read_cache(self.inventory))
+        finally:
+            inventory_helper.CACHE_VERSION = version
+
+    def test_corrupt_cache(self):
+        load_inventory(self.inventory)
+        # UnpicklingError, ValueError
+        for data in ('not a pickle', 'I1x\n.'):
+            with open(cache_path(self.inventory), 'wb') as fh1:
+                fh1.write(data)
+            self.assertIsNone(read_cache(self.inventory))
+            self.assertEqual(self.hostnames(load_inventory(self.inventory)), ['rtr1', 'rtr2'])
+
+    def test_iter_devices_no_cache(self):
+        # Streamed from the file on a miss - the cache isn't built
+        self.assertEqual([device['HOSTNAME'] for device in iter_devices(self.inventory)],
+                         ['rtr1', 'rtr2'])
+        self.assertFalse(os.path.exists(cache_path(self.inventory)))
+
+    def test_iter_devices_filters(self):
+        # Same selection streamed from the file and looked up in the cache indexes
+        filters = [((['rtr2'], None), ['rtr2']), ((['10.1.1.1'], None), ['rtr1']),
+                   ((None, ['core']), ['rtr2']), ((['rtr1'], ['core']), []),
+                   ((['rtr9'], None), [])]
+        for use_cache in (False, True):
+            if use_cache:
+                load_inventory(self.inventory)
+            for (hosts, groups), expected in filters:
+                self.assertEqual([device['HOSTNAME'] for device in iter_devices(
+                    self.inventory, hosts, groups, use_cache=use_cache)], expected)
+
+    def test_iter_inventory_caller_changes(self):
+        # Values filled in by the caller (e.g. a prompted password) mustn't end up in the cache
+        for device in iter_inventory(self.inventory):
+            device['PASSWORD'] = 'secret'
+        for device in read_cache(self.inventory)['devices']:
+            self.assertNotIn('PASSWORD', device)
+
+if __name__ == '__main__':
+    unittest.main()